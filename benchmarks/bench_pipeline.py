@@ -0,0 +1,292 @@
+"""Offline benchmark of the parse_habr pipeline stages.
+
+Feed pages are served from the saved corpus by a local HTTP server,
+so results do not depend on the live site.
+
+Usage:
+    $ python -m benchmarks.bench_pipeline
+    $ python -m benchmarks.bench_pipeline --save-baseline baseline.json
+    $ python -m benchmarks.bench_pipeline --baseline baseline.json
+
+"""
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+import tracemalloc
+
+from habr_challenge import crawler, parser
+from habr_challenge.parser_data_collector import \
+    ParserDataCollector, \
+    get_morph_analyzer
+from habr_challenge.report_generator import ReportGenerator
+from habr_challenge.site_config import SiteConfig
+
+from benchmarks.server import CorpusServer, load_corpus
+
+
+DEFAULT_SIZES = (10, 50, 200)
+DEFAULT_TOLERANCE = .25
+
+STAGES = ('crawl', 'parse', 'collect', 'report')
+# Stages processing pages, throughput of the others is not reported
+THROUGHPUT_STAGES = ('crawl', 'parse')
+
+
+def bench_crawl(site_config, size):
+    """Crawl size pages.
+
+    Returns:
+        ([str], [float]): pages crawled and latency of each page.
+
+    """
+    user_settings = argparse.Namespace(pages=size, show_progress=False)
+    pages, latencies = [], []
+    started = time.perf_counter()
+    for _, articles_list in crawler.crawl(site_config, user_settings):
+        finished = time.perf_counter()
+        pages.append(articles_list)
+        latencies.append(finished - started)
+        started = finished
+    return pages, latencies
+
+
+def bench_parse(site_config, pages):
+    """Parse articles from every page.
+
+    Returns:
+        ([ARTICLE_DATA], [float]): articles parsed
+            and latency of each page.
+
+    """
+    parse_backend = parser.get_parse_backend(site_config)
+    articles_data, latencies = [], []
+    for page in pages:
+        started = time.perf_counter()
+        articles_data.extend(parse_backend.parse_articles(page))
+        latencies.append(time.perf_counter() - started)
+    return articles_data, latencies
+
+
+def bench_collect(articles_data):
+    """Collect every article with a new collector.
+
+    Returns:
+        (dict, [float]): collector result_dict
+            and latency of each article.
+
+    """
+    parser_data_collector = ParserDataCollector()
+    latencies = []
+    for article_data in articles_data:
+        started = time.perf_counter()
+        parser_data_collector.collect(article_data)
+        latencies.append(time.perf_counter() - started)
+    return parser_data_collector.result_dict, latencies
+
+
+def bench_report(result_dict):
+    """Print report into memory.
+
+    Returns:
+        (str, [float]): report printed and its latency.
+
+    """
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) as report:
+        ReportGenerator(result_dict).print_report()
+    return report.getvalue(), [time.perf_counter() - started]
+
+
+def percentile(values, q):
+    """Nearest-rank percentile.
+
+    Args:
+        values ([float]): measured values.
+        q (float): percentile in [0, 100].
+
+    """
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q / 100.))]
+
+
+def run_stage(bench, *args):
+    """Run stage benchmark twice: for timings and for peak memory.
+
+    Returns:
+        (output, float, [float], int): stage output, total seconds,
+            latencies and peak memory allocated in bytes.
+
+    """
+    started = time.perf_counter()
+    output, latencies = bench(*args)
+    seconds = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        bench(*args)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return output, seconds, latencies, peak_memory
+
+
+def bench_pipeline(site_config, size, repeat=1):
+    """Benchmark every pipeline stage on size pages.
+
+    Args:
+        site_config (SiteConfig): config of the local corpus server.
+        size (int): number of pages crawled.
+        repeat (int): best of repeat runs is reported.
+
+    Returns:
+        ([dict]): result of every stage.
+
+    """
+    best = {}
+    for _ in range(repeat):
+        pages, *crawl_stats = run_stage(bench_crawl, site_config, size)
+        articles_data, *parse_stats = run_stage(
+            bench_parse, site_config, pages
+        )
+        result_dict, *collect_stats = run_stage(bench_collect, articles_data)
+        _, *report_stats = run_stage(bench_report, result_dict)
+
+        for stage, (seconds, latencies, peak_memory) in zip(STAGES, (
+            crawl_stats, parse_stats, collect_stats, report_stats
+        )):
+            if stage in best and best[stage]['seconds'] <= seconds:
+                continue
+            best[stage] = {
+                'stage': stage,
+                'size': size,
+                'seconds': seconds,
+                'p50_ms': percentile(latencies, 50) * 1000,
+                'p90_ms': percentile(latencies, 90) * 1000,
+                'p99_ms': percentile(latencies, 99) * 1000,
+                'peak_memory_kb': peak_memory / 1024,
+            }
+            if stage in THROUGHPUT_STAGES:
+                best[stage].update(
+                    pages_per_s=len(pages) / seconds,
+                    articles_per_s=len(articles_data) / seconds
+                )
+    return [best[stage] for stage in STAGES]
+
+
+def compare(results, baseline, tolerance):
+    """Find stages slower or bigger than the baseline.
+
+    Args:
+        results ([dict]): current results.
+        baseline ([dict]): stored results.
+        tolerance (float): allowed relative regression.
+
+    Returns:
+        ([str]): regressions description.
+
+    """
+    baseline = {
+        (result['stage'], result['size']): result for result in baseline
+    }
+    regressions = []
+    for result in results:
+        expected = baseline.get((result['stage'], result['size']))
+        if expected is None:
+            continue
+        for metric in ('seconds', 'peak_memory_kb'):
+            if result[metric] > expected[metric] * (1 + tolerance):
+                regressions.append(
+                    '{stage}[{size}] {metric}: '
+                    '{actual:.3f} > {expected:.3f}'.format(
+                        stage=result['stage'], size=result['size'],
+                        metric=metric, actual=result[metric],
+                        expected=expected[metric]
+                    )
+                )
+    return regressions
+
+
+def print_results(results, file=sys.stdout):
+    row = (
+        '{stage:>8} {size:>6} {pages_per_s:>10} {articles_per_s:>12} '
+        '{p50_ms:>9.2f} {p90_ms:>9.2f} {p99_ms:>9.2f} {peak_memory_kb:>10.0f}'
+    )
+    print(
+        '{0:>8} {1:>6} {2:>10} {3:>12} {4:>9} {5:>9} {6:>9} {7:>10}'.format(
+            'stage', 'pages', 'pages/s', 'articles/s',
+            'p50 ms', 'p90 ms', 'p99 ms', 'peak KiB'
+        ),
+        file=file
+    )
+    for result in results:
+        throughput = {
+            key: '{0:.1f}'.format(result[key]) if key in result else '-'
+            for key in ('pages_per_s', 'articles_per_s')
+        }
+        print(row.format(**dict(result, **throughput)), file=file)
+
+
+def parse_bench_settings():
+    parser = argparse.ArgumentParser(
+        description='Benchmark parse_habr stages on the saved corpus.'
+    )
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+        help='numbers of pages to crawl (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=3,
+        help='report the best of N runs (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--save-baseline', default=None,
+        help='write results as a baseline to file'
+    )
+    parser.add_argument(
+        '--baseline', default=None,
+        help='compare results with the baseline file'
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=DEFAULT_TOLERANCE,
+        help='allowed relative regression (default: %(default)s)'
+    )
+    return parser.parse_args()
+
+
+def main():
+    bench_settings = parse_bench_settings()
+
+    get_morph_analyzer()  # Dictionaries loading is not benchmarked
+    results = []
+    with CorpusServer(load_corpus()) as server:
+        SiteConfig.SITE_CONFIG['bench'] = dict(
+            SiteConfig.SITE_CONFIG['habr'], url=server.url
+        )
+        site_config = SiteConfig('bench')
+        for size in bench_settings.sizes:
+            results.extend(
+                bench_pipeline(site_config, size, bench_settings.repeat)
+            )
+    print_results(results)
+
+    if bench_settings.save_baseline:
+        with open(bench_settings.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if bench_settings.baseline:
+        with open(bench_settings.baseline) as f:
+            regressions = compare(
+                results, json.load(f), bench_settings.tolerance
+            )
+        for regression in regressions:
+            print('REGRESSION', regression, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
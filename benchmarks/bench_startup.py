@@ -0,0 +1,167 @@
+"""Startup time benchmark of bin/parse_habr.py.
+
+Guards against import-time regressions: heavy dependencies
+must be loaded only when the stage that needs them first runs.
+
+Usage:
+    $ python -m benchmarks.bench_startup
+    $ python -m benchmarks.bench_startup --save-baseline startup.json
+    $ python -m benchmarks.bench_startup --baseline startup.json
+
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from habr_challenge import HEAVY_MODULES
+
+
+DEFAULT_REPEAT = 10
+DEFAULT_TOLERANCE = .25
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PARSE_HABR = os.path.join(ROOT_DIR, 'bin', 'parse_habr.py')
+
+# Run parse_habr -h and print heavy modules it has imported
+LOADED_MODULES_SCRIPT = """
+import contextlib, io, runpy, sys
+sys.argv = ['parse_habr', '-h']
+try:
+    with contextlib.redirect_stdout(io.StringIO()):
+        runpy.run_path({path!r}, run_name='__main__')
+except SystemExit:
+    pass
+print(' '.join(m for m in {modules!r} if m in sys.modules))
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        filter(None, [ROOT_DIR, env.get('PYTHONPATH')])
+    )
+    return env
+
+
+def measure_startup(repeat):
+    """Run parse_habr -h repeat times.
+
+    Returns:
+        ([float]): seconds of every run.
+
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, PARSE_HABR, '-h'],
+            stdout=subprocess.DEVNULL, env=_env(), check=True
+        )
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def loaded_heavy_modules():
+    """Heavy modules imported by parse_habr -h.
+
+    Returns:
+        ([str])
+
+    """
+    output = subprocess.run(
+        [sys.executable, '-c', LOADED_MODULES_SCRIPT.format(
+            path=PARSE_HABR, modules=HEAVY_MODULES
+        )],
+        stdout=subprocess.PIPE, env=_env(), check=True,
+        universal_newlines=True
+    ).stdout
+    return output.split()
+
+
+def compare(result, baseline, tolerance):
+    """Find startup regressions.
+
+    Args:
+        result (dict): current result.
+        baseline (dict): stored result.
+        tolerance (float): allowed relative regression.
+
+    Returns:
+        ([str]): regressions description.
+
+    """
+    regressions = []
+    if result['best_ms'] > baseline['best_ms'] * (1 + tolerance):
+        regressions.append('startup best_ms: {0:.1f} > {1:.1f}'.format(
+            result['best_ms'], baseline['best_ms']
+        ))
+    if result['heavy_modules']:
+        regressions.append('heavy modules imported: {0}'.format(
+            ', '.join(result['heavy_modules'])
+        ))
+    return regressions
+
+
+def parse_bench_settings():
+    parser = argparse.ArgumentParser(
+        description='Benchmark parse_habr startup time.'
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=DEFAULT_REPEAT,
+        help='number of runs (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--save-baseline', default=None,
+        help='write result as a baseline to file'
+    )
+    parser.add_argument(
+        '--baseline', default=None,
+        help='compare result with the baseline file'
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=DEFAULT_TOLERANCE,
+        help='allowed relative regression (default: %(default)s)'
+    )
+    return parser.parse_args()
+
+
+def main():
+    bench_settings = parse_bench_settings()
+
+    timings = measure_startup(bench_settings.repeat)
+    result = {
+        'best_ms': min(timings) * 1000,
+        'median_ms': statistics.median(timings) * 1000,
+        'heavy_modules': loaded_heavy_modules(),
+    }
+    print(
+        'parse_habr -h: best {best_ms:.1f} ms, median {median_ms:.1f} ms, '
+        'heavy modules: {heavy}'.format(
+            heavy=', '.join(result['heavy_modules']) or 'none', **result
+        )
+    )
+
+    if bench_settings.save_baseline:
+        with open(bench_settings.save_baseline, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    regressions = []
+    if bench_settings.baseline:
+        with open(bench_settings.baseline) as f:
+            regressions = compare(
+                result, json.load(f), bench_settings.tolerance
+            )
+    elif result['heavy_modules']:
+        regressions = compare(result, result, 0)
+    for regression in regressions:
+        print('REGRESSION', regression, file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
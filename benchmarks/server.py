@@ -0,0 +1,91 @@
+import glob
+import http.server
+import os
+import re
+import threading
+
+
+__all__ = ['CorpusServer', 'load_corpus']
+
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), 'corpus')
+
+
+def load_corpus(corpus_dir=CORPUS_DIR):
+    """Load saved feed pages.
+
+    Args:
+        corpus_dir (str): directory with page<N>.html files.
+
+    Returns:
+        ([str]): pages content in pagination order.
+
+    """
+    paths = sorted(
+        glob.glob(os.path.join(corpus_dir, 'page*.html')),
+        key=lambda path: int(re.search(r'(\d+)\.html$', path).group(1))
+    )
+    pages = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+    return pages
+
+
+class CorpusServer:
+    """Local HTTP stand-in for the Habr feed.
+
+    Serves /all/page<N>/ from the corpus pages, cycling them
+    when N exceeds the corpus size.
+
+    Attributes:
+        pages ([bytes]): encoded corpus pages.
+        url (str): feed url, usable as SiteConfig 'url'.
+
+    """
+
+    PAGE_PATH_RE = re.compile(r'^/all/page(\d+)/$')
+
+    def __init__(self, pages):
+        self.pages = [page.encode('utf-8') for page in pages]
+        self._server = http.server.ThreadingHTTPServer(
+            ('127.0.0.1', 0), self._make_handler()
+        )
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self.url = 'http://127.0.0.1:{port}/all/'.format(
+            port=self._server.server_port
+        )
+
+    def _make_handler(self):
+        pages = self.pages
+        page_path_re = self.PAGE_PATH_RE
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                match = page_path_re.match(self.path)
+                if match is None:
+                    self.send_error(404)
+                    return
+                body = pages[(int(match.group(1)) - 1) % len(pages)]
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
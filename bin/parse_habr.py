@@ -1,40 +1,810 @@
 import argparse
+import collections
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import sys
+import tracemalloc
 
 from habr_challenge import \
     SiteConfig, \
     ReportGenerator, \
+    archive, \
     crawler, \
-    parser
+    daemon, \
+    pipeline
+from habr_challenge.crawler import DEFAULT_MAX_RPS
+from habr_challenge.heavy_hitters import DEFAULT_TOP_N
+from habr_challenge.lemma_store import LemmaStore
+from habr_challenge.metrics import METRICS
+from habr_challenge.page_cache import DEFAULT_MAX_SIZE, DEFAULT_TTL
+from habr_challenge.parser import DEFAULT_PARSE_BACKEND, PARSE_BACKENDS
+from habr_challenge.parser_data_collector import \
+    DEFAULT_LEMMA_CACHE_SIZE, \
+    ParserDataCollector, \
+    analyze_word
+from habr_challenge.report_generator import REPORT_WRITERS
+from habr_challenge.rollups import parse_date
+from habr_challenge.scheduler import DEFAULT_HOST_RPS
+from habr_challenge.session import \
+    DEFAULT_CONNECT_TIMEOUT, \
+    DEFAULT_READ_TIMEOUT, \
+    DEFAULT_RETRIES, \
+    CrawlerSession
+from habr_challenge.state_store import DEFAULT_CHECKPOINT_EVERY, StateStore
 
 
-def parse_user_settings():
+def parse_page_range(page_range):
+    """Parse start:end pages, both are included."""
+    try:
+        start, end = map(int, page_range.split(':'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'expected start:end pages, got {0!r}'.format(page_range)
+        )
+    return start, end
+
+
+def parse_shard(shard):
+    """Parse i/n shard, i is counted from 1."""
+    try:
+        index, count = map(int, shard.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'expected i/n shard, got {0!r}'.format(shard)
+        )
+    return index, count
+
+
+def parse_user_settings(args=None):
     parser = argparse.ArgumentParser(
         description='Print 3 most popular nouns from Habr feed article titles.'
     )
+    parser.epilog = """Run "parse_habr serve -h" to keep dictionaries and
+                       connections warm in a daemon,
+                       "parse_habr client -h" to request its reports and
+                       "parse_habr lemma-cache -h" to maintain
+                       --lemma-store and "parse_habr merge -h"
+                       to report results of shards."""
     parser.add_argument(
         '--pages', type=int, default=10,
         help="""How many feed pages do you like to parse
                 (default: %(default)s)?"""
     )
+    parser.add_argument(
+        '--page-range', type=parse_page_range, default=None,
+        help="""parse feed pages from start to end, both included,
+                e.g. 11:20, instead of --pages"""
+    )
+    parser.add_argument(
+        '--shard', type=parse_shard, default=None,
+        help="""parse only i-th of n equal parts of the pages,
+                e.g. 2/4, and save its result with --result-out
+                to merge shards later"""
+    )
     parser.add_argument(
         '--show-progress', action='store_false',
         help='do you want to see progress bar?'
     )
-    return parser.parse_args()
+    parser.add_argument(
+        '--concurrency', type=int, default=1,
+        help="""How many feed pages to fetch in parallel
+                (default: %(default)s)?"""
+    )
+    parser.add_argument(
+        '--prefetch', type=int, default=None,
+        help="""How many feed pages may be fetched ahead of parsing
+                (default: 2 * concurrency)?"""
+    )
+    parser.add_argument(
+        '--as-completed', action='store_true',
+        help='parse pages as soon as they are fetched, not in page order'
+    )
+    parser.add_argument(
+        '--adaptive', action='store_true',
+        help="""adapt number of pages fetched in parallel, up to
+                --concurrency, to server latency, errors and Retry-After"""
+    )
+    parser.add_argument(
+        '--max-rps', type=float, default=DEFAULT_MAX_RPS,
+        help="""How many requests a second --adaptive crawler may send,
+                0 is unlimited (default: %(default)s)?"""
+    )
+    parser.add_argument(
+        '--site', action='append', default=None, dest='sites',
+        help="""site to crawl, may be passed several times to crawl
+                sites concurrently (default: habr)"""
+    )
+    parser.add_argument(
+        '--site-config', default=None,
+        help='json file with configs of additional sites to --site'
+    )
+    parser.add_argument(
+        '--host-connections', type=int, default=None,
+        help="""How many requests may be sent to one host at once
+                (default: --concurrency)?"""
+    )
+    parser.add_argument(
+        '--host-rps', type=float, default=DEFAULT_HOST_RPS,
+        help="""How many requests a second may be sent to one host,
+                0 is unlimited (default: %(default)s)?"""
+    )
+    parser.add_argument(
+        '--connect-timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT,
+        help='HTTP connect timeout in seconds (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--read-timeout', type=float, default=DEFAULT_READ_TIMEOUT,
+        help='HTTP read timeout in seconds (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--retries', type=int, default=DEFAULT_RETRIES,
+        help="""How many times to retry failed HTTP requests
+                (default: %(default)s)?"""
+    )
+    parser.add_argument(
+        '--cache-dir', default=None,
+        help='directory to cache crawled pages in between runs'
+    )
+    parser.add_argument(
+        '--cache-max-size', type=int, default=DEFAULT_MAX_SIZE >> 20,
+        help='max size of the pages cache in Mb (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--cache-ttl', type=float, default=DEFAULT_TTL,
+        help="""How many seconds cached page is used without revalidation
+                (default: %(default)s)?"""
+    )
+    parser.add_argument(
+        '--offline', action='store_true',
+        help='do not send requests, parse only pages from --cache-dir'
+    )
+    parser.add_argument(
+        '--parser-backend', default=DEFAULT_PARSE_BACKEND,
+        choices=sorted(PARSE_BACKENDS),
+        help="""How to parse feed pages: whole page with bs4,
+                only article tags with bs4 or with lxml
+                (default: %(default)s)?"""
+    )
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help="""How many processes normalize parsed articles
+                (default: %(default)s)?"""
+    )
+    parser.add_argument(
+        '--state', default=None,
+        help="""file to keep nouns count and seen articles in
+                between runs: only new articles are counted and
+                crawl stops on the page of known articles"""
+    )
+    parser.add_argument(
+        '--checkpoint-every', type=int, default=DEFAULT_CHECKPOINT_EVERY,
+        help="""How often to save --state, in pages, so interrupted
+                crawl is resumed from the last checkpoint
+                (default: %(default)s)?"""
+    )
+    parser.add_argument(
+        '--top', type=int, default=DEFAULT_TOP_N,
+        help="""How many most popular nouns to show for a week
+                (default: %(default)s)?"""
+    )
+    parser.add_argument(
+        '--from', type=parse_date, default=None, dest='date_from',
+        help="""report the most popular nouns of weeks started
+                from the date, dd-mm-yyyy, instead of every week"""
+    )
+    parser.add_argument(
+        '--to', type=parse_date, default=None, dest='date_to',
+        help="""report the most popular nouns of weeks started
+                up to the date, dd-mm-yyyy, instead of every week"""
+    )
+    parser.add_argument(
+        '--heavy-hitters-capacity', type=int, default=0,
+        help="""Count approximately at most N nouns per week
+                to bound memory, 0 means exact count
+                (default: %(default)s)"""
+    )
+    parser.add_argument(
+        '--compact-store', action='store_true',
+        help="""keep nouns count in arrays of interned lemma ids
+                to save memory on long histories, ties of the most
+                popular nouns are broken by the order they were met
+                in the whole run instead of the week"""
+    )
+    parser.add_argument(
+        '--lemma-cache-size', type=int, default=DEFAULT_LEMMA_CACHE_SIZE,
+        help="""How many word forms to keep analyzed in memory
+                (default: %(default)s)?"""
+    )
+    parser.add_argument(
+        '--lemma-store', default=None,
+        help="""SQLite file to keep word forms analyzed in between runs,
+                shared by processes"""
+    )
+    parser.add_argument(
+        '--show-stats', action='store_true',
+        help='print caches and fallbacks statistics to stderr'
+    )
+    parser.add_argument(
+        '--output-format', default='table',
+        choices=sorted(REPORT_WRITERS),
+        help="""report format, weeks are listed in chronological order
+                in all but the table one (default: %(default)s)"""
+    )
+    parser.add_argument(
+        '--output', default=None,
+        help='write report to file instead of stdout'
+    )
+    parser.add_argument(
+        '--stream', action='store_true',
+        help="""write every week as soon as it is complete, newest
+                first, the table has fixed width columns"""
+    )
+    parser.add_argument(
+        '--replay', default=None,
+        help="""parse pages of the --pages range saved in a directory,
+                tarball or WARC-like archive instead of crawling the site"""
+    )
+    parser.add_argument(
+        '--record', default=None,
+        help="""save crawled pages into an archive for --replay:
+                *.warc[.gz], *.tar[.gz] or a directory"""
+    )
+    parser.add_argument(
+        '--result-out', default=None,
+        help="""save nouns count by week to file for
+                "parse_habr merge" at the end of a run"""
+    )
+    parser.add_argument(
+        '--metrics-out', default=None,
+        help='write pipeline metrics to file at the end of a run'
+    )
+    parser.add_argument(
+        '--metrics-format', default='json', choices=('json', 'prometheus'),
+        help='--metrics-out format (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--profile', default=None,
+        help='profile the run and save the output to file'
+    )
+    parser.add_argument(
+        '--profile-mode', default='cprofile',
+        choices=('cprofile', 'tracemalloc'),
+        help="""Profile CPU with cProfile (load file with pstats)
+                or memory with tracemalloc (default: %(default)s)"""
+    )
+    return parser.parse_args(args)
 
 
-def main():
-    user_settings = parse_user_settings()
+def print_stats(stats):
+    """Print run statistics to stderr.
+
+    Args:
+        stats (dict): statistics to print.
+
+    """
+    print(json.dumps(stats, indent=2, sort_keys=True), file=sys.stderr)
+
+
+def write_metrics(path, metrics_format):
+    """Write pipeline metrics to file.
+
+    Args:
+        path (str): file to write to.
+        metrics_format (str): 'json' or 'prometheus'.
+
+    """
+    with open(path, 'w') as f:
+        if metrics_format == 'prometheus':
+            f.write(METRICS.to_prometheus())
+        else:
+            f.write(METRICS.to_json())
+
+
+def run_profiled(run, user_settings):
+    """Run the program under profiler.
+
+    Args:
+        run (function): function to profile.
+        user_settings (ArgumentParser):
+            user arguments passed to the program.
+
+    """
+    if user_settings.profile_mode == 'tracemalloc':
+        tracemalloc.start(25)
+        try:
+            run(user_settings)
+            snapshot = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+        with open(user_settings.profile, 'w') as f:
+            for stat in snapshot.statistics('traceback')[:50]:
+                print(stat, file=f)
+                print('\n'.join(stat.traceback.format()), file=f)
+    else:
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(run, user_settings)
+        finally:
+            profiler.dump_stats(user_settings.profile)
+
+
+def open_state_store(user_settings):
+    """Open --state store and move the first page to the resumed one.
+
+    Returns:
+        (StateStore or None): store of incremental state if --state is set.
+
+    """
+    state_store = None
+    if user_settings.state:
+        state_store = StateStore(
+            user_settings.state, user_settings.checkpoint_every
+        )
+        if state_store.resuming:
+            user_settings.first_page = state_store.resume_page
+    return state_store
+
+
+def parse_single_site(
+    site_config, user_settings, session, parser_data_collector,
+    state_store=None, on_page_collected=None
+):
+    """Crawl or replay one site keeping incremental state.
+
+    Args:
+        parser_data_collector (ParserDataCollector): collector to use.
+        state_store (StateStore or None): store opened by open_state_store.
+        on_page_collected (callable or None):
+            called with the page number after every page is collected.
+
+    Returns:
+        (ParserDataCollector): collector of the site nouns.
+
+    """
+    with contextlib.ExitStack() as archive_writers:
+        if user_settings.replay:
+            articles_list_pagination_gen = archive.replay(
+                user_settings.replay,
+                range(user_settings.first_page, user_settings.pages + 1)
+            )
+        else:
+            articles_list_pagination_gen = crawler.crawl(
+                site_config, user_settings, session
+            )
+        if user_settings.record:
+            articles_list_pagination_gen = archive.record(
+                articles_list_pagination_gen,
+                archive_writers.enter_context(
+                    archive.ArchiveWriter(user_settings.record)
+                ),
+                site_config.articles_list_url
+            )
+        return pipeline.parse_site(
+            site_config, user_settings, session,
+            parser_data_collector=parser_data_collector,
+            state_store=state_store,
+            articles_list_pagination_gen=articles_list_pagination_gen,
+            on_page_collected=on_page_collected
+        )
+
+
+def report_data(parser_data_collector, user_settings):
+    """Result of every week or of the --from/--to range.
+
+    Returns:
+        (dict): report data dict.
+
+    """
+    if user_settings.date_from or user_settings.date_to:
+        return parser_data_collector.range_result_dict(
+            user_settings.date_from, user_settings.date_to
+        )
+    return parser_data_collector.result_dict
+
+
+def write_report(report_data_dict, user_settings):
+    """Write report in the --output-format.
+
+    Text table is printed as ReportGenerator prints it,
+    other formats list weeks in chronological order.
+
+    """
+    if user_settings.output_format != 'table':
+        with REPORT_WRITERS[user_settings.output_format](
+            user_settings.output
+        ) as report_writer:
+            report_writer.write(report_data_dict)
+        return
+
+    with contextlib.ExitStack() as output:
+        file = None
+        if user_settings.output:
+            file = output.enter_context(
+                open(user_settings.output, 'w', encoding='utf-8')
+            )
+        ReportGenerator(report_data_dict).print_report(file)
+
+
+def report_single_site(
+    site_config, user_settings, session, parser_data_collector=None
+):
+    """Crawl one site and write its report.
+
+    Args:
+        parser_data_collector (ParserDataCollector or None):
+            warm collector to reset and reuse, new one by default.
+
+    Returns:
+        (dict): collector statistics.
+
+    """
+    if parser_data_collector is None:
+        parser_data_collector = ParserDataCollector(user_settings)
+    else:
+        parser_data_collector.reset(user_settings)
+    state_store = open_state_store(user_settings)
+
+    if not user_settings.stream:
+        parse_single_site(
+            site_config, user_settings, session, parser_data_collector,
+            state_store
+        )
+        if user_settings.result_out:
+            parser_data_collector.save(user_settings.result_out)
+        with METRICS.timer('report'):
+            write_report(
+                report_data(parser_data_collector, user_settings),
+                user_settings
+            )
+        return parser_data_collector.stats
+
+    with REPORT_WRITERS[user_settings.output_format](
+        user_settings.output
+    ) as report_writer:
+        week_stream = pipeline.WeekStream(
+            parser_data_collector, report_writer, user_settings.first_page
+        )
+        parse_single_site(
+            site_config, user_settings, session, parser_data_collector,
+            state_store, on_page_collected=week_stream.page_collected
+        )
+        week_stream.close()
+    if user_settings.result_out:
+        parser_data_collector.save(user_settings.result_out)
+    return parser_data_collector.stats
+
+
+def report_sites(site_configs, user_settings, session):
+    """Crawl sites concurrently and write their reports.
+
+    Report of every site and the combined one are printed
+    in the table format, only the combined one in other formats.
+
+    Returns:
+        (dict): collectors statistics by site.
+
+    """
+    parser_data_collectors = pipeline.parse_sites(
+        site_configs, user_settings, session
+    )
+    combined = pipeline.combine(
+        parser_data_collectors.values(), user_settings
+    )
+    if user_settings.result_out:
+        combined.save(user_settings.result_out)
+    with METRICS.timer('report'):
+        if user_settings.output_format == 'table' and \
+                not user_settings.output:
+            for site_name, parser_data_collector in \
+                    parser_data_collectors.items():
+                print(site_name)
+                ReportGenerator(
+                    report_data(parser_data_collector, user_settings)
+                ).print_report()
+                print()
+            print(', '.join(parser_data_collectors))
+        write_report(report_data(combined, user_settings), user_settings)
+    return {'sites': collections.OrderedDict(
+        (site_name, parser_data_collector.stats)
+        for site_name, parser_data_collector in parser_data_collectors.items()
+    )}
+
+
+def run(user_settings, session=None, parser_data_collector=None):
+    """Crawl, parse and print the report.
+
+    Args:
+        user_settings (ArgumentParser):
+            user arguments passed to the program.
+        session (CrawlerSession or None): warm session kept open,
+            new one is created and closed by default.
+        parser_data_collector (ParserDataCollector or None):
+            warm collector of a single site report.
+
+    """
+    site_configs = [SiteConfig(site_name) for site_name in user_settings.sites]
+    with contextlib.ExitStack() as new_session:
+        if session is None:
+            session = new_session.enter_context(
+                CrawlerSession.from_user_settings(user_settings)
+            )
+        if len(site_configs) == 1:
+            stats = report_single_site(
+                site_configs[0], user_settings, session,
+                parser_data_collector
+            )
+        else:
+            stats = report_sites(site_configs, user_settings, session)
+
+    if session.page_cache is not None:
+        stats['page_cache'] = session.page_cache.info
+        print(
+            'Page cache: {hits} hits, {revalidated} revalidated, '
+            '{misses} misses'.format(**stats['page_cache']),
+            file=sys.stderr
+        )
+    if user_settings.show_stats:
+        print_stats(stats)
+    if user_settings.metrics_out:
+        METRICS.set_gauges('stats', stats)
+        write_metrics(user_settings.metrics_out, user_settings.metrics_format)
+
+
+def prepare_user_settings(user_settings):
+    """Check user arguments and load sites configs.
+
+    Raises:
+        AssertionError: arguments are not valid.
+
+    """
     assert user_settings.pages > 0, "Please pass --pages > 0"
+    assert user_settings.concurrency > 0, "Please pass --concurrency > 0"
+    assert user_settings.workers > 0, "Please pass --workers > 0"
+    assert user_settings.top > 0, "Please pass --top > 0"
+    assert not (user_settings.state and user_settings.as_completed), \
+        "Pages are checkpointed in order, do not pass --as-completed"
+    assert user_settings.cache_dir or not user_settings.offline, \
+        "Please pass --cache-dir to work --offline"
+    assert not (
+        user_settings.compact_store and user_settings.heavy_hitters_capacity
+    ), "--compact-store counts exactly, do not pass --heavy-hitters-capacity"
+    date_range = (user_settings.date_from, user_settings.date_to)
+    assert None in date_range or date_range[0] <= date_range[1], \
+        "Please pass --from date before --to date"
+    assert not user_settings.stream or date_range == (None, None), \
+        "--stream reports every week, do not pass --from and --to"
+
+    assert not user_settings.state or not (
+        user_settings.page_range or user_settings.shard
+    ), "--state resumes its own pages, do not pass --page-range or --shard"
+    first_page, last_page = \
+        user_settings.page_range or (1, user_settings.pages)
+    assert 0 < first_page <= last_page, \
+        "Please pass --page-range start:end with 0 < start <= end"
+    if user_settings.shard:
+        index, count = user_settings.shard
+        assert 0 < index <= count, "Please pass --shard i/n with 0 < i <= n"
+        pages = last_page - first_page + 1
+        assert count <= pages, "Please pass --shard i/n with n <= pages"
+        first_page, last_page = (
+            first_page + pages * (index - 1) // count,
+            first_page + pages * index // count - 1
+        )
+    user_settings.first_page = first_page
+    user_settings.pages = last_page
+
+    if user_settings.site_config:
+        SiteConfig.load(user_settings.site_config)
+    user_settings.sites = user_settings.sites or ['habr']
+    assert len(user_settings.sites) == 1 or not (
+        user_settings.state or user_settings.replay or user_settings.record
+    ), "--state, --replay and --record work with a single --site"
+    assert len(user_settings.sites) == 1 or not user_settings.stream, \
+        "--stream works with a single --site"
+
+
+DAEMON_COMMANDS_DESCRIPTION = {
+    'serve': """Keep dictionaries and HTTP session warm and answer
+                report requests. Other arguments configure
+                the session and caches of all the reports.""",
+    'client': """Request report from parse_habr serve.
+                 Other arguments are passed to the report.""",
+}
+
 
-    site_config = SiteConfig('habr')
-    articles_list_pagination_gen = crawler.crawl(
-        site_config, user_settings
+def parse_daemon_address(command, args):
+    """Parse daemon address arguments of serve and client commands.
+
+    Returns:
+        (argparse.Namespace, [str]): address and parse_habr arguments.
+
+    """
+    parser = argparse.ArgumentParser(
+        prog='parse_habr ' + command, allow_abbrev=False,
+        description=DAEMON_COMMANDS_DESCRIPTION[command]
     )
-    articles_data = parser.parse(
-        articles_list_pagination_gen, site_config, user_settings
+    address = parser.add_mutually_exclusive_group(required=True)
+    address.add_argument('--socket', default=None, help='Unix socket path')
+    address.add_argument(
+        '--port', type=int, default=None, help='loopback HTTP port'
     )
-    ReportGenerator(articles_data).print_report()
+    parser.add_argument(
+        '--host', default=daemon.DEFAULT_HOST,
+        help='HTTP host (default: %(default)s)'
+    )
+    return parser.parse_known_args(args)
+
+
+def answer_report(args, session, parser_data_collector):
+    """Build report requested from the daemon.
+
+    Args:
+        args ([str]): parse_habr arguments.
+        session (CrawlerSession): warm session.
+        parser_data_collector (ParserDataCollector): warm collector.
+
+    Returns:
+        (str): report printed.
+
+    Raises:
+        ValueError: arguments are not valid.
+
+    """
+    with contextlib.redirect_stdout(io.StringIO()) as report, \
+            contextlib.redirect_stderr(io.StringIO()) as errors:
+        try:
+            user_settings = parse_user_settings(args)
+        except SystemExit as e:
+            if e.code:
+                raise ValueError(errors.getvalue().strip().splitlines()[-1])
+            return report.getvalue()  # -h
+    user_settings.show_progress = False
+    try:
+        prepare_user_settings(user_settings)
+    except AssertionError as e:
+        raise ValueError(str(e))
+
+    METRICS.reset()
+    with contextlib.redirect_stdout(io.StringIO()) as report:
+        run(user_settings, session, parser_data_collector)
+    return report.getvalue()
+
+
+def serve(args):
+    address, args = parse_daemon_address('serve', args)
+    server_settings = parse_user_settings(args)
+    parser_data_collector = ParserDataCollector(server_settings)
+    parser_data_collector.warm_up()
+
+    session = CrawlerSession.from_user_settings(server_settings)
+    report_server = daemon.ReportServer(
+        functools.partial(
+            answer_report,
+            session=session,
+            parser_data_collector=parser_data_collector
+        ),
+        socket_path=address.socket,
+        port=address.port,
+        host=address.host
+    )
+    with session, report_server:
+        print('Serving reports on {0}'.format(
+            address.socket or 'http://{0}:{1}'.format(
+                *report_server.address
+            )
+        ), file=sys.stderr)
+        try:
+            report_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def client(args):
+    address, args = parse_daemon_address('client', args)
+    try:
+        report = daemon.request_report(
+            args, socket_path=address.socket,
+            port=address.port, host=address.host
+        )
+    except (OSError, RuntimeError) as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    print(report, end='')
+
+
+def lemma_cache(args):
+    parser = argparse.ArgumentParser(
+        prog='parse_habr lemma-cache',
+        description="""Maintain --lemma-store: rebuild analyzes stored
+                       word forms again, e.g. after pymorphy2 dictionaries
+                       are updated, compact defragments the file."""
+    )
+    parser.add_argument('action', choices=('rebuild', 'compact'))
+    parser.add_argument('path', help='--lemma-store file')
+    lemma_cache_settings = parser.parse_args(args)
+
+    with LemmaStore(lemma_cache_settings.path) as lemma_store:
+        if lemma_cache_settings.action == 'rebuild':
+            print('Rebuilt {0} word forms'.format(
+                lemma_store.rebuild(analyze_word)
+            ), file=sys.stderr)
+        else:
+            lemma_store.compact()
+            print('Compacted {0} word forms'.format(
+                len(lemma_store)
+            ), file=sys.stderr)
+
+
+def merge(args):
+    parser = argparse.ArgumentParser(
+        prog='parse_habr merge',
+        description="""Merge nouns count saved by --result-out,
+                       e.g. by shards, and print the report.
+                       Merged result may be saved and merged again."""
+    )
+    parser.add_argument('results', nargs='+', help='--result-out files')
+    parser.add_argument(
+        '--top', type=int, default=DEFAULT_TOP_N,
+        help="""How many most popular nouns to show for a week
+                (default: %(default)s)?"""
+    )
+    parser.add_argument(
+        '--from', type=parse_date, default=None, dest='date_from',
+        help='report weeks started from the date, dd-mm-yyyy'
+    )
+    parser.add_argument(
+        '--to', type=parse_date, default=None, dest='date_to',
+        help='report weeks started up to the date, dd-mm-yyyy'
+    )
+    parser.add_argument(
+        '--output-format', default='table',
+        choices=sorted(REPORT_WRITERS),
+        help='report format (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--output', default=None,
+        help='write report to file instead of stdout'
+    )
+    parser.add_argument(
+        '--result-out', default=None,
+        help='save merged nouns count to file'
+    )
+    merge_settings = parser.parse_args(args)
+
+    parser_data_collector = ParserDataCollector(merge_settings)
+    for path in merge_settings.results:
+        parser_data_collector.load(path)
+    if merge_settings.result_out:
+        parser_data_collector.save(merge_settings.result_out)
+    write_report(
+        report_data(parser_data_collector, merge_settings), merge_settings
+    )
+
+
+COMMANDS = {
+    'serve': serve,
+    'client': client,
+    'lemma-cache': lemma_cache,
+    'merge': merge,
+}
+
+
+def main():
+    args = sys.argv[1:]
+    if args and args[0] in COMMANDS:
+        COMMANDS[args[0]](args[1:])
+        return
+
+    user_settings = parse_user_settings(args)
+    prepare_user_settings(user_settings)
+
+    if user_settings.profile:
+        run_profiled(run, user_settings)
+    else:
+        run(user_settings)
 
 
 if __name__ == '__main__':
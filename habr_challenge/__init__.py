@@ -1,5 +1,45 @@
+import importlib
+
 from .site_config import SiteConfig
-from .report_generator import ReportGenerator
-from habr_challenge import crawler, parser
 
-__all__ = ['SiteConfig', 'crawler', 'parser', 'ReportGenerator']
+__all__ = [
+    'SiteConfig', 'aio', 'archive', 'crawler', 'daemon', 'parser', 'pipeline',
+    'ReportGenerator',
+]
+
+# Dependencies kept out of the package and CLI import,
+# checked by tests and benchmarks.bench_startup
+HEAVY_MODULES = (
+    'bs4', 'dateparser', 'lxml', 'pymorphy2', 'requests', 'tqdm', 'urllib3'
+)
+
+# Submodules pull in heavy dependencies (requests, tqdm, bs4, ...),
+# so they are imported on the first access to the package attribute.
+_LAZY_ATTRIBUTES = {
+    'aio': ('habr_challenge.aio', None),
+    'archive': ('habr_challenge.archive', None),
+    'crawler': ('habr_challenge.crawler', None),
+    'daemon': ('habr_challenge.daemon', None),
+    'parser': ('habr_challenge.parser', None),
+    'pipeline': ('habr_challenge.pipeline', None),
+    'ReportGenerator': (
+        'habr_challenge.report_generator', 'ReportGenerator'
+    ),
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(
+            "module {0!r} has no attribute {1!r}".format(__name__, name)
+        )
+    module_name, attribute = _LAZY_ATTRIBUTES[name]
+    value = importlib.import_module(module_name)
+    if attribute is not None:
+        value = getattr(value, attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
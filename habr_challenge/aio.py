@@ -0,0 +1,254 @@
+import asyncio
+import collections
+import contextlib
+
+from habr_challenge import crawler
+from habr_challenge.parser import \
+    DEFAULT_PARSE_BACKEND, \
+    PaginationFilter, \
+    get_parse_backend, \
+    parse_page
+from habr_challenge.parser_data_collector import ParserDataCollector
+from habr_challenge.session import CrawlerSession
+
+
+__all__ = ['AsyncCollector', 'acrawl', 'aparse', 'aparse_site']
+
+
+async def acrawl(site_config, user_settings, session=None, executor=None):
+    """Crawl webpages without blocking the event loop.
+
+    Requests are sent by the CrawlerSession in executor threads,
+    so crawls sharing one session share its connection pool
+    and per host limits. Progress bar and adaptive concurrency
+    of the crawl function are not supported.
+
+    Args:
+        site_config (SiteConfig): config of the site to be crawled.
+        user_settings (ArgumentParser):
+            user arguments passed to the program,
+            user_settings.concurrency pages are fetched at once.
+        session (CrawlerSession or None): HTTP session to crawl with,
+            new one is created and closed after crawling by default.
+        executor (concurrent.futures.Executor or None):
+            threads to send requests in, the loop default one if None.
+
+    Yields:
+        (int, RawPage): page number and crawled articles list
+            webpage, in pagination order.
+
+    """
+    with contextlib.ExitStack() as own_session:
+        if session is None:
+            session = own_session.enter_context(
+                CrawlerSession.from_user_settings(user_settings)
+            )
+        pages = _acrawl(site_config, user_settings, session, executor)
+        try:
+            async for page, articles_list in pages:
+                yield page, articles_list
+        finally:
+            # Fetches left are drained before the session is closed
+            await pages.aclose()
+
+
+async def _acrawl(site_config, user_settings, session, executor):
+    """Crawl webpages with a session, see acrawl.
+
+    Fetches still running in executor threads are awaited
+    when the generator is closed.
+
+    """
+    loop = asyncio.get_running_loop()
+    concurrency = getattr(user_settings, 'concurrency', 1)
+    prefetch = getattr(user_settings, 'prefetch', None) or 2 * concurrency
+    window = max(prefetch, concurrency)
+    requests_in_flight = asyncio.Semaphore(concurrency)
+
+    fetches = set()
+
+    async def fetch(page):
+        async with requests_in_flight:
+            future = loop.run_in_executor(
+                executor, crawler._fetch_page,
+                session, site_config.articles_list_url, page
+            )
+            fetches.add(future)
+            future.add_done_callback(fetches.discard)
+            # Cancelled task leaves the fetch running in its thread,
+            # it is awaited before the session may be closed
+            return page, await asyncio.shield(future)
+
+    pages = iter(range(
+        getattr(user_settings, 'first_page', 1), user_settings.pages + 1
+    ))
+    pending = collections.deque()
+
+    def submit():
+        for page in pages:
+            pending.append(asyncio.ensure_future(fetch(page)))
+            if len(pending) >= window:
+                return
+
+    try:
+        submit()
+        while pending:
+            page, articles_list = await pending.popleft()
+            if articles_list is not None:
+                yield page, articles_list
+            submit()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, *fetches, return_exceptions=True)
+
+
+class AsyncCollector:
+    """Awaitable ParserDataCollector.
+
+    Articles are normalized in executor threads one batch at a time,
+    results are counted in the event loop thread.
+
+    Attributes:
+        parser_data_collector (ParserDataCollector): collector wrapped.
+        executor (concurrent.futures.Executor or None):
+            threads to normalize articles in, the loop default one if None.
+        _lock (asyncio.Lock): normalization in progress,
+            collector caches are not shared by threads.
+
+    """
+
+    def __init__(
+        self, parser_data_collector=None, user_settings=None, executor=None
+    ):
+        """
+        Args:
+            parser_data_collector (ParserDataCollector or None):
+                collector to wrap, new one is created by default.
+            user_settings (ArgumentParser):
+                user arguments of the new collector.
+            executor (concurrent.futures.Executor or None)
+
+        """
+        if parser_data_collector is None:
+            parser_data_collector = ParserDataCollector(user_settings)
+        self.parser_data_collector = parser_data_collector
+        self.executor = executor
+        self._lock = None
+
+    async def collect_many(self, articles_data):
+        """Collect batch of parsed articles, e.g. of one webpage.
+
+        Args:
+            articles_data (list): list of ARTICLE_DATA.
+
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            normalized = await asyncio.get_running_loop().run_in_executor(
+                self.executor,
+                self.parser_data_collector._normalize_batch,
+                articles_data
+            )
+        for article_week_range, article_title_words in normalized:
+            self.parser_data_collector._count(
+                article_week_range, article_title_words
+            )
+
+    async def collect(self, article_data):
+        """Collect one parsed article.
+
+        Args:
+            article_data (collections.namedtuple(
+                str:title, str:publication_datetime)
+            ):
+                webpage parsed data.
+
+        """
+        await self.collect_many([article_data])
+
+    @property
+    def result_dict(self):
+        return self.parser_data_collector.result_dict
+
+    @property
+    def stats(self):
+        return self.parser_data_collector.stats
+
+
+async def aparse(
+    articles_list_pagination_gen, site_config, user_settings,
+    collector=None, executor=None
+):
+    """Parse webpages crawled by acrawl without blocking the event loop.
+
+    Articles met on previous pages are counted once and pagination
+    stops at the end of the feed, like in parser.parse.
+
+    Args:
+        articles_list_pagination_gen (async iterable):
+            page numbers and webpages of articles list paginated.
+        site_config (SiteConfig): get selectors from config.
+        user_settings (ArgumentParser):
+            user arguments passed to the program.
+        collector (AsyncCollector or None):
+            collector to use, new one is created by default.
+        executor (concurrent.futures.Executor or None):
+            threads to parse webpages in, the loop default one if None.
+
+    Returns:
+        (dict): parsed data dict.
+
+    """
+    if collector is None:
+        collector = AsyncCollector(
+            user_settings=user_settings, executor=executor
+        )
+    parse_backend = get_parse_backend(
+        site_config,
+        getattr(user_settings, 'parser_backend', DEFAULT_PARSE_BACKEND)
+    )
+    loop = asyncio.get_running_loop()
+    pagination_filter = PaginationFilter()
+
+    async for _, articles_list in articles_list_pagination_gen:
+        new_articles_data = pagination_filter.filter(
+            await loop.run_in_executor(
+                executor, parse_page, parse_backend, articles_list
+            )
+        )
+        if new_articles_data is None:
+            if hasattr(articles_list_pagination_gen, 'aclose'):
+                await articles_list_pagination_gen.aclose()
+            break
+        await collector.collect_many(new_articles_data)
+    collector.parser_data_collector.save_lemmas()
+    return collector.result_dict
+
+
+async def aparse_site(
+    site_config, user_settings, session=None, collector=None, executor=None
+):
+    """Crawl and parse one site without blocking the event loop.
+
+    Many sites may be parsed concurrently in one event loop,
+    e.g. with asyncio.gather, sharing one session.
+
+    Args:
+        site_config (SiteConfig): config of the site to be crawled.
+        user_settings (ArgumentParser):
+            user arguments passed to the program.
+        session (CrawlerSession or None): HTTP session to crawl with.
+        collector (AsyncCollector or None): collector to count nouns with.
+        executor (concurrent.futures.Executor or None):
+            threads to send requests and parse webpages in.
+
+    Returns:
+        (dict): parsed data dict.
+
+    """
+    return await aparse(
+        acrawl(site_config, user_settings, session, executor),
+        site_config, user_settings, collector, executor
+    )
@@ -0,0 +1,273 @@
+import gzip
+import io
+import mmap
+import os
+import re
+import tarfile
+import time
+
+from habr_challenge.raw_page import RawPage
+
+
+__all__ = ['ArchiveWriter', 'record', 'replay']
+
+
+PAGE_FILE_NAME = 'page{page}.html'
+PAGE_FILE_NAME_RE = re.compile(r'(\d+)')
+
+TAR_EXTENSIONS = ('.tar', '.tar.gz', '.tgz')
+WARC_EXTENSIONS = ('.warc', '.warc.gz')
+WARC_VERSION = b'WARC/1.0'
+WARC_PAGE_HEADER = 'WARC-Page-Number'  # Extension field of ArchiveWriter
+
+
+def _archive_format(path):
+    """Guess archive format by its path.
+
+    Returns:
+        (str): 'warc', 'tar' or 'directory'.
+
+    """
+    if path.endswith(WARC_EXTENSIONS):
+        return 'warc'
+    if path.endswith(TAR_EXTENSIONS):
+        return 'tar'
+    return 'directory'
+
+
+def _page_number(file_name):
+    """Page number N of page<N>.html file, 0 for other files."""
+    match = PAGE_FILE_NAME_RE.search(file_name)
+    return int(match.group(1)) if match else 0
+
+
+def _page_sort_key(file_name):
+    """Sort page<N>.html files by N, other files by name."""
+    return (_page_number(file_name), file_name)
+
+
+def _read_mapped(path):
+    """Read file with a memory map, avoiding buffered copies.
+
+    Args:
+        path (str): file to read.
+
+    Returns:
+        (str): decoded file content.
+
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ''
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, \
+                memoryview(mapped) as view:
+            return str(view, 'utf-8')
+
+
+def _replay_directory(path, pages):
+    for file_name in sorted(os.listdir(path), key=_page_sort_key):
+        page = _page_number(file_name)
+        if file_name.endswith('.html') and (pages is None or page in pages):
+            yield page, _read_mapped(os.path.join(path, file_name))
+
+
+def _replay_tar(path, pages):
+    with tarfile.open(path) as tar:
+        members = sorted(
+            (member for member in tar if member.isfile()),
+            key=lambda member: _page_sort_key(member.name)
+        )
+        for member in members:
+            page = _page_number(member.name)
+            if pages is None or page in pages:
+                yield page, str(tar.extractfile(member).read(), 'utf-8')
+
+
+def _parse_warc_records(data):
+    """Split WARC-like archive into records.
+
+    Args:
+        data (bytes or mmap.mmap): whole archive content.
+
+    Yields:
+        (dict, int, int): record headers, content start and end offsets.
+
+    """
+    position = 0
+    while position < len(data):
+        headers_end = data.find(b'\r\n\r\n', position)
+        if headers_end < 0:
+            break
+        header_lines = data[position:headers_end].split(b'\r\n')
+        if header_lines[0] != WARC_VERSION:
+            raise ValueError(
+                'WARC record expected at {0}'.format(position)
+            )
+        headers = dict(
+            str(line, 'utf-8').split(': ', 1) for line in header_lines[1:]
+        )
+        content_start = headers_end + 4
+        content_end = content_start + int(headers['Content-Length'])
+        yield headers, content_start, content_end
+        position = content_end + 4  # Skip records separator
+
+
+def _replay_warc(path, pages):
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        if path.endswith('.gz'):
+            data = gzip.GzipFile(fileobj=f).read()
+        else:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            records = (
+                (headers, start, end)
+                for headers, start, end in _parse_warc_records(data)
+                if headers.get('WARC-Type') in ('resource', 'response')
+            )
+            # Records written without the page number header
+            # are numbered in the archive order
+            for page, (headers, start, end) in enumerate(records, 1):
+                page = int(headers.get(WARC_PAGE_HEADER, page))
+                if pages is None or page in pages:
+                    yield page, str(data[start:end], 'utf-8')
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+
+def replay(path, pages=None):
+    """Read saved webpages instead of crawling them.
+
+    Pages are yielded in the format crawler.crawl yields them,
+    so they may be passed to parser.parse.
+
+    Args:
+        path (str): directory of page<N>.html files,
+            tarball or WARC-like archive written by ArchiveWriter.
+        pages (range or None): numbers of the pages to read,
+            e.g. the pages the crawler would crawl, all if None.
+
+    Yields:
+        (int, str): page number and saved articles list webpage.
+
+    """
+    archive_format = _archive_format(path)
+    if archive_format == 'warc':
+        saved_pages = _replay_warc(path, pages)
+    elif archive_format == 'tar':
+        saved_pages = _replay_tar(path, pages)
+    else:
+        saved_pages = _replay_directory(path, pages)
+
+    for page, articles_list in saved_pages:
+        yield page, articles_list
+
+
+class ArchiveWriter:
+    """Write crawled webpages into an archive readable by replay.
+
+    Archive format is chosen by path:
+    *.warc or *.warc.gz - WARC-like records,
+    *.tar, *.tar.gz or *.tgz - tarball of page<N>.html,
+    otherwise - directory of page<N>.html files.
+
+    Attributes:
+        path (str): archive path.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._format = _archive_format(path)
+        self._file = None
+
+        if self._format == 'warc':
+            self._file = (
+                gzip.open(path, 'wb') if path.endswith('.gz')
+                else open(path, 'wb')
+            )
+        elif self._format == 'tar':
+            self._file = tarfile.open(
+                path, 'w:gz' if path.endswith('gz') else 'w'
+            )
+        else:
+            os.makedirs(path, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, page, url, content):
+        """Write webpage.
+
+        Args:
+            page (int): pagination page number.
+            url (str): webpage url.
+            content (str or RawPage): webpage crawled.
+
+        """
+        if isinstance(content, RawPage):
+            content = content.to_utf8()
+        else:
+            content = content.encode('utf-8')
+        file_name = PAGE_FILE_NAME.format(page=page)
+
+        if self._format == 'warc':
+            headers = (
+                '{version}\r\n'
+                'WARC-Type: resource\r\n'
+                'WARC-Target-URI: {url}\r\n'
+                'WARC-Date: {date}\r\n'
+                '{page_header}: {page}\r\n'
+                'Content-Type: text/html; charset=utf-8\r\n'
+                'Content-Length: {length}\r\n'
+                '\r\n'
+            ).format(
+                version=str(WARC_VERSION, 'ascii'), url=url,
+                page_header=WARC_PAGE_HEADER, page=page,
+                date=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                length=len(content)
+            )
+            self._file.write(headers.encode('utf-8') + content + b'\r\n\r\n')
+        elif self._format == 'tar':
+            tar_info = tarfile.TarInfo(file_name)
+            tar_info.size = len(content)
+            tar_info.mtime = time.time()
+            self._file.addfile(tar_info, io.BytesIO(content))
+        else:
+            with open(os.path.join(self.path, file_name), 'wb') as f:
+                f.write(content)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def record(articles_list_pagination_gen, archive_writer, articles_list_url):
+    """Write crawled webpages into the archive as they pass by.
+
+    Args:
+        articles_list_pagination_gen (genirator):
+            generator of page numbers and webpages
+            of articles list paginated, e.g. crawler.crawl.
+        archive_writer (ArchiveWriter): archive to write pages into.
+        articles_list_url (str): url pages are crawled from.
+
+    Yields:
+        (int, str or RawPage): page number and crawled webpage.
+
+    """
+    try:
+        for page, articles_list in articles_list_pagination_gen:
+            archive_writer.write(
+                page, articles_list_url.format(page=page), articles_list
+            )
+            yield page, articles_list
+    finally:
+        if hasattr(articles_list_pagination_gen, 'close'):
+            articles_list_pagination_gen.close()
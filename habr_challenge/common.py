@@ -1,3 +1,13 @@
+import array
+import bisect
+import collections
+import hashlib
+import heapq
+
+
+SEEN_PENDING_LIMIT = 1024  # Hashes buffered before merged into the array
+
+
 def coroutine(func):  # pragma: no cov
     def start(*args, **kwargs):
         cr = func(*args, **kwargs)
@@ -6,6 +16,17 @@ def coroutine(func):  # pragma: no cov
     return start
 
 
+def hit_rate(hits, misses):
+    """Share of cache lookups that hit.
+
+    Returns:
+        (float): 0 if there were no lookups.
+
+    """
+    lookups = hits + misses
+    return hits / lookups if lookups else 0.
+
+
 def cached_property(f):
     def get(self):
         try:
@@ -18,3 +39,136 @@ def cached_property(f):
             _ = self._property_cache[f] = f(self)
             return _
     return property(get)
+
+
+class LRUCache:
+    """Bounded mapping discarding the least recently used items.
+
+    Attributes:
+        maxsize (int): max number of items to keep.
+            Nothing is cached if maxsize <= 0.
+        hits (int): number of successful lookups.
+        misses (int): number of failed lookups.
+
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __setitem__(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get(self, key, default=None):
+        """Get cached value and mark it as recently used.
+
+        Args:
+            key (hashable): key to look up.
+            default: value returned on a cache miss.
+
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def clear(self):
+        self._data.clear()
+        self.hits = self.misses = 0
+
+    @property
+    def info(self):
+        """Cache statistics.
+
+        Returns:
+            (dict): hits, misses, current and max size.
+
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': hit_rate(self.hits, self.misses),
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
+
+
+class SeenSet:
+    """Set of strings kept as their 64-bit hashes.
+
+    Takes the same memory for short ids and long urls: 8 bytes
+    a string in a sorted array, looked up by bisection.
+    False positive probability is about n ** 2 / 2 ** 65
+    for n strings added.
+
+    Attributes:
+        _hashes (array.array): sorted hashes of strings added.
+        _pending (set): hashes not merged into _hashes yet.
+
+    """
+
+    def __init__(self):
+        self._hashes = array.array('Q')
+        self._pending = set()
+
+    def __len__(self):
+        return len(self._hashes) + len(self._pending)
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(
+            hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(),
+            'little'
+        )
+
+    def _has_hash(self, key_hash):
+        if key_hash in self._pending:
+            return True
+        index = bisect.bisect_left(self._hashes, key_hash)
+        return index < len(self._hashes) and self._hashes[index] == key_hash
+
+    def __contains__(self, key):
+        return self._has_hash(self._hash(key))
+
+    def add(self, key):
+        """Add string to the set.
+
+        Args:
+            key (str): string to add.
+
+        Returns:
+            (bool): True if the string is new.
+
+        """
+        key_hash = self._hash(key)
+        if self._has_hash(key_hash):
+            return False
+        self._pending.add(key_hash)
+        if len(self._pending) > SEEN_PENDING_LIMIT:
+            self._hashes = array.array('Q', heapq.merge(
+                self._hashes, sorted(self._pending)
+            ))
+            self._pending = set()
+        return True
+
+    @property
+    def nbytes(self):
+        """Bytes of the hashes merged into the array."""
+        return len(self._hashes) * self._hashes.itemsize
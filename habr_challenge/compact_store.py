@@ -0,0 +1,293 @@
+import array
+import bisect
+import collections.abc
+import datetime
+import heapq
+import sys
+import threading
+
+
+__all__ = ['CompactStore', 'Vocabulary', 'WeekCounts']
+
+
+WEEK_DATE_FORMAT = '%d-%m-%Y'
+PENDING_LIMIT = 1024  # Counts buffered before merged into arrays
+
+
+class Vocabulary:
+    """Intern lemmas into integer ids.
+
+    Ids are given in order lemmas are met for the first time.
+
+    Attributes:
+        _ids (dict): lemma -> id.
+        _lemmas ([str]): id -> lemma.
+
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._lemmas = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._lemmas)
+
+    def intern(self, lemma):
+        """Get lemma id, new lemma is given the next one.
+
+        Args:
+            lemma (str)
+
+        Returns:
+            (int)
+
+        """
+        lemma_id = self._ids.get(lemma)
+        if lemma_id is None:
+            with self._lock:
+                lemma_id = self._ids.get(lemma)
+                if lemma_id is None:
+                    lemma_id = len(self._lemmas)
+                    self._lemmas.append(sys.intern(lemma))
+                    self._ids[lemma] = lemma_id
+        return lemma_id
+
+    def id(self, lemma):
+        """Get lemma id without interning.
+
+        Returns:
+            (int or None): None if lemma is unknown.
+
+        """
+        return self._ids.get(lemma)
+
+    def lemma(self, lemma_id):
+        return self._lemmas[lemma_id]
+
+
+def week_key(week_range):
+    """Convert week range into ISO year * 100 + ISO week.
+
+    Args:
+        week_range ((str, str)): formatted dates of week start and end.
+
+    Returns:
+        (int): e.g. 200953 for ('28-12-2009', '03-01-2010').
+
+    """
+    iso_year, iso_week, _ = datetime.datetime.strptime(
+        week_range[0], WEEK_DATE_FORMAT
+    ).isocalendar()
+    return iso_year * 100 + iso_week
+
+
+def week_range(key):
+    """Convert ISO year * 100 + ISO week into week range.
+
+    Args:
+        key (int): week key made by week_key.
+
+    Returns:
+        (str, str): formatted dates of week start and end.
+
+    """
+    iso_year, iso_week = divmod(key, 100)
+    # January 4th is always in the first ISO week
+    january_4th = datetime.date(iso_year, 1, 4)
+    week_start = january_4th + datetime.timedelta(
+        days=-january_4th.weekday(), weeks=iso_week - 1
+    )
+    week_end = week_start + datetime.timedelta(days=6)
+    return (
+        week_start.strftime(WEEK_DATE_FORMAT),
+        week_end.strftime(WEEK_DATE_FORMAT)
+    )
+
+
+class WeekCounts(collections.abc.Mapping):
+    """Nouns count of a week in arrays of lemma ids and counts.
+
+    Mapping of lemma to count like collections.Counter,
+    but lemmas are stored once in the shared Vocabulary
+    and counts take 12 bytes per lemma.
+    Lemmas are iterated and ties of most_common are broken
+    in the order lemmas were met in this week, like in Counter.
+
+    Attributes:
+        _ids (array.array): sorted lemma ids.
+        _counts (array.array): counts of _ids.
+        _orders (array.array): first-seen index of _ids in this week.
+        _pending (dict): lemma id -> count not merged into arrays yet,
+            in the order lemmas were counted.
+
+    """
+
+    __slots__ = ('_vocabulary', '_ids', '_counts', '_orders', '_pending')
+
+    def __init__(self, vocabulary):
+        self._vocabulary = vocabulary
+        self._ids = array.array('I')
+        self._counts = array.array('I')
+        self._orders = array.array('I')
+        self._pending = {}
+
+    def update(self, iterable):
+        """Count lemmas.
+
+        Args:
+            iterable (iterable or mapping): lemmas to count
+                or mapping of lemmas to their counts, like Counter.update.
+
+        """
+        if hasattr(iterable, 'items'):
+            items = iterable.items()
+        else:
+            items = ((lemma, 1) for lemma in iterable)
+
+        pending = self._pending
+        intern = self._vocabulary.intern
+        for lemma, count in items:
+            lemma_id = intern(lemma)
+            pending[lemma_id] = pending.get(lemma_id, 0) + count
+        if len(pending) > PENDING_LIMIT:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        counts = dict(zip(self._ids, self._counts))
+        orders = dict(zip(self._ids, self._orders))
+        for lemma_id, count in self._pending.items():
+            if lemma_id not in orders:
+                orders[lemma_id] = len(orders)
+            counts[lemma_id] = counts.get(lemma_id, 0) + count
+        self._pending = {}
+
+        ids = sorted(lemma_id for lemma_id, count in counts.items() if count)
+        self._ids = array.array('I', ids)
+        self._counts = array.array('I', (counts[i] for i in ids))
+        self._orders = array.array('I', (orders[i] for i in ids))
+
+    def _indexes(self):
+        """Indexes of the arrays in the order lemmas were met."""
+        self._flush()
+        return sorted(range(len(self._ids)), key=self._orders.__getitem__)
+
+    def __getitem__(self, lemma):
+        self._flush()
+        lemma_id = self._vocabulary.id(lemma)
+        if lemma_id is not None:
+            i = bisect.bisect_left(self._ids, lemma_id)
+            if i < len(self._ids) and self._ids[i] == lemma_id:
+                return self._counts[i]
+        raise KeyError(lemma)
+
+    def __iter__(self):
+        return (
+            self._vocabulary.lemma(self._ids[i]) for i in self._indexes()
+        )
+
+    def __len__(self):
+        self._flush()
+        return len(self._ids)
+
+    def items(self):
+        """Lemmas and their counts, in the order lemmas were met."""
+        return [
+            (self._vocabulary.lemma(self._ids[i]), self._counts[i])
+            for i in self._indexes()
+        ]
+
+    def most_common(self, n=None):
+        """List n most common lemmas and their counts.
+
+        Args:
+            n (int or None): all lemmas if None.
+
+        Returns:
+            ([(str, int)])
+
+        """
+        self._flush()
+        ids, counts, orders = self._ids, self._counts, self._orders
+
+        def key(i):
+            return -counts[i], orders[i]
+
+        indexes = range(len(ids))
+        if n is None:
+            indexes = sorted(indexes, key=key)
+        else:
+            indexes = heapq.nsmallest(n, indexes, key=key)
+        return [
+            (self._vocabulary.lemma(ids[i]), counts[i]) for i in indexes
+        ]
+
+    @property
+    def nbytes(self):
+        self._flush()
+        arrays = (self._ids, self._counts, self._orders)
+        return sum(len(a) * a.itemsize for a in arrays)
+
+
+class CompactStore:
+    """Nouns count by week range keyed by ISO year * 100 + ISO week.
+
+    Used by ParserDataCollector in place of defaultdict(Counter):
+    week ranges are converted to integer keys on access
+    and back to (str, str) only when results are output.
+
+    Attributes:
+        vocabulary (Vocabulary): lemma ids shared by the store weeks,
+            it is dropped with the store, e.g. on collector reset.
+        _weeks (dict): week key -> WeekCounts in insertion order.
+        _week_keys (dict): week range -> week key memo.
+
+    """
+
+    def __init__(self, vocabulary=None):
+        self.vocabulary = Vocabulary() if vocabulary is None else vocabulary
+        self._weeks = {}
+        self._week_keys = {}
+
+    def _key(self, week_range_):
+        key = self._week_keys.get(week_range_)
+        if key is None:
+            key = self._week_keys[week_range_] = week_key(week_range_)
+        return key
+
+    def __getitem__(self, week_range_):
+        """Get week counts, created if missing like in defaultdict.
+        """
+        key = self._key(week_range_)
+        week_counts = self._weeks.get(key)
+        if week_counts is None:
+            week_counts = self._weeks[key] = WeekCounts(self.vocabulary)
+        return week_counts
+
+    def __len__(self):
+        return len(self._weeks)
+
+    def __iter__(self):
+        return map(week_range, self._weeks)
+
+    def items(self):
+        for key, week_counts in self._weeks.items():
+            yield week_range(key), week_counts
+
+    @property
+    def info(self):
+        """Store statistics.
+
+        Returns:
+            (dict): weeks, vocabulary size and bytes of the counts.
+
+        """
+        return {
+            'weeks': len(self._weeks),
+            'vocabulary': len(self.vocabulary),
+            'counts_bytes': sum(
+                week_counts.nbytes for week_counts in self._weeks.values()
+            ),
+        }
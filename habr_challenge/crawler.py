@@ -1,78 +1,417 @@
-import requests
+import collections
+import contextlib
+import email.utils
+import threading
+import time
+import urllib.parse
 
-from tqdm import tqdm as progress_bar
+from concurrent import futures
 
+from habr_challenge.metrics import METRICS
+from habr_challenge.scheduler import RateLimiter
+from habr_challenge.session import \
+    CrawlerSession, \
+    REQUEST_HEADERS, \
+    RETRY_STATUSES  # noqa
 
-REQUEST_HEADERS = {
-    'User-Agent': ("Mozilla/5.0"
-                   "(Macintosh; Intel Mac OS X 10_10_1)"
-                   "AppleWebKit/537.36"
-                   "(KHTML, like Gecko)"
-                   "Chrome/39.0.2171.95"
-                   "Safari/537.36"),
-}
+
+DEFAULT_MAX_RPS = 0.  # Unlimited
+# Latency above min latency * tolerance + slack seconds is congestion,
+# slack keeps jitter of fast responses from being taken for it
+LATENCY_TOLERANCE = 2.
+LATENCY_SLACK = .05
+DECREASE_FACTOR = .5
+RATE_WINDOW = 5.  # Seconds the effective rate is measured over
+
+
+def _retry_after_seconds(response):
+    """Parse Retry-After header of seconds or HTTP date.
+
+    Returns:
+        (float or None): seconds to wait, None if header is absent.
+
+    """
+    retry_after = response.headers.get('Retry-After')
+    if retry_after is None:
+        return None
+    try:
+        return max(0., float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0., retry_at.timestamp() - time.time())
+
+
+class AdaptiveController:
+    """Adapt number of requests in flight to the server responses.
+
+    Additive increase, multiplicative decrease policy: the limit grows
+    by one request per limit of fast successful responses and is halved
+    on errors, retries, Retry-After headers or latency growing above
+    LATENCY_TOLERANCE times the fastest response seen.
+    The limit starts from 1 and is doubled each window until the first
+    congestion, like TCP slow start.
+    Requests never exceed max_rps a second.
+
+    Attributes:
+        max_concurrency (int): upper bound of the limit.
+        host (str or None): responses of other hosts are ignored.
+        limit (float): current number of requests allowed in flight.
+        errors (int): failed and retried requests seen.
+        throttled (int): responses with Retry-After seen.
+        _resume_at (float): monotonic time requests are paused until.
+        _completed (collections.deque): (monotonic time, is error)
+            of the responses seen during the last RATE_WINDOW seconds.
+
+    """
+
+    def __init__(self, max_concurrency, max_rps=DEFAULT_MAX_RPS, host=None):
+        self.max_concurrency = max_concurrency
+        self.host = host
+        self.limit = 1.
+        self.errors = 0
+        self.throttled = 0
+        self._slow_start = True
+        self._min_latency = None
+        self._last_decrease = 0.
+        self._in_flight = 0
+        self._resume_at = 0.
+        self._completed = collections.deque()
+        self._rate_limiter = RateLimiter(max_rps)
+        self._condition = threading.Condition()
+
+    @contextlib.contextmanager
+    def slot(self):
+        """Wait until a request is allowed and hold it for the block.
+        """
+        with self._condition:
+            while True:
+                pause = self._resume_at - time.monotonic()
+                if pause > 0:
+                    self._condition.wait(pause)
+                elif self._in_flight >= int(self.limit):
+                    self._condition.wait()
+                else:
+                    break
+            self._in_flight += 1
+        try:
+            self._rate_limiter.acquire()
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def observe(self, response, *args, **kwargs):
+        """Adapt the limit to the response, used as requests hook.
+
+        Args:
+            response (requests.Response)
+
+        """
+        if self.host is not None and \
+                urllib.parse.urlsplit(response.url).netloc != self.host:
+            return
+        retries = getattr(getattr(response.raw, 'retries', None),
+                          'history', ())
+        is_error = bool(retries) or (
+            response.status_code in RETRY_STATUSES
+        )
+        retry_after = _retry_after_seconds(response)
+        latency = response.elapsed.total_seconds()
+        now = time.monotonic()
+
+        with self._condition:
+            self._completed.append((now, is_error))
+            while self._completed[0][0] < now - RATE_WINDOW:
+                self._completed.popleft()
+
+            if self._min_latency is None or latency < self._min_latency:
+                self._min_latency = latency
+            is_slow = latency > (
+                self._min_latency * LATENCY_TOLERANCE + LATENCY_SLACK
+            )
+
+            if retry_after is not None:
+                self.throttled += 1
+                self._resume_at = max(self._resume_at, now + retry_after)
+            if is_error:
+                self.errors += len(retries) or 1
+            if is_error or is_slow or retry_after is not None:
+                self._decrease(now, latency)
+            else:
+                self._increase()
+            METRICS.set_gauge('crawler_concurrency_limit', int(self.limit))
+            self._condition.notify_all()
+
+    def _increase(self):
+        if self._slow_start:
+            self.limit += 1.
+        else:
+            self.limit += 1. / self.limit
+        self.limit = min(self.limit, float(self.max_concurrency))
+
+    def _decrease(self, now, latency):
+        # Responses to requests sent before the decrease
+        # do not decrease the limit again
+        if now - self._last_decrease < max(latency, self._min_latency):
+            return
+        self._slow_start = False
+        self._last_decrease = now
+        self.limit = max(1., self.limit * DECREASE_FACTOR)
+
+    @property
+    def info(self):
+        """Controller decisions.
+
+        Returns:
+            (dict): limit, effective requests rate and error rate
+                over the last RATE_WINDOW seconds.
+
+        """
+        with self._condition:
+            completed = list(self._completed)
+        rps = error_rate = 0.
+        if completed:
+            # Rate of the first second is not extrapolated
+            elapsed = max(time.monotonic() - completed[0][0], 1.)
+            rps = len(completed) / min(elapsed, RATE_WINDOW)
+            error_rate = sum(
+                is_error for _, is_error in completed
+            ) / len(completed)
+        return {
+            'limit': int(self.limit),
+            'rps': round(rps, 1),
+            'error_rate': round(error_rate, 2),
+            'errors': self.errors,
+            'throttled': self.throttled,
+        }
 
 
 def _get_pagination_range(user_settings):
     """Get pagination range from user_settings.
 
-    Return pretty shown pagination range.
+    Args:
+        user_settings (ArgumentParser):
+            user arguments passed to the program.
+
+    Returns:
+        (range): site pages to crawl.
+
+    """
+    return range(
+        getattr(user_settings, 'first_page', 1), user_settings.pages + 1
+    )
+
+
+def _get_progress_bar(user_settings, pages_range):
+    """Get progress bar of the pages consumed.
+
+    Bar is advanced by the crawl consumer, not when pages
+    are submitted, so prefetched pages are not shown as done.
 
     Args:
         user_settings (ArgumentParser):
             user arguments passed to the program.
+        pages_range (range): site pages to crawl.
 
     Returns:
-        pages_range (
-          tqdm(range) or range
-        ): iterable over the site pages with pretty statusbar.
+        (tqdm or None): None if progress is not shown.
+
+    """
+    if not user_settings.show_progress:
+        return None
+
+    from tqdm import tqdm as progress_bar
+
+    return progress_bar(total=len(pages_range))
+
+
+def _fetch_page(session, articles_list_url, page):
+    """Fetch one webpage with articles.
+
+    Args:
+        session (CrawlerSession): HTTP session to send request with.
+        articles_list_url (str): url to crawl articles from.
+        page (int): pagination page number.
 
+    Returns:
+       (RawPage or None): webpage crawled,
+           None if it is not available offline.
 
     """
-    pages_range = range(1, user_settings.pages + 1)
-    show_progress = progress_bar if \
-        user_settings.show_progress else lambda x: x
+    with METRICS.timer('crawler_page'):
+        return session.fetch(articles_list_url.format(page=page))
 
-    return show_progress(pages_range)
 
+def _fetch_page_controlled(session, articles_list_url, page, controller):
+    """Fetch one webpage when adaptive controller allows it.
 
-def _crawl_articles(articles_list_url, pages_range):
+    Args:
+        controller (AdaptiveController or None): no control if None.
+
+    """
+    if controller is None:
+        return _fetch_page(session, articles_list_url, page)
+    with controller.slot():
+        return _fetch_page(session, articles_list_url, page)
+
+
+def _crawl_articles(
+    session, articles_list_url, pages_range, controller=None
+):
     """Crawl each webpage with articles during pagination.
 
     Args:
+        session (CrawlerSession): HTTP session to send requests with.
         articles_list_url (str): url to crawl articles from.
-        pages_range (
-          tqdm(range) or range
-        ): iterable over the site pages with pretty statusbar.
+        pages_range (range): site pages to crawl.
+        controller (AdaptiveController or None):
+            controller of the requests rate.
 
     Yields:
-       (str): webpage crawled.
+       (int, RawPage or None): page number and webpage crawled,
+           None if it is not available offline.
 
     """
     for page in pages_range:
-        articles_list = requests.get(
-            articles_list_url.format(page=page),
-            headers=REQUEST_HEADERS
+        yield page, _fetch_page_controlled(
+            session, articles_list_url, page, controller
         )
-        yield articles_list.text
 
 
-def crawl(site_config, user_settings):
+def _crawl_articles_concurrently(
+    session, articles_list_url, pages_range, concurrency, prefetch,
+    ordered=True, controller=None
+):
+    """Crawl webpages with articles in a thread pool.
+
+    No more than prefetch pages are requested ahead of the page
+    consumer, so parsing overlaps with network I/O
+    and memory used by crawled pages stays bounded.
+
+    Args:
+        session (CrawlerSession): HTTP session shared by threads.
+        articles_list_url (str): url to crawl articles from.
+        pages_range (range): site pages to crawl.
+        concurrency (int): number of pages fetched in parallel.
+        prefetch (int): max number of pages requested
+            but not consumed yet.
+        ordered (bool): yield pages in pagination order
+            or as soon as they are crawled.
+        controller (AdaptiveController or None): controller
+            of the number of requests in flight and their rate.
+
+    Yields:
+       (int, RawPage or None): page number and webpage crawled,
+           None if it is not available offline.
+
+    """
+    pages = iter(pages_range)
+    window = max(prefetch, concurrency)
+
+    with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = collections.deque()
+        future_pages = {}
+
+        def submit():
+            for page in pages:
+                future = executor.submit(
+                    _fetch_page_controlled,
+                    session, articles_list_url, page, controller
+                )
+                future_pages[future] = page
+                pending.append(future)
+                if len(pending) >= window:
+                    return
+
+        try:
+            submit()
+            while pending:
+                if ordered:
+                    done = [pending.popleft()]
+                else:
+                    done, _ = futures.wait(
+                        pending, return_when=futures.FIRST_COMPLETED
+                    )
+                    for future in done:
+                        pending.remove(future)
+                for future in done:
+                    yield future_pages.pop(future), future.result()
+                submit()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def crawl(site_config, user_settings, session=None):
     """Crawler interface to crawl webpages.
 
     Crawler crawles site through pagination.
+    Pages are fetched in parallel if user_settings.concurrency > 1,
+    user_settings.adaptive adapts the number of pages fetched
+    in parallel to the server responses.
 
     Args:
        site_config (SiteConfig): config of the site to be crawled.
        user_settings (ArgumentParser):
            user arguments passed to the program.
+       session (CrawlerSession or None): HTTP session to crawl with,
+           new one is created and closed after crawling by default.
 
     Yields:
-        (str): crawlerd articles list webpage.
+        (int, RawPage): page number and crawled articles list
+            webpage, pages not available offline are skipped
+            without renumbering the next ones.
 
     """
+    if session is None:
+        with CrawlerSession.from_user_settings(user_settings) as session:
+            for page, articles_list in crawl(
+                site_config, user_settings, session
+            ):
+                yield page, articles_list
+        return
+
     pages_range = _get_pagination_range(user_settings)
-    for articles_list in _crawl_articles(
-        site_config.articles_list_url, pages_range
-    ):
-        yield articles_list
+    progress_bar = _get_progress_bar(user_settings, pages_range)
+    concurrency = getattr(user_settings, 'concurrency', 1)
+    controller = None
+    if getattr(user_settings, 'adaptive', False):
+        controller = AdaptiveController(
+            concurrency,
+            max_rps=getattr(user_settings, 'max_rps', DEFAULT_MAX_RPS),
+            host=urllib.parse.urlsplit(site_config.articles_list_url).netloc
+        )
+        session.add_response_hook(controller.observe)
+
+    if concurrency > 1:
+        prefetch = getattr(user_settings, 'prefetch', None)
+        articles_lists = _crawl_articles_concurrently(
+            session, site_config.articles_list_url, pages_range,
+            concurrency,
+            prefetch=prefetch or 2 * concurrency,
+            ordered=not getattr(user_settings, 'as_completed', False),
+            controller=controller
+        )
+    else:
+        articles_lists = _crawl_articles(
+            session, site_config.articles_list_url, pages_range, controller
+        )
+
+    try:
+        for page, articles_list in articles_lists:
+            if progress_bar is not None:
+                if controller is not None:
+                    progress_bar.set_postfix(controller.info, refresh=False)
+                progress_bar.update()
+            if articles_list is not None:
+                yield page, articles_list
+    finally:
+        if progress_bar is not None:
+            progress_bar.close()
+        if controller is not None:
+            session.remove_response_hook(controller.observe)
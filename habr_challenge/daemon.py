@@ -0,0 +1,200 @@
+import http.server
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+import urllib.error
+import urllib.request
+
+
+__all__ = ['ReportServer', 'request_report']
+
+
+DEFAULT_HOST = '127.0.0.1'
+REPORT_PATH = '/report'
+
+
+class _UnixRequestHandler(socketserver.StreamRequestHandler):
+    """One json line request, one json line response."""
+
+    def handle(self):
+        response = self.server.report_server.answer(
+            json.loads(str(self.rfile.readline(), 'utf-8'))
+        )
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+class _HTTPRequestHandler(http.server.BaseHTTPRequestHandler):
+    """POST /report with json request body."""
+
+    def do_POST(self):
+        if self.path != REPORT_PATH:
+            self.send_error(404)
+            return
+        content_length = int(self.headers.get('Content-Length', 0))
+        response = self.server.report_server.answer(
+            json.loads(str(self.rfile.read(content_length), 'utf-8'))
+        )
+        body = json.dumps(response).encode('utf-8')
+        self.send_response(200 if response['ok'] else 400)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _remove_stale_socket(socket_path):
+    """Remove socket left by a killed daemon.
+
+    Raises:
+        FileExistsError: path exists and is not a socket.
+
+    """
+    try:
+        mode = os.stat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(
+            '{0} exists and is not a socket'.format(socket_path)
+        )
+    os.remove(socket_path)
+
+
+class ReportServer:
+    """Answer report requests over a Unix socket or loopback HTTP.
+
+    Reports are built one at a time by the handler,
+    so it may keep warm collector and session between requests.
+
+    Request is {"args": [str]}: parse_habr arguments,
+    response is {"ok": true, "report": str}
+    or {"ok": false, "error": str}.
+
+    Attributes:
+        handler (callable): args -> report text.
+        socket_path (str or None): Unix socket to listen on.
+        address ((str, int) or None): loopback HTTP address.
+        _server (socketserver.BaseServer)
+
+    """
+
+    def __init__(
+        self, handler, socket_path=None, port=None, host=DEFAULT_HOST
+    ):
+        """
+        Args:
+            handler (callable): args -> report text,
+                exception message is sent back on error.
+            socket_path (str or None): Unix socket path,
+                loopback HTTP is served if None.
+            port (int or None): HTTP port, 0 picks a free one.
+            host (str): HTTP host.
+
+        Raises:
+            FileExistsError: socket_path exists and is not a socket.
+
+        """
+        self.handler = handler
+        self.socket_path = socket_path
+        self._lock = threading.Lock()
+
+        if socket_path is not None:
+            _remove_stale_socket(socket_path)
+            self._server = socketserver.ThreadingUnixStreamServer(
+                socket_path, _UnixRequestHandler
+            )
+            self.address = None
+        else:
+            self._server = http.server.ThreadingHTTPServer(
+                (host, port or 0), _HTTPRequestHandler
+            )
+            self.address = self._server.server_address
+        self._server.daemon_threads = True
+        self._server.report_server = self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def answer(self, request):
+        """Build the report requested.
+
+        Args:
+            request (dict): {"args": [str]}.
+
+        Returns:
+            (dict): response.
+
+        """
+        try:
+            with self._lock:
+                report = self.handler(list(request['args']))
+        except Exception as e:
+            return {'ok': False, 'error': str(e) or e.__class__.__name__}
+        return {'ok': True, 'report': report}
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def shutdown(self):
+        """Stop serve_forever running in another thread."""
+        self._server.shutdown()
+
+    def close(self):
+        self._server.server_close()
+        if self.socket_path is not None and os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+def request_report(
+    args, socket_path=None, port=None, host=DEFAULT_HOST, timeout=None
+):
+    """Request report from the ReportServer.
+
+    Args:
+        args ([str]): parse_habr arguments.
+        socket_path (str or None): server Unix socket.
+        port (int or None): server HTTP port if socket_path is None.
+        host (str): server HTTP host.
+        timeout (float or None): seconds to wait for the report.
+
+    Returns:
+        (str): report text.
+
+    Raises:
+        RuntimeError: server failed to build the report.
+
+    """
+    request = json.dumps({'args': list(args)}).encode('utf-8')
+
+    if socket_path is not None:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall(request + b'\n')
+            with sock.makefile('rb') as f:
+                response = json.loads(str(f.readline(), 'utf-8'))
+    else:
+        http_request = urllib.request.Request(
+            'http://{host}:{port}{path}'.format(
+                host=host, port=port, path=REPORT_PATH
+            ),
+            data=request, headers={'Content-Type': 'application/json'}
+        )
+        try:
+            with urllib.request.urlopen(http_request, timeout=timeout) as f:
+                response = json.loads(str(f.read(), 'utf-8'))
+        except urllib.error.HTTPError as e:
+            response = json.loads(str(e.read(), 'utf-8'))
+
+    if not response['ok']:
+        raise RuntimeError(response['error'])
+    return response['report']
@@ -0,0 +1,161 @@
+import heapq
+import itertools
+
+
+__all__ = ['SpaceSavingCounter']
+
+
+DEFAULT_TOP_N = 3
+
+
+class SpaceSavingCounter:
+    """Approximate Counter keeping a bounded number of items.
+
+    Implements Space-Saving algorithm: when capacity is exhausted
+    a new item replaces the least counted one and inherits its count.
+    Count of an item is overestimated by at most its error,
+    any item counted more than total / capacity times is kept.
+
+    Top N items are kept sorted on every update,
+    so most_common(n <= top_n) does not sort all the items.
+    Ties are ordered by the time items were first counted,
+    like in collections.Counter.most_common.
+
+    Attributes:
+        capacity (int): max number of items counted.
+        top_n (int): number of most common items tracked.
+        _counts (dict): item -> estimated count.
+        _errors (dict): item -> max overestimation of its count.
+        _seqs (dict): item -> number of items counted before it.
+        _heap (list): (count, item) min-heap,
+            entries with outdated count are skipped.
+        _top (list): top_n items sorted by _rank.
+
+    """
+
+    def __init__(self, capacity, top_n=DEFAULT_TOP_N):
+        self.capacity = max(capacity, top_n, 1)
+        self.top_n = top_n
+        self._counts = {}
+        self._errors = {}
+        self._seqs = {}
+        self._seq = itertools.count()
+        self._heap = []
+        self._top = []
+
+    def __len__(self):
+        return len(self._counts)
+
+    def __iter__(self):
+        return iter(self._counts)
+
+    def __contains__(self, item):
+        return item in self._counts
+
+    def __getitem__(self, item):
+        return self._counts.get(item, 0)
+
+    def __repr__(self):
+        return 'SpaceSavingCounter({0})'.format(self.most_common(self.top_n))
+
+    def keys(self):
+        return self._counts.keys()
+
+    def items(self):
+        return self._counts.items()
+
+    def _rank(self, item):
+        """Sort key of the items from the most common."""
+        return -self._counts[item], self._seqs[item]
+
+    def error(self, item):
+        """Max overestimation of the item count."""
+        return self._errors.get(item, 0)
+
+    def update(self, iterable):
+        """Count items.
+
+        Args:
+            iterable (iterable or mapping): items to count
+                or mapping of items to their counts, like Counter.update.
+
+        """
+        if hasattr(iterable, 'items'):
+            items = iterable.items()
+        else:
+            items = ((item, 1) for item in iterable)
+
+        for item, count in items:
+            if count > 0:
+                self._add(item, count)
+
+    def _add(self, item, count):
+        counts = self._counts
+        if item in counts:
+            counts[item] += count
+        elif len(counts) < self.capacity:
+            counts[item] = count
+            self._errors[item] = 0
+            self._seqs[item] = next(self._seq)
+        else:
+            min_count = self._evict_min()
+            counts[item] = min_count + count
+            self._errors[item] = min_count
+            self._seqs[item] = next(self._seq)
+
+        heapq.heappush(self._heap, (counts[item], item))
+        if len(self._heap) > 2 * self.capacity:
+            self._heap = [(count, item) for item, count in counts.items()]
+            heapq.heapify(self._heap)
+        self._update_top(item)
+
+    def _evict_min(self):
+        """Remove the least counted item.
+
+        Returns:
+            (int): count of the removed item.
+
+        """
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if self._counts.get(item) == count:
+                break
+
+        del self._counts[item]
+        del self._errors[item]
+        del self._seqs[item]
+        if item in self._top:
+            self._top = heapq.nsmallest(
+                self.top_n, self._counts, key=self._rank
+            )
+        return count
+
+    def _update_top(self, item):
+        top = self._top
+        if item not in top:
+            if len(top) < self.top_n:
+                top.append(item)
+            elif self._rank(item) < self._rank(top[-1]):
+                top[-1] = item
+            else:
+                return
+        top.sort(key=self._rank)
+
+    def most_common(self, n=None):
+        """List the n most common items and their counts.
+
+        Args:
+            n (int or None): number of items, all items by default.
+
+        Returns:
+            (list): [(item, count), ...] from the most common.
+
+        """
+        if n is not None and n <= self.top_n:
+            return [(item, self._counts[item]) for item in self._top[:n]]
+
+        most_common = [
+            (item, self._counts[item])
+            for item in sorted(self._counts, key=self._rank)
+        ]
+        return most_common if n is None else most_common[:n]
@@ -0,0 +1,216 @@
+import os
+import sqlite3
+import threading
+
+from habr_challenge.common import hit_rate
+
+
+__all__ = ['LemmaStore', 'get_lemma_store']
+
+
+BUSY_TIMEOUT = 30.  # Seconds to wait for a writer of another process
+QUERY_VARIABLES = 500  # Below the SQLite limit of query parameters
+
+_lemma_stores = {}
+_lemma_stores_lock = threading.Lock()
+
+
+class LemmaStore:
+    """Morphological analysis of word forms kept in SQLite between runs.
+
+    Database is in WAL mode, so several processes read it at once
+    while one of them appends new word forms.
+    New word forms are kept in memory until flush
+    and written in a single transaction.
+
+    Attributes:
+        path (str): SQLite database file.
+        hits (int): word forms found in the database.
+        misses (int): word forms looked up but not found.
+        _pending (dict): word form -> (is_noun, normal_form) not written.
+
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS lemmas (
+            word TEXT PRIMARY KEY,
+            is_noun INTEGER NOT NULL,
+            normal_form TEXT NOT NULL
+        ) WITHOUT ROWID
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = self.misses = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(
+            path, timeout=BUSY_TIMEOUT, check_same_thread=False,
+            isolation_level=None
+        )
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(self.SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM lemmas'
+            ).fetchone()[0]
+
+    def get_many(self, words):
+        """Look up word forms.
+
+        Args:
+            words (list): unique word forms.
+
+        Returns:
+            (dict): word form -> (bool, str) - is word a noun
+                and its normal form, only for word forms found.
+
+        """
+        lemmas = {}
+        with self._lock:
+            for i in range(0, len(words), QUERY_VARIABLES):
+                chunk = words[i:i + QUERY_VARIABLES]
+                for word, is_noun, normal_form in self._connection.execute(
+                    'SELECT word, is_noun, normal_form FROM lemmas '
+                    'WHERE word IN ({0})'.format(','.join('?' * len(chunk))),
+                    chunk
+                ):
+                    lemmas[word] = (bool(is_noun), normal_form)
+            for word in words:
+                if word not in lemmas:
+                    lemma = self._pending.get(word)
+                    if lemma is not None:
+                        lemmas[word] = lemma
+            self.hits += len(lemmas)
+            self.misses += len(words) - len(lemmas)
+        return lemmas
+
+    def update(self, lemmas):
+        """Add analyzed word forms, written on flush.
+
+        Args:
+            lemmas (dict): word form -> (is_noun, normal_form).
+
+        """
+        with self._lock:
+            self._pending.update(lemmas)
+
+    def pop_pending(self):
+        """Take word forms not written yet, e.g. to send them
+        from a worker process to the one owning the store.
+
+        Returns:
+            (dict): word form -> (is_noun, normal_form).
+
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def flush(self):
+        """Write new word forms in one transaction."""
+        with self._lock:
+            if not self._pending:
+                return
+            with self._connection:
+                self._connection.execute('BEGIN IMMEDIATE')
+                self._connection.executemany(
+                    'INSERT OR IGNORE INTO lemmas VALUES (?, ?, ?)',
+                    (
+                        (word, int(is_noun), normal_form)
+                        for word, (is_noun, normal_form)
+                        in self._pending.items()
+                    )
+                )
+            self._pending = {}
+
+    def rebuild(self, analyze_word):
+        """Analyze every stored word form again,
+        e.g. after morphological dictionaries are updated.
+
+        Args:
+            analyze_word (callable): word form -> (is_noun, normal_form).
+
+        Returns:
+            (int): number of word forms analyzed.
+
+        """
+        self.flush()
+        with self._lock:
+            words = [
+                row[0] for row in
+                self._connection.execute('SELECT word FROM lemmas')
+            ]
+            with self._connection:
+                self._connection.execute('BEGIN IMMEDIATE')
+                self._connection.execute('DELETE FROM lemmas')
+                self._connection.executemany(
+                    'INSERT INTO lemmas VALUES (?, ?, ?)',
+                    (
+                        (word, int(is_noun), normal_form)
+                        for word, (is_noun, normal_form)
+                        in zip(words, map(analyze_word, words))
+                    )
+                )
+        self.compact()
+        return len(words)
+
+    def compact(self):
+        """Defragment the database and truncate its write-ahead log."""
+        self.flush()
+        with self._lock:
+            self._connection.execute('VACUUM')
+            self._connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+    @property
+    def info(self):
+        """Store statistics.
+
+        Returns:
+            (dict): hits, misses and word forms not written yet.
+
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': hit_rate(self.hits, self.misses),
+            'pending': len(self._pending),
+        }
+
+
+def get_lemma_store(path):
+    """Get LemmaStore of the path shared by the whole process.
+
+    Connections are not shared with forked processes,
+    every process opens its own one.
+
+    Args:
+        path (str): SQLite database file.
+
+    Returns:
+        (LemmaStore)
+
+    """
+    key = (os.getpid(), os.path.abspath(path))
+    with _lemma_stores_lock:
+        lemma_store = _lemma_stores.get(key)
+        if lemma_store is None:
+            lemma_store = _lemma_stores[key] = LemmaStore(path)
+    return lemma_store
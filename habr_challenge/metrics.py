@@ -0,0 +1,191 @@
+import bisect
+import contextlib
+import json
+import threading
+import time
+
+
+__all__ = ['METRICS', 'Metrics']
+
+
+LATENCY_BUCKETS = (
+    .0005, .001, .005, .01, .025, .05, .1, .25, .5, 1., 2.5, 5., 10.
+)
+SIZE_BUCKETS = (0, 1, 5, 10, 20, 30, 50, 100)
+
+
+class Histogram:
+    """Distribution of observed values over fixed buckets.
+
+    Attributes:
+        buckets (tuple): sorted buckets upper bounds.
+        counts ([int]): observations in each bucket, the last one
+            counts values above all the bounds.
+        sum (float): sum of observed values.
+        count (int): number of observations.
+
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        if self.buckets != other.buckets:
+            raise ValueError('Can not merge histograms of different buckets')
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.sum += other.sum
+        self.count += other.count
+
+    def to_dict(self):
+        return {
+            'buckets': list(self.buckets),
+            'counts': list(self.counts),
+            'sum': self.sum,
+            'count': self.count,
+        }
+
+
+class Metrics:
+    """Registry of the pipeline metrics.
+
+    Attributes:
+        _counters (dict): name -> monotonically increasing value.
+        _gauges (dict): name -> last set value.
+        _histograms (dict): name -> Histogram.
+
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counters = {}
+            self._gauges = {}
+            self._histograms = {}
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def set_gauges(self, prefix, stats):
+        """Set gauges from numeric values of a nested stats dict.
+
+        Args:
+            prefix (str): gauges name prefix.
+            stats (dict): e.g. ParserDataCollector.stats.
+
+        """
+        for name, value in stats.items():
+            name = '{0}_{1}'.format(prefix, name)
+            if isinstance(value, dict):
+                self.set_gauges(name, value)
+            elif isinstance(value, (int, float)):
+                self.set_gauge(name, value)
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """Observe execution time of the block in <name>_seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name + '_seconds', time.perf_counter() - started)
+
+    def pop_snapshot(self):
+        """Get counters and histograms collected and reset them.
+
+        Used to pass metrics of a worker process to the parent.
+
+        Returns:
+            (dict, dict): counters and histograms.
+
+        """
+        with self._lock:
+            snapshot = self._counters, self._histograms
+            self._counters, self._histograms = {}, {}
+        return snapshot
+
+    def merge_snapshot(self, snapshot):
+        counters, histograms = snapshot
+        for name, value in counters.items():
+            self.inc(name, value)
+        with self._lock:
+            for name, histogram in histograms.items():
+                if name in self._histograms:
+                    self._histograms[name].merge(histogram)
+                else:
+                    self._histograms[name] = histogram
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+                'histograms': {
+                    name: histogram.to_dict()
+                    for name, histogram in self._histograms.items()
+                },
+            }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2, sort_keys=True)
+
+    def to_prometheus(self, namespace='habr'):
+        """Render metrics in Prometheus text exposition format.
+
+        Args:
+            namespace (str): metrics name prefix.
+
+        Returns:
+            (str)
+
+        """
+        metrics = self.to_dict()
+        lines = []
+        for name, value in sorted(metrics['counters'].items()):
+            name = '{0}_{1}_total'.format(namespace, name)
+            lines.append('# TYPE {0} counter'.format(name))
+            lines.append('{0} {1}'.format(name, value))
+        for name, value in sorted(metrics['gauges'].items()):
+            name = '{0}_{1}'.format(namespace, name)
+            lines.append('# TYPE {0} gauge'.format(name))
+            lines.append('{0} {1}'.format(name, value))
+        for name, histogram in sorted(metrics['histograms'].items()):
+            name = '{0}_{1}'.format(namespace, name)
+            lines.append('# TYPE {0} histogram'.format(name))
+            cumulative_count = 0
+            for bound, count in zip(
+                histogram['buckets'] + ['+Inf'], histogram['counts']
+            ):
+                cumulative_count += count
+                lines.append('{0}_bucket{{le="{1}"}} {2}'.format(
+                    name, bound, cumulative_count
+                ))
+            lines.append('{0}_sum {1}'.format(name, histogram['sum']))
+            lines.append('{0}_count {1}'.format(name, histogram['count']))
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = Metrics()
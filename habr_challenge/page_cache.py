@@ -0,0 +1,209 @@
+import collections
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+from habr_challenge.common import hit_rate
+from habr_challenge.raw_page import DEFAULT_ENCODING, RawPage
+
+
+__all__ = ['PageCache']
+
+
+DEFAULT_MAX_SIZE = 100 * 2 ** 20  # 100 Mb
+DEFAULT_TTL = 60 * 60  # 1 hour
+
+CacheEntry = collections.namedtuple(
+    'CacheEntry', ['url', 'body', 'etag', 'last_modified', 'stored_at']
+)
+
+
+class PageCache:
+    """Persistent cache of crawled webpages.
+
+    Every page is stored in two files named by its url hash:
+    gzip compressed body as it was received and json metadata
+    with its encoding and validators sent back to the server
+    to revalidate stale page.
+
+    Attributes:
+        cache_dir (str): directory to store pages in.
+        max_size (int): max size of compressed pages in bytes,
+            least recently used pages are evicted above it.
+        ttl (float): seconds page is served without revalidation.
+        hits (int): pages served from the cache.
+        revalidated (int): stale pages confirmed by the server.
+        misses (int): pages downloaded.
+        _size (int): current size of compressed pages in bytes.
+
+    """
+
+    BODY_EXT = '.gz'
+    META_EXT = '.json'
+
+    def __init__(self, cache_dir, max_size=DEFAULT_MAX_SIZE, ttl=DEFAULT_TTL):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = self.revalidated = self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(
+            os.path.getsize(path) for path in self._body_paths()
+        )
+
+    def _body_paths(self):
+        return [
+            os.path.join(self.cache_dir, file_name)
+            for file_name in os.listdir(self.cache_dir)
+            if file_name.endswith(self.BODY_EXT)
+        ]
+
+    def _path(self, url):
+        """Get cache files path without extension.
+
+        Args:
+            url (str): cached page url.
+
+        Returns:
+            (str)
+
+        """
+        return os.path.join(
+            self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest()
+        )
+
+    def _write(self, path, data):
+        tmp_path = '{path}.{thread}.tmp'.format(
+            path=path, thread=threading.get_ident()
+        )
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get(self, url):
+        """Get cached page and mark it as recently used.
+
+        Args:
+            url (str): page url.
+
+        Returns:
+            (CacheEntry or None): entry with RawPage body,
+                None if page is not cached.
+
+        """
+        path = self._path(url)
+        try:
+            with open(path + self.META_EXT, encoding='utf-8') as f:
+                meta = json.load(f)
+            with gzip.open(path + self.BODY_EXT, 'rb') as f:
+                body = f.read()
+            os.utime(path + self.BODY_EXT)
+        except (OSError, ValueError):
+            return None
+        # Pages cached without encoding were stored as utf-8 text
+        encoding = meta.pop('encoding', DEFAULT_ENCODING)
+        return CacheEntry(body=RawPage(body, encoding), **meta)
+
+    def count_hit(self):
+        """Count page served from the cache without a request."""
+        with self._lock:
+            self.hits += 1
+
+    def count_miss(self):
+        """Count page downloaded or not available offline."""
+        with self._lock:
+            self.misses += 1
+
+    def is_fresh(self, entry):
+        return time.time() - entry.stored_at < self.ttl
+
+    def set(self, url, body, etag=None, last_modified=None):
+        """Store page in the cache.
+
+        Args:
+            url (str): page url.
+            body (RawPage): page content.
+            etag (str or None): ETag response header.
+            last_modified (str or None): Last-Modified response header.
+
+        """
+        path = self._path(url)
+        encoding = body.encoding
+        body = gzip.compress(body.body)
+        meta = {
+            'url': url,
+            'encoding': encoding,
+            'etag': etag,
+            'last_modified': last_modified,
+            'stored_at': time.time(),
+        }
+
+        with self._lock:
+            try:
+                self._size -= os.path.getsize(path + self.BODY_EXT)
+            except OSError:
+                pass
+            self._write(path + self.BODY_EXT, body)
+            self._write(
+                path + self.META_EXT, json.dumps(meta).encode('utf-8')
+            )
+            self._size += len(body)
+            if self._size > self.max_size:
+                self._evict()
+
+    def touch(self, entry):
+        """Mark stale page as fresh after server revalidation
+        and count it as revalidated.
+
+        Args:
+            entry (CacheEntry): revalidated page.
+
+        """
+        meta = entry._asdict()
+        meta['encoding'] = meta.pop('body').encoding
+        meta['stored_at'] = time.time()
+        with self._lock:
+            self.revalidated += 1
+            self._write(
+                self._path(entry.url) + self.META_EXT,
+                json.dumps(meta).encode('utf-8')
+            )
+
+    def _evict(self):
+        """Remove least recently used pages until cache fits max_size.
+        """
+        for body_path in sorted(self._body_paths(), key=os.path.getmtime):
+            if self._size <= self.max_size:
+                break
+            path = body_path[:-len(self.BODY_EXT)]
+            self._size -= os.path.getsize(body_path)
+            for ext in (self.BODY_EXT, self.META_EXT):
+                try:
+                    os.remove(path + ext)
+                except OSError:
+                    pass
+
+    @property
+    def info(self):
+        """Cache statistics.
+
+        Returns:
+            (dict): hits, revalidated, misses and size in bytes.
+
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'revalidated': self.revalidated,
+                'misses': self.misses,
+                'hit_rate': hit_rate(
+                    self.hits + self.revalidated, self.misses
+                ),
+                'size': self._size,
+                'max_size': self.max_size,
+            }
@@ -1,12 +1,23 @@
-import bs4
 import collections
 
+from habr_challenge.common import SeenSet
+from habr_challenge.metrics import METRICS, SIZE_BUCKETS
 from habr_challenge.parser_data_collector import ParserDataCollector
+from habr_challenge.raw_page import DEFAULT_ENCODING, RawPage
 
 
 ARTICLE_DATA = collections.namedtuple(
-    'ARTICLE_DATA', ['title', 'publication_datetime']
+    'ARTICLE_DATA', ['title', 'publication_datetime', 'url']
 )
+ARTICLE_DATA.__new__.__defaults__ = (None, )
+
+ARTICLE_SELECTORS = (
+    'article', 'article_publication_datetime', 'article_title'
+)
+
+DEFAULT_PARSE_BACKEND = 'html.parser'
+
+_parse_backends = {}
 
 
 def _get_selectors_from_config(site_config, *selector_names):
@@ -34,6 +45,22 @@ def _parse_articles(articles_list, **selectors):
     Args:
         articles_list (list): list of webpages crawled.
 
+    """
+    import bs4
+
+    soup = bs4.BeautifulSoup(articles_list, 'html.parser')
+    return _parse_soup_articles(soup, **selectors)
+
+
+def _parse_soup_articles(soup, **selectors):
+    """Find articles in a bs4 tree.
+
+    Args:
+        soup (bs4.BeautifulSoup): parsed webpage.
+
+    Yields:
+        (ARTICLE_DATA): article parsed.
+
     """
     article_selector = selectors['article']
     article_publication_datetime_selector = selectors[
@@ -41,7 +68,6 @@ def _parse_articles(articles_list, **selectors):
     ]
     article_title_selector = selectors['article_title']
 
-    soup = bs4.BeautifulSoup(articles_list, 'html.parser')
     for article_preview in soup.find_all(
         article_selector.name,
         **article_selector.css_kwargs
@@ -50,45 +76,471 @@ def _parse_articles(articles_list, **selectors):
             article_publication_datetime_selector.name,
             **article_publication_datetime_selector.css_kwargs
         ).text
-        article_title = article_preview.find(
+        article_title_link = article_preview.find(
             article_title_selector.name,
             **article_title_selector.css_kwargs
-        ).text
+        )
 
         article_data = ARTICLE_DATA(
-            article_title, article_publication_datetime
+            article_title_link.text, article_publication_datetime,
+            article_title_link.get('href')
         )
         yield article_data
 
 
-def parse(articles_list_pagination_gen, site_config, user_settings):
+def _get_encoding_from_config(site_config):
+    """Encoding of the site pages declaring none.
+
+    Args:
+        site_config (SiteConfig): config with optional "encoding".
+
+    Returns:
+        (str)
+
+    """
+    return getattr(site_config, 'encoding', None) or DEFAULT_ENCODING
+
+
+class SoupParseBackend:
+    """Parse a whole webpage with bs4 'html.parser'.
+
+    RawPage is decoded with its declared encoding into one str,
+    bs4 does not have to detect it. bs4 parses whole documents,
+    so the decoded page is kept in memory along with the body.
+
+    Attributes:
+        _selectors ({str: collections.namedtuple(str, dict)}):
+            selectors in a format useful for bs4 parsing.
+        _encoding (str): encoding of pages declaring none.
+
+    """
+
+    def __init__(self, site_config):
+        self._selectors = _get_selectors_from_config(
+            site_config, *ARTICLE_SELECTORS
+        )
+        self._encoding = _get_encoding_from_config(site_config)
+
+    def _make_soup(self, articles_list):
+        import bs4
+
+        return bs4.BeautifulSoup(articles_list, 'html.parser')
+
+    def parse_articles(self, articles_list):
+        """Parse articles from a webpage.
+
+        Args:
+            articles_list (str or RawPage): webpage crawled.
+
+        Yields:
+            (ARTICLE_DATA): article parsed.
+
+        """
+        if isinstance(articles_list, RawPage):
+            articles_list = articles_list.text(self._encoding)
+        return _parse_soup_articles(
+            self._make_soup(articles_list), **self._selectors
+        )
+
+
+class StrainedSoupParseBackend(SoupParseBackend):
+    """Build bs4 tree only for tags named as the article selector.
+
+    Tree outside the articles is skipped by the bs4.SoupStrainer,
+    articles are found in a restricted tree as usual.
+
+    """
+
+    def __init__(self, site_config):
+        import bs4
+
+        super().__init__(site_config)
+        self._strainer = bs4.SoupStrainer(self._selectors['article'].name)
+
+    def _make_soup(self, articles_list):
+        import bs4
+
+        return bs4.BeautifulSoup(
+            articles_list, 'html.parser', parse_only=self._strainer
+        )
+
+
+class LxmlParseBackend:
+    """Parse webpage with lxml and find articles with XPath.
+
+    RawPage body is passed to the lxml parser as is,
+    it decodes it with the declared encoding.
+
+    Note:
+        lxml is an optional dependency.
+
+    Attributes:
+        _encoding (str): encoding of pages declaring none.
+        _article_xpath (lxml.etree.XPath): finds articles in a webpage.
+        _article_data_xpaths ([lxml.etree.XPath]): find ARTICLE_DATA
+            fields in the article.
+
+    """
+
+    def __init__(self, site_config):
+        try:
+            from lxml import etree, html
+        except ImportError:  # pragma: no cover
+            raise ImportError(
+                'Please install lxml to use "lxml" parser backend'
+            )
+        self._html = html
+        self._encoding = _get_encoding_from_config(site_config)
+
+        article_selector, *article_data_selectors = (
+            getattr(site_config, selector_name)
+            for selector_name in ARTICLE_SELECTORS
+        )
+        self._article_xpath = etree.XPath(
+            '//' + self._selector_to_xpath(article_selector)
+        )
+        self._article_data_xpaths = [
+            etree.XPath('.//' + self._selector_to_xpath(selector))
+            for selector in article_data_selectors
+        ]
+
+    @staticmethod
+    def _selector_to_xpath(selector):
+        """Build XPath matching a Selector as bs4 does.
+
+        Single class matches any of the element classes,
+        several classes match the whole class attribute.
+
+        Args:
+            selector (Selector): selector to convert.
+
+        Returns:
+            (str): XPath step.
+
+        """
+        predicates = []
+        if selector.class_ is not None:
+            if ' ' in selector.class_.strip():
+                predicates.append('normalize-space(@class)="{0}"'.format(
+                    ' '.join(selector.class_.split())
+                ))
+            else:
+                predicates.append(
+                    'contains('
+                    'concat(" ", normalize-space(@class), " "), " {0} "'
+                    ')'.format(selector.class_.strip())
+                )
+        if selector.id_ is not None:
+            predicates.append('@id="{0}"'.format(selector.id_))
+
+        return selector.name + ''.join(
+            '[{0}]'.format(predicate) for predicate in predicates
+        )
+
+    def _make_tree(self, articles_list):
+        if not isinstance(articles_list, RawPage):
+            return self._html.document_fromstring(articles_list)
+        return self._html.document_fromstring(
+            articles_list.body, parser=self._html.HTMLParser(
+                encoding=articles_list.encoding or self._encoding
+            )
+        )
+
+    def parse_articles(self, articles_list):
+        """Parse articles from a webpage.
+
+        Args:
+            articles_list (str or RawPage): webpage crawled.
+
+        Yields:
+            (ARTICLE_DATA): article parsed.
+
+        """
+        tree = self._make_tree(articles_list)
+        publication_datetime_xpath, title_xpath = self._article_data_xpaths
+        for article_preview in self._article_xpath(tree):
+            article_publication_datetime = publication_datetime_xpath(
+                article_preview
+            )[0].text_content()
+            article_title_link = title_xpath(article_preview)[0]
+
+            yield ARTICLE_DATA(
+                article_title_link.text_content(),
+                article_publication_datetime,
+                article_title_link.get('href')
+            )
+
+
+PARSE_BACKENDS = {
+    'html.parser': SoupParseBackend,
+    'strainer': StrainedSoupParseBackend,
+    'lxml': LxmlParseBackend,
+}
+
+
+def get_article_id(article_data):
+    """Identify parsed article.
+
+    Args:
+        article_data (ARTICLE_DATA): article parsed.
+
+    Returns:
+        (str): article url or its title and publication datetime
+            if url is unknown.
+
+    """
+    return article_data.url or '{0}\n{1}'.format(
+        article_data.title, article_data.publication_datetime
+    )
+
+
+def get_parse_backend(site_config, backend_name=DEFAULT_PARSE_BACKEND):
+    """Get parse backend with selectors compiled for the site.
+
+    Backend is created once per site selectors and encoding,
+    so SiteConfig instances made for every request share it
+    and a site redefined by SiteConfig.load gets a new one.
+
+    Args:
+        site_config (SiteConfig): config of the site to be parsed.
+        backend_name (str): one of the PARSE_BACKENDS.
+
+    Returns:
+        (SoupParseBackend, StrainedSoupParseBackend or LxmlParseBackend)
+
+    """
+    selectors = (
+        getattr(site_config, selector_name)
+        for selector_name in ARTICLE_SELECTORS
+    )
+    key = (backend_name, _get_encoding_from_config(site_config)) + tuple(
+        (selector.name, selector.class_, selector.id_)
+        for selector in selectors
+    )
+    parse_backend = _parse_backends.get(key)
+    if parse_backend is None:
+        parse_backend = _parse_backends.setdefault(
+            key, PARSE_BACKENDS[backend_name](site_config)
+        )
+    return parse_backend
+
+
+def _filter_new_articles(articles_data, seen_articles, state_store=None):
+    """Filter articles not seen in this run and unknown by the state store.
+
+    Feed shifts while it is paginated, so an article
+    may be met on two pages, it is counted once.
+
+    Args:
+        articles_data (list): ARTICLE_DATA parsed.
+        seen_articles (SeenSet): ids of articles met in this run,
+            updated inplace.
+        state_store (StateStore or None): state of incremental runs.
+
+    Returns:
+        (list, int): new ARTICLE_DATA and the number of articles
+            skipped as known by the state store.
+
+    """
+    new_articles_data = []
+    duplicates = known = 0
+    for article_data in articles_data:
+        article_id = get_article_id(article_data)
+        if not seen_articles.add(article_id):
+            duplicates += 1
+            continue
+        if state_store is not None and state_store.is_known(article_id):
+            known += 1
+            continue
+        new_articles_data.append(article_data)
+    if duplicates:
+        METRICS.inc('parser_duplicate_articles', duplicates)
+    return new_articles_data, known
+
+
+def parse_page(parse_backend, articles_list):
+    """Parse articles of one webpage counting parser metrics.
+
+    Pages of the feed are parsed by it one by one,
+    e.g. in executor threads, and filtered by PaginationFilter.
+
+    Args:
+        parse_backend (SoupParseBackend, StrainedSoupParseBackend
+            or LxmlParseBackend): backend to parse webpages with.
+        articles_list (str or RawPage): webpage crawled.
+
+    Returns:
+        (list): ARTICLE_DATA parsed.
+
+    """
+    with METRICS.timer('parser_page'):
+        articles_data = list(parse_backend.parse_articles(articles_list))
+    METRICS.inc('parser_pages')
+    METRICS.inc('parser_articles', len(articles_data))
+    METRICS.observe(
+        'parser_articles_per_page', len(articles_data), SIZE_BUCKETS
+    )
+    return articles_data
+
+
+class PaginationFilter:
+    """Filter articles of parsed pages and tell where pagination stops.
+
+    Articles met on previous pages and known by the state_store
+    are skipped. Pagination stops on the page without new articles
+    and with articles known by the state_store unless crawl is resumed,
+    a page of the articles met on previous pages only is skipped.
+    Pagination stops at the end of the feed: on a page without
+    articles or with the same articles as an earlier page,
+    e.g. the last one served again for pages beyond it.
+
+    It keeps state of one pagination, so a filter is made for every
+    crawl, e.g. by parse and aio.aparse.
+
+    Attributes:
+        state_store (StateStore or None): state of incremental runs.
+        stop_on_end_of_feed (bool): pages come in pagination order,
+            so the end of the feed may be detected.
+        _stop_on_known_page (bool): state_store is not resuming.
+        _seen_articles (SeenSet): ids of articles met in this run.
+        _seen_pages (SeenSet): article ids of the pages met.
+
+    """
+
+    def __init__(self, state_store=None, stop_on_end_of_feed=True):
+        self.state_store = state_store
+        self.stop_on_end_of_feed = stop_on_end_of_feed
+        self._stop_on_known_page = state_store is not None and \
+            not state_store.resuming
+        self._seen_articles = SeenSet()
+        self._seen_pages = SeenSet()
+
+    def filter(self, articles_data):
+        """Filter new articles of the next page.
+
+        Args:
+            articles_data (list): ARTICLE_DATA parsed from the page.
+
+        Returns:
+            (list or None): new ARTICLE_DATA,
+                None if pagination should stop.
+
+        """
+        end_of_feed = not articles_data or not self._seen_pages.add(
+            '\n'.join(map(get_article_id, articles_data))
+        )
+        if self.stop_on_end_of_feed and end_of_feed:
+            METRICS.inc('parser_end_of_feed')
+            return None
+
+        new_articles_data, known = _filter_new_articles(
+            articles_data, self._seen_articles, self.state_store
+        )
+        if self._stop_on_known_page and known and not new_articles_data:
+            return None
+        return new_articles_data
+
+
+def _parse_pages(
+    articles_list_pagination_gen, parse_backend, state_store=None,
+    stop_on_end_of_feed=True
+):
+    """Parse crawled webpages filtered by PaginationFilter.
+
+    Args:
+        articles_list_pagination_gen (genirator):
+            generator of page numbers and webpages
+            of articles list paginated.
+        parse_backend (SoupParseBackend, StrainedSoupParseBackend
+            or LxmlParseBackend): backend to parse webpages with.
+        state_store (StateStore or None): state of incremental runs.
+        stop_on_end_of_feed (bool): pages come in pagination order,
+            so the end of the feed may be detected.
+
+    Yields:
+        (int, list): page number and new ARTICLE_DATA parsed from it.
+
+    """
+    pagination_filter = PaginationFilter(state_store, stop_on_end_of_feed)
+
+    for page, articles_list in articles_list_pagination_gen:
+        new_articles_data = pagination_filter.filter(
+            parse_page(parse_backend, articles_list)
+        )
+        if new_articles_data is None:
+            if hasattr(articles_list_pagination_gen, 'close'):
+                articles_list_pagination_gen.close()
+            return
+        yield page, new_articles_data
+
+
+def parse(
+    articles_list_pagination_gen, site_config, user_settings,
+    parser_data_collector=None, state_store=None, on_page_collected=None
+):
     """Parser interface to parse webpages crawled.
 
     Crawler passes crawled web pages to a Parser
     that returns Parser result dictionary.
+    Articles are normalized in a process pool
+    if user_settings.workers > 1.
 
     Args:
         articles_list_pagination_gen (genirator):
-            generator of strings representing artiles list paginated.
+            generator of page numbers and webpages
+            of articles list paginated, e.g. crawler.crawl.
         site_config (SiteConfig):
            get selectors from config
         user_settings (ArgumentParser):
            user arguments passed to the program.
+        parser_data_collector (ParserDataCollector or None):
+           collector to use, new one is created by default.
+        state_store (StateStore or None):
+           count only articles unknown by the store and
+           save collector state into it.
+        on_page_collected (callable or None):
+           called with the page number after every page is collected.
 
     Returns:
         (dict): parsed data dict.
 
     """
-    parser_data_collector = ParserDataCollector(user_settings)
-    site_selectors = _get_selectors_from_config(
+    if parser_data_collector is None:
+        parser_data_collector = ParserDataCollector(user_settings)
+    parse_backend = get_parse_backend(
         site_config,
-        *('article', 'article_publication_datetime', 'article_title')
+        getattr(user_settings, 'parser_backend', DEFAULT_PARSE_BACKEND)
     )
 
-    for articles_list_from_page in articles_list_pagination_gen:
-        for article_data in _parse_articles(
-            articles_list_from_page, **site_selectors
+    if state_store is not None:
+        state_store.load_into(parser_data_collector)
+    pages = collections.deque()
+
+    def page_collected(articles_data):
+        page = pages.popleft()
+        if state_store is not None:
+            state_store.commit_page(
+                page, map(get_article_id, articles_data),
+                parser_data_collector
+            )
+        if on_page_collected is not None:
+            on_page_collected(page)
+
+    def pages_articles():
+        for page, articles_data in _parse_pages(
+            articles_list_pagination_gen, parse_backend, state_store,
+            stop_on_end_of_feed=not getattr(
+                user_settings, 'as_completed', False
+            )
         ):
-            parser_data_collector.collect(article_data)
+            pages.append(page)
+            yield articles_data
+
+    parser_data_collector.collect_batches(
+        pages_articles(), getattr(user_settings, 'workers', 1),
+        on_batch_collected=page_collected
+    )
 
+    if state_store is not None:
+        state_store.complete(parser_data_collector)
     return parser_data_collector.result_dict
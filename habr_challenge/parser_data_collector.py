@@ -1,10 +1,69 @@
 import collections
-import dateparser
 import datetime
-import pymorphy2
-import string
+import functools
+import gzip
+import json
+import os
+import re
+import threading
 
-from habr_challenge.common import coroutine
+from concurrent import futures
+
+from habr_challenge.common import LRUCache, coroutine
+from habr_challenge.compact_store import CompactStore
+from habr_challenge.heavy_hitters import DEFAULT_TOP_N, SpaceSavingCounter
+from habr_challenge.lemma_store import get_lemma_store
+from habr_challenge.metrics import METRICS
+from habr_challenge.publication_datetime import PublicationDatetimeParser
+from habr_challenge.rollups import DATE_FORMAT, WeekRollups
+
+
+DEFAULT_LEMMA_CACHE_SIZE = 50000
+
+RESULT_VERSION = 1
+
+# Words with inner hyphens, e.g. "что-то", punctuation around is dropped
+TITLE_WORD_RE = re.compile(r'\w+(?:-\w+)*')
+
+_morph_analyzer = None
+_morph_analyzer_lock = threading.Lock()
+
+_worker_collector = None
+
+
+def get_morph_analyzer():
+    """Get MorphAnalyzer shared by the whole process.
+
+    Loading pymorphy2 dictionaries is expensive
+    so they are loaded once on the first call,
+    threads calling it at once wait for the same analyzer.
+
+    Returns:
+        (pymorphy2.MorphAnalyzer): morphological analyzer.
+
+    """
+    global _morph_analyzer
+    if _morph_analyzer is None:
+        with _morph_analyzer_lock:
+            if _morph_analyzer is None:
+                import pymorphy2
+
+                _morph_analyzer = pymorphy2.MorphAnalyzer()
+    return _morph_analyzer
+
+
+def analyze_word(word):
+    """Get morphological analysis of a word form.
+
+    Args:
+        word (str): word form as it is met in a title.
+
+    Returns:
+        (bool, str) - is word a noun and its normal form.
+
+    """
+    word_morph = get_morph_analyzer().parse(word)[0]
+    return 'NOUN' in word_morph.tag, word_morph.normal_form
 
 
 class ParserDataCollector:
@@ -12,8 +71,20 @@ class ParserDataCollector:
 
     Attributes:
         _parser_result (defaultdict(<class 'collections.Counter'>, {})):
-            container collecting Parser results
+            container collecting Parser results,
+            nouns are counted approximately by SpaceSavingCounter
+            if heavy hitters capacity is set or kept in CompactStore
+            of interned lemmas if compact store is set.
+        _top_n (int): number of most common nouns in results.
+        _rollups (WeekRollups or None): nouns count rolled up
+            for date range queries, built on the first query
+            and updated as nouns are collected since then.
         _parser_data_collector (function): coroutine itself
+        _lemma_cache (LRUCache): word form -> (is_noun, normal_form)
+        _lemma_store (LemmaStore or None): word forms analyzed
+            in previous runs, new ones are saved by save_lemmas
+        _datetime_parser (PublicationDatetimeParser):
+            publication datetime parser memoizing parsed strings
 
     """
 
@@ -24,14 +95,70 @@ class ParserDataCollector:
                user arguments passed to the program.
 
         Note:
-            user_settings are not used now.
-            They are needed to make Collector more customable and
-            user friendly in a future.
+            user_settings.lemma_cache_size limits the number of
+            word forms which morphological analysis is cached for.
+            user_settings.lemma_store is SQLite file to keep
+            morphological analysis of word forms in between runs.
+            user_settings.top is a number of nouns shown for a week.
+            user_settings.heavy_hitters_capacity limits the number of
+            nouns counted for a week, 0 means exact count.
+            user_settings.compact_store keeps counts in arrays
+            of interned lemma ids, the lemmas are interned
+            until the collector is reset.
 
         """
-        self._parser_result = collections.defaultdict(collections.Counter)
+        self._lemma_cache = LRUCache(getattr(
+            user_settings, 'lemma_cache_size', DEFAULT_LEMMA_CACHE_SIZE
+        ))
+        lemma_store_path = getattr(user_settings, 'lemma_store', None)
+        self._lemma_store = None
+        if lemma_store_path:
+            self._lemma_store = get_lemma_store(lemma_store_path)
+        self._datetime_parser = PublicationDatetimeParser()
+        self.reset(user_settings)
         self._parser_data_collector = self._collect()
 
+    def reset(self, user_settings=None):
+        """Forget nouns collected, keep analyzed words and dates cached.
+
+        Lets a long-running process reuse warm collector
+        for the next report.
+
+        Args:
+            user_settings (ArgumentParser):
+               user arguments of the next report,
+               lemma_cache_size and lemma_store are not changed.
+
+        """
+        self._user_settings = user_settings
+        self._top_n = getattr(user_settings, 'top', DEFAULT_TOP_N)
+        self._rollups = None
+
+        heavy_hitters_capacity = getattr(
+            user_settings, 'heavy_hitters_capacity', 0
+        )
+        if getattr(user_settings, 'compact_store', False):
+            if heavy_hitters_capacity > 0:
+                raise ValueError(
+                    'Compact store counts nouns exactly, '
+                    'heavy hitters capacity can not be set'
+                )
+            self._parser_result = CompactStore()
+        elif heavy_hitters_capacity > 0:
+            self._parser_result = collections.defaultdict(functools.partial(
+                SpaceSavingCounter, heavy_hitters_capacity, self._top_n
+            ))
+        else:
+            self._parser_result = collections.defaultdict(
+                collections.Counter
+            )
+
+    def warm_up(self):
+        """Load morphology dictionaries and dates parser in advance.
+        """
+        get_morph_analyzer()
+        self._datetime_parser.warm_up()
+
     def _normalize_publication_datetime(self, article_publication_datetime):
         """Normalize article publication datetime.
 
@@ -45,7 +172,9 @@ class ParserDataCollector:
             (str, str) - formatted dates of week start and end.
 
         """
-        datetime_parsed = dateparser.parse(article_publication_datetime)
+        datetime_parsed = self._datetime_parser.parse(
+            article_publication_datetime
+        )
         week_start = datetime_parsed - datetime.timedelta(
             days=datetime_parsed.weekday()
         )
@@ -56,14 +185,90 @@ class ParserDataCollector:
             week_end.strftime('%d-%m-%Y')
         )
 
-    def _normalize_title(self, article_title):
-        """Normalize article title.
+    def _analyze_words(self, words):
+        """Get morphological analysis of unique word forms.
+
+        Every word form is looked up in the cache, then word forms
+        missed are looked up in the lemma store in one query,
+        the rest is analyzed at most once however many times it is met.
+
+        Args:
+            words (iterable): word forms as they are met in titles.
+
+        Returns:
+            (dict): word form -> (bool, str) - is word a noun
+                and its normal form.
+
+        """
+        lemmas = {}
+        missed = []
+        for word in words:
+            if word in lemmas:
+                continue
+            lemma = self._lemma_cache.get(word)
+            if lemma is None:
+                missed.append(word)
+            lemmas[word] = lemma
+        if not missed:
+            return lemmas
+
+        stored = {}
+        if self._lemma_store is not None:
+            stored = self._lemma_store.get_many(missed)
+        analyzed = {}
+        for word in missed:
+            lemma = stored.get(word)
+            if lemma is None:
+                lemma = analyzed[word] = analyze_word(word)
+            lemmas[word] = self._lemma_cache[word] = lemma
+        if analyzed and self._lemma_store is not None:
+            self._lemma_store.update(analyzed)
+        return lemmas
+
+    def save_lemmas(self):
+        """Write word forms analyzed in this run to the lemma store.
+        """
+        if self._lemma_store is not None:
+            self._lemma_store.flush()
 
-        - lowercase title
-        - remove punctuation marks from title
+    def normalize_titles(self, articles_titles):
+        """Normalize many article titles at once.
+
+        - lowercase titles
+        - split titles into words dropping punctuation marks
+        - analyze every unique word of the batch once
         - filter only nouns
         - normalize nouns
-        - count each noun occurance in the title
+        - count each noun occurance in every title
+
+        Args:
+            articles_titles (iterable): articles titles.
+
+        Returns:
+            ([collections.Counter]) - count each noun occurance
+                in the title, in order of titles.
+
+        """
+        titles_words = [
+            TITLE_WORD_RE.findall(article_title.lower())
+            for article_title in articles_titles
+        ]
+        lemmas = self._analyze_words(
+            word for title_words in titles_words for word in title_words
+        )
+        nouns = {
+            word: normal_form
+            for word, (is_noun, normal_form) in lemmas.items() if is_noun
+        }
+        return [
+            collections.Counter(
+                nouns[word] for word in title_words if word in nouns
+            )
+            for title_words in titles_words
+        ]
+
+    def _normalize_title(self, article_title):
+        """Normalize article title.
 
         Args:
             article_title (str): article title.
@@ -72,17 +277,47 @@ class ParserDataCollector:
             collections.Counter - count each noun occurance in the title.
 
         """
-        morph = pymorphy2.MorphAnalyzer()
-        title_words = article_title.lower().strip(
-            string.punctuation + "«»"
-        ).split(' ')
-        title_morphs = (morph.parse(word)[0] for word in title_words)
-        title_nouns = filter(
-            lambda word_morph: 'NOUN' in word_morph.tag, title_morphs
-        )
-        return collections.Counter(
-            map(lambda noun: noun.normal_form, title_nouns)
-        )
+        return self.normalize_titles([article_title])[0]
+
+    def _normalize(self, article_data):
+        """Normalize parsed article.
+
+        Args:
+            article_data (collections.namedtuple(
+                str:title, str:publication_datetime)
+            ):
+                webpage parsed data.
+
+        Returns:
+            ((str, str), collections.Counter) - week range
+                and nouns count of the article.
+
+        """
+        return self._normalize_batch([article_data])[0]
+
+    def _normalize_batch(self, articles_data):
+        """Normalize batch of parsed articles.
+
+        Args:
+            articles_data (list): list of ARTICLE_DATA.
+
+        Returns:
+            ([((str, str), collections.Counter)]) - week range
+                and nouns count of every article.
+
+        """
+        with METRICS.timer('collector_title'):
+            articles_title_words = self.normalize_titles(
+                article_data.title for article_data in articles_data
+            )
+        with METRICS.timer('collector_publication_datetime'):
+            articles_week_range = [
+                self._normalize_publication_datetime(
+                    article_data.publication_datetime
+                )
+                for article_data in articles_data
+            ]
+        return list(zip(articles_week_range, articles_title_words))
 
     @coroutine
     def _collect(self):
@@ -93,12 +328,22 @@ class ParserDataCollector:
         """
         while True:
             article_data = (yield)
-            article_title_words = self._normalize_title(article_data.title)
-            article_week_range = self._normalize_publication_datetime(
-                article_data.publication_datetime
+            article_week_range, article_title_words = self._normalize(
+                article_data
             )
+            self._count(article_week_range, article_title_words)
+
+    def _count(self, article_week_range, words):
+        """Add nouns of a week to the result and its rollups.
 
-            self._parser_result[article_week_range].update(article_title_words)
+        Args:
+            article_week_range ((str, str)): week range of the nouns.
+            words (iterable or mapping): nouns or noun -> count mapping.
+
+        """
+        self._parser_result[article_week_range].update(words)
+        if self._rollups is not None:
+            self._rollups.add(article_week_range, words)
 
     def collect(self, article_data):
         """Public interface to send data to the coroutine.
@@ -112,11 +357,204 @@ class ParserDataCollector:
         """
         self._parser_data_collector.send(article_data)
 
+    def collect_many(self, articles_data):
+        """Collect batch of parsed articles, e.g. of one webpage.
+
+        Result is the same as if articles were collected one by one,
+        but words met in several titles are analyzed once.
+
+        Args:
+            articles_data (list): list of ARTICLE_DATA.
+
+        """
+        for article_week_range, article_title_words in \
+                self._normalize_batch(articles_data):
+            self._count(article_week_range, article_title_words)
+
+    def merge(self, parser_result):
+        """Merge partial results into the collector.
+
+        Args:
+            parser_result ({(str, str): collections.Counter}):
+                nouns count by week range.
+
+        """
+        for article_week_range, words in parser_result.items():
+            self._count(article_week_range, words)
+
+    def merge_collector(self, parser_data_collector):
+        """Merge results of another collector, e.g. of another site.
+
+        Args:
+            parser_data_collector (ParserDataCollector)
+
+        """
+        self.merge(parser_data_collector._parser_result)
+
+    def to_state(self):
+        """Collector state in a json serializable format.
+
+        Returns:
+            (list): [[week_start, week_end, {noun: count}], ...]
+
+        """
+        return [
+            list(article_week_range) + [dict(words)]
+            for article_week_range, words in self._parser_result.items()
+        ]
+
+    def load_state(self, state):
+        """Merge state dumped by to_state into the collector.
+
+        Args:
+            state (list): [[week_start, week_end, {noun: count}], ...]
+
+        """
+        self.merge(collections.OrderedDict(
+            ((week_start, week_end), collections.Counter(words))
+            for week_start, week_end, words in state
+        ))
+
+    def save(self, path):
+        """Atomically write nouns count to a gzip compressed json file.
+
+        Every noun is written once and referred to by its index,
+        so results of long histories and many shards stay small.
+
+        Args:
+            path (str): file to write, e.g. result of a shard.
+
+        """
+        lemmas = {}
+        weeks = []
+        for article_week_range, words in self._parser_result.items():
+            words = list(words.items())
+            weeks.append(list(article_week_range) + [
+                [lemmas.setdefault(word, len(lemmas)) for word, _ in words],
+                [count for _, count in words],
+            ])
+        result = {
+            'version': RESULT_VERSION,
+            'lemmas': list(lemmas),
+            'weeks': weeks,
+        }
+
+        tmp_path = path + '.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """Merge nouns count written by save into the collector.
+
+        Merge adds counts up, so shards may be loaded
+        in any order and grouping with the same result.
+
+        Args:
+            path (str): file written by save.
+
+        Raises:
+            ValueError: file is written by an unsupported version.
+
+        """
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            result = json.load(f)
+        if result.get('version') != RESULT_VERSION:
+            raise ValueError(
+                'Unsupported result version in {path}'.format(path=path)
+            )
+        lemmas = result['lemmas']
+        parser_result = collections.OrderedDict()
+        for week_start, week_end, ids, counts in result['weeks']:
+            parser_result[week_start, week_end] = collections.Counter(
+                dict(zip((lemmas[i] for i in ids), counts))
+            )
+        self.merge(parser_result)
+
+    def collect_batches(
+        self, articles_data_batches, workers=1, on_batch_collected=None
+    ):
+        """Collect batches of parsed articles.
+
+        Args:
+            articles_data_batches (iterable): lists of ARTICLE_DATA,
+                e.g. articles parsed from one webpage.
+            workers (int): normalize articles in a process pool
+                if workers > 1.
+            on_batch_collected (function or None): called with
+                every batch after it is collected.
+
+        """
+        if workers > 1:
+            return self.collect_in_process_pool(
+                articles_data_batches, workers, on_batch_collected
+            )
+
+        for articles_data in articles_data_batches:
+            self.collect_many(articles_data)
+            if on_batch_collected is not None:
+                on_batch_collected(articles_data)
+
+    def collect_in_process_pool(
+        self, articles_data_batches, workers, on_batch_collected=None
+    ):
+        """Normalize batches of parsed articles in a process pool.
+
+        Partial results are merged in the order batches are sent,
+        so the result is the same as if articles were collected one by one.
+
+        Args:
+            articles_data_batches (iterable): lists of ARTICLE_DATA,
+                e.g. articles parsed from one webpage.
+            workers (int): number of worker processes.
+            on_batch_collected (function or None): called with
+                every batch after its result is merged.
+
+        """
+        def merge_first_pending():
+            articles_data, future = pending.popleft()
+            parser_result, metrics_snapshot, lemmas = future.result()
+            self.merge(parser_result)
+            if self._lemma_store is not None:
+                self._lemma_store.update(lemmas)
+            METRICS.merge_snapshot(metrics_snapshot)
+            if on_batch_collected is not None:
+                on_batch_collected(articles_data)
+
+        with futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = collections.deque()
+            for articles_data in articles_data_batches:
+                pending.append((articles_data, executor.submit(
+                    _collect_batch, self._user_settings, articles_data
+                )))
+                if len(pending) > 2 * workers:
+                    merge_first_pending()
+            while pending:
+                merge_first_pending()
+
+    @property
+    def stats(self):
+        """Collector performance statistics.
+
+        Returns:
+            (dict): statistics of the collector caches.
+
+        """
+        stats = {
+            'lemma_cache': self._lemma_cache.info,
+            'publication_datetime': self._datetime_parser.info,
+        }
+        if self._lemma_store is not None:
+            stats['lemma_store'] = self._lemma_store.info
+        if isinstance(self._parser_result, CompactStore):
+            stats['compact_store'] = self._parser_result.info
+        return stats
+
     @property
     def result_dict(self):
         """ParserDataCollector results in a user defined format.
 
-        Show only 3 most common words for a week interval.
+        Show only top N most common words for a week interval.
 
         Example:
             {
@@ -129,5 +567,104 @@ class ParserDataCollector:
         """
         result = {}
         for k, v in self._parser_result.items():
-            result[k] = ' '.join(map(lambda x: x[0], v.most_common(3)))
+            result[k] = self._format_popular_words(v)
         return result
+
+    def _format_popular_words(self, words):
+        return ' '.join(map(lambda x: x[0], words.most_common(self._top_n)))
+
+    def rollups(self):
+        """Nouns count rolled up for date range queries.
+
+        Rollups are kept up to date after the first call,
+        so repeated queries do not roll up all the weeks again.
+
+        Returns:
+            (WeekRollups)
+
+        """
+        if self._rollups is None:
+            self._rollups = WeekRollups(self._parser_result.items())
+        return self._rollups
+
+    def range_result_dict(self, date_from=None, date_to=None):
+        """Result of a date range in the result_dict format.
+
+        Args:
+            date_from (datetime.date or None): first day of the range,
+                the earliest week if None.
+            date_to (datetime.date or None): last day of the range,
+                the end of the latest week if None.
+
+        Returns:
+            (dict): {(from, to): 'noun1 noun2 noun3'},
+                empty if no week is collected in the range.
+
+        """
+        rollups = self.rollups()
+        if rollups.first_week is None:
+            return {}
+        date_from = date_from or rollups.first_week
+        date_to = date_to or rollups.last_week + datetime.timedelta(days=6)
+        if date_from > date_to:
+            return {}
+        words = rollups.query(date_from, date_to, self._top_n)
+        return {
+            (date_from.strftime(DATE_FORMAT), date_to.strftime(DATE_FORMAT)):
+                ' '.join(word for word, count in words)
+        }
+
+    def week_ranges(self):
+        """Week ranges collected so far, in order they were met.
+
+        Returns:
+            ([(str, str)])
+
+        """
+        return list(self._parser_result)
+
+    def popular_words(self, article_week_range):
+        """Result of one week in the result_dict format.
+
+        Args:
+            article_week_range ((str, str)): collected week range.
+
+        Returns:
+            (str): top N most common nouns separated by spaces.
+
+        """
+        return self._format_popular_words(
+            self._parser_result[article_week_range]
+        )
+
+
+def _collect_batch(user_settings, articles_data):
+    """Normalize batch of parsed articles in a worker process.
+
+    Worker process creates its collector on the first batch,
+    so morphological dictionaries are loaded once per process.
+
+    Args:
+        user_settings (ArgumentParser):
+            user arguments passed to the program.
+        articles_data (list): list of ARTICLE_DATA.
+
+    Returns:
+        ({(str, str): collections.Counter}, (dict, dict), dict):
+            nouns count by week range, worker metrics snapshot
+            and word forms analyzed for the parent lemma store.
+
+    """
+    global _worker_collector
+    if _worker_collector is None:
+        METRICS.reset()  # Drop metrics inherited from the parent process
+        _worker_collector = ParserDataCollector(user_settings)
+
+    parser_result = collections.defaultdict(collections.Counter)
+    for article_week_range, article_title_words in \
+            _worker_collector._normalize_batch(articles_data):
+        parser_result[article_week_range].update(article_title_words)
+    lemmas = {}
+    if _worker_collector._lemma_store is not None:
+        lemmas = _worker_collector._lemma_store.pop_pending()
+    return dict(parser_result), METRICS.pop_snapshot(), lemmas
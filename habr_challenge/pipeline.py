@@ -0,0 +1,175 @@
+import collections
+
+from concurrent import futures
+
+from habr_challenge import crawler, parser
+from habr_challenge.parser_data_collector import ParserDataCollector
+from habr_challenge.report_generator import week_sort_key
+
+
+__all__ = ['WeekStream', 'combine', 'parse_site', 'parse_sites']
+
+
+def parse_site(
+    site_config, user_settings, session, parser_data_collector=None,
+    state_store=None, articles_list_pagination_gen=None,
+    on_page_collected=None
+):
+    """Crawl and parse one site.
+
+    Args:
+        site_config (SiteConfig): config of the site to be crawled.
+        user_settings (ArgumentParser):
+            user arguments passed to the program.
+        session (CrawlerSession): HTTP session to crawl with.
+        parser_data_collector (ParserDataCollector or None):
+            collector to count nouns with, new one by default.
+        state_store (StateStore or None): state of incremental runs.
+        articles_list_pagination_gen (generator or None):
+            pages to parse instead of crawling the site, e.g. replayed.
+        on_page_collected (callable or None):
+            called with the page number after every page is collected.
+
+    Returns:
+        (ParserDataCollector): collector of the site nouns.
+
+    """
+    if parser_data_collector is None:
+        parser_data_collector = ParserDataCollector(user_settings)
+    if articles_list_pagination_gen is None:
+        articles_list_pagination_gen = crawler.crawl(
+            site_config, user_settings, session
+        )
+    parser.parse(
+        articles_list_pagination_gen, site_config, user_settings,
+        parser_data_collector=parser_data_collector,
+        state_store=state_store,
+        on_page_collected=on_page_collected
+    )
+    parser_data_collector.save_lemmas()
+    return parser_data_collector
+
+
+def parse_sites(site_configs, user_settings, session):
+    """Crawl and parse several sites concurrently.
+
+    Every site is crawled in its own thread, the session scheduler
+    keeps connections and requests rate limits of each host.
+
+    Args:
+        site_configs ([SiteConfig]): configs of the sites to be crawled.
+        user_settings (ArgumentParser):
+            user arguments passed to the program.
+        session (CrawlerSession): HTTP session shared by sites.
+
+    Returns:
+        (collections.OrderedDict): site name -> ParserDataCollector,
+            in site_configs order.
+
+    """
+    with futures.ThreadPoolExecutor(
+        max_workers=max(1, len(site_configs))
+    ) as executor:
+        sites_futures = [
+            (site_config.name, executor.submit(
+                parse_site, site_config, user_settings, session
+            ))
+            for site_config in site_configs
+        ]
+        return collections.OrderedDict(
+            (site_name, future.result())
+            for site_name, future in sites_futures
+        )
+
+
+def combine(parser_data_collectors, user_settings=None):
+    """Merge results of several sites into one collector.
+
+    Args:
+        parser_data_collectors ([ParserDataCollector]): sites collectors,
+            ties of the combined counts are broken in their order.
+        user_settings (ArgumentParser or None):
+            user arguments passed to the program.
+
+    Returns:
+        (ParserDataCollector)
+
+    """
+    combined = ParserDataCollector(user_settings)
+    for parser_data_collector in parser_data_collectors:
+        combined.merge_collector(parser_data_collector)
+    return combined
+
+
+class WeekStream:
+    """Write weeks of a collector as soon as they are complete.
+
+    Feed is paginated from the newest articles to the oldest ones,
+    so once every page up to the last one collected is collected,
+    a week newer than the oldest week collected gets no more
+    articles. Pages collected out of order, e.g. as completed,
+    hold the weeks back until the pages before them are collected.
+    Weeks are written newest first.
+
+    Attributes:
+        parser_data_collector (ParserDataCollector): collector streamed.
+        report_writer (ReportWriter): writer of the complete weeks.
+        _next_page (int): first page not collected yet.
+        _collected_pages (set): pages collected after _next_page.
+        _pending (set): weeks collected but not written.
+        _written (set): weeks written.
+
+    """
+
+    def __init__(self, parser_data_collector, report_writer, first_page=1):
+        self.parser_data_collector = parser_data_collector
+        self.report_writer = report_writer
+        self._next_page = first_page
+        self._collected_pages = set()
+        self._pending = set()
+        self._written = set()
+
+    def _write(self, week_ranges):
+        for week_range in sorted(week_ranges, key=week_sort_key, reverse=True):
+            self.report_writer.write_week(
+                week_range,
+                self.parser_data_collector.popular_words(week_range)
+            )
+            self._pending.discard(week_range)
+            self._written.add(week_range)
+        if week_ranges:
+            self.report_writer.flush()
+
+    def _add_pending(self):
+        self._pending.update(
+            week_range
+            for week_range in self.parser_data_collector.week_ranges()
+            if week_range not in self._written
+        )
+
+    def page_collected(self, page):
+        """Write weeks completed by the page, used as on_page_collected.
+
+        Args:
+            page (int): number of the page collected.
+
+        """
+        self._collected_pages.add(page)
+        while self._next_page in self._collected_pages:
+            self._collected_pages.remove(self._next_page)
+            self._next_page += 1
+        if self._collected_pages:
+            return  # Pages before the collected ones may hold newer weeks
+        self._add_pending()
+        if not self._pending:
+            return
+        oldest_week_key = min(map(week_sort_key, self._pending))
+        self._write([
+            week_range for week_range in self._pending
+            if week_sort_key(week_range) > oldest_week_key
+        ])
+
+    def close(self):
+        """Write weeks left after the last page."""
+        self._add_pending()
+        self._write(list(self._pending))
@@ -0,0 +1,174 @@
+import datetime
+import re
+
+from habr_challenge.common import LRUCache
+from habr_challenge.metrics import METRICS
+
+
+MONTHS = {
+    'января': 1,
+    'февраля': 2,
+    'марта': 3,
+    'апреля': 4,
+    'мая': 5,
+    'июня': 6,
+    'июля': 7,
+    'августа': 8,
+    'сентября': 9,
+    'октября': 10,
+    'ноября': 11,
+    'декабря': 12,
+}
+
+RELATIVE_DAYS = {
+    'сегодня': 0,
+    'вчера': 1,
+}
+
+MEMO_SIZE = 4096  # Distinct strings of a feed are mostly minutes of a day
+_MISSING = object()
+
+_TIME_PATTERN = r'(?:\s+в\s+(?P<hour>\d{1,2}):(?P<minute>\d{2}))?'
+
+RELATIVE_DATETIME_RE = re.compile(
+    r'^(?P<day>' + '|'.join(RELATIVE_DAYS) + ')' + _TIME_PATTERN + '$'
+)
+
+ABSOLUTE_DATETIME_RE = re.compile(
+    r'^(?P<day>\d{1,2})\s+(?P<month>' + '|'.join(MONTHS) + ')'
+    r'(?:\s+(?P<year>\d{4}))?(?:\s+г\.?)?' + _TIME_PATTERN + '$'
+)
+
+
+class PublicationDatetimeParser:
+    """Parse publication datetime strings shown in the Habr feed.
+
+    Known Habr formats are matched by precompiled regular expressions,
+    any other string falls back to the slow dateparser.parse.
+
+    Examples of known formats:
+        'сегодня в 12:34', 'вчера в 09:10', '1 января 2010 в 10:00'
+
+    Attributes:
+        fast_path (int): number of strings parsed by the matcher.
+        fallbacks (int): number of strings passed to dateparser.
+        memo_hits (int): number of strings found in the memo.
+        _memo (LRUCache): raw string -> datetime, for absolute dates.
+        _relative_memo (LRUCache): raw string -> datetime,
+            for dates relative to _relative_memo_date.
+
+    """
+
+    def __init__(self, memo_size=MEMO_SIZE):
+        """
+        Args:
+            memo_size (int): max number of strings kept in each memo.
+
+        """
+        self.fast_path = 0
+        self.fallbacks = 0
+        self.memo_hits = 0
+        self._memo = LRUCache(memo_size)
+        self._relative_memo = LRUCache(memo_size)
+        self._relative_memo_date = None
+
+    def warm_up(self):
+        """Load dateparser languages data the fallback needs.
+        """
+        import dateparser
+
+        dateparser.parse('1 января 2010')
+
+    def _match(self, datetime_string, today):
+        """Parse datetime string with the precompiled matchers.
+
+        Args:
+            datetime_string (str): lowercased and stripped datetime.
+            today (datetime.date): date relative days are counted from.
+
+        Returns:
+            (datetime.datetime, bool) or (None, False):
+                parsed datetime and whether it is relative to today.
+
+        """
+        match = RELATIVE_DATETIME_RE.match(datetime_string)
+        if match is not None:
+            date = today - datetime.timedelta(
+                days=RELATIVE_DAYS[match.group('day')]
+            )
+            is_relative = True
+        else:
+            match = ABSOLUTE_DATETIME_RE.match(datetime_string)
+            if match is None:
+                return None, False
+            year = match.group('year')
+            try:
+                date = datetime.date(
+                    int(year) if year else today.year,
+                    MONTHS[match.group('month')],
+                    int(match.group('day'))
+                )
+            except ValueError:
+                return None, False
+            is_relative = year is None
+
+        hour, minute = match.group('hour', 'minute')
+        try:
+            time = datetime.time(int(hour or 0), int(minute or 0))
+        except ValueError:
+            return None, False
+        return datetime.datetime.combine(date, time), is_relative
+
+    def parse(self, article_publication_datetime):
+        """Parse article publication datetime.
+
+        Args:
+            article_publication_datetime (str): crawled publication datetime.
+
+        Returns:
+            (datetime.datetime or None): None if string can not be parsed.
+
+        """
+        today = datetime.date.today()
+        if self._relative_memo_date != today:
+            self._relative_memo.clear()
+            self._relative_memo_date = today
+
+        for memo in (self._memo, self._relative_memo):
+            datetime_parsed = memo.get(article_publication_datetime, _MISSING)
+            if datetime_parsed is not _MISSING:
+                self.memo_hits += 1
+                return datetime_parsed
+
+        datetime_parsed, is_relative = self._match(
+            ' '.join(article_publication_datetime.lower().split()), today
+        )
+        if datetime_parsed is None:
+            import dateparser
+
+            self.fallbacks += 1
+            with METRICS.timer('dateparser_fallback'):
+                datetime_parsed = dateparser.parse(
+                    article_publication_datetime
+                )
+            is_relative = True  # Fallback result may depend on today
+        else:
+            self.fast_path += 1
+
+        memo = self._relative_memo if is_relative else self._memo
+        memo[article_publication_datetime] = datetime_parsed
+        return datetime_parsed
+
+    @property
+    def info(self):
+        """Parser statistics.
+
+        Returns:
+            (dict): fast path, fallback and memo hits counts.
+
+        """
+        return {
+            'fast_path': self.fast_path,
+            'fallbacks': self.fallbacks,
+            'memo_hits': self.memo_hits,
+        }
@@ -0,0 +1,106 @@
+import codecs
+import collections
+import re
+
+
+__all__ = ['RawPage', 'sniff_encoding']
+
+
+DEFAULT_ENCODING = 'utf-8'
+HEAD_SIZE = 1024  # Bytes browsers prescan for the meta charset
+
+CONTENT_TYPE_CHARSET_RE = re.compile(r'charset=["\']?([\w.:-]+)', re.I)
+META_CHARSET_RE = re.compile(
+    rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.I
+)
+
+
+def _lookup_encoding(name):
+    """Normalize encoding name.
+
+    Returns:
+        (str or None): None if encoding is unknown.
+
+    """
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def sniff_encoding(content_type, head):
+    """Find webpage encoding without guessing it from the content.
+
+    Args:
+        content_type (str or None): Content-Type header.
+        head (bytes): beginning of the webpage.
+
+    Returns:
+        (str or None): charset of the header, the meta tag of the head
+            or None if neither declares a known one.
+
+    """
+    match = CONTENT_TYPE_CHARSET_RE.search(content_type or '')
+    if match is not None:
+        encoding = _lookup_encoding(match.group(1))
+        if encoding is not None:
+            return encoding
+    match = META_CHARSET_RE.search(head[:HEAD_SIZE])
+    if match is not None:
+        return _lookup_encoding(str(match.group(1), 'ascii'))
+    return None
+
+
+class RawPage(collections.namedtuple('RawPage', ['body', 'encoding'])):
+    """Webpage body as received, with its declared encoding.
+
+    The whole body is read into memory before it is parsed,
+    it is decoded only by the parse backend: lxml decodes the bytes
+    itself, bs4 backends get them decoded into one str.
+
+    Attributes:
+        body (bytes): webpage body.
+        encoding (str or None): declared charset, None if unknown.
+
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_body(cls, body, content_type=None):
+        """Make page sniffing its encoding.
+
+        Args:
+            body (bytes): webpage body.
+            content_type (str or None): Content-Type header.
+
+        """
+        return cls(body, sniff_encoding(content_type, body[:HEAD_SIZE]))
+
+    @property
+    def nbytes(self):
+        return len(self.body)
+
+    def text(self, default_encoding=DEFAULT_ENCODING):
+        """Decode body.
+
+        Args:
+            default_encoding (str): encoding if the page declares none.
+
+        Returns:
+            (str)
+
+        """
+        return self.body.decode(self.encoding or default_encoding, 'replace')
+
+    def to_utf8(self, default_encoding=DEFAULT_ENCODING):
+        """Body in utf-8, not recoded if it is utf-8 already.
+
+        Returns:
+            (bytes)
+
+        """
+        encoding = self.encoding or _lookup_encoding(default_encoding)
+        if encoding == 'utf-8':
+            return self.body
+        return self.text(default_encoding).encode('utf-8')
@@ -1,9 +1,27 @@
 import collections
+import csv
+import datetime
+import io
+import json
+import struct
+import sys
 
 from habr_challenge.common import cached_property
 
 
-__all__ = ['ReportGenerator']
+__all__ = [
+    'BinaryReportWriter',
+    'CsvReportWriter',
+    'JsonLinesReportWriter',
+    'REPORT_WRITERS',
+    'ReportGenerator',
+    'TableReportWriter',
+    'read_binary_report',
+]
+
+
+BUFFER_SIZE = 2 ** 20  # Output is written in chunks of 1 Mb
+WEEK_DATE_FORMAT = '%d-%m-%Y'
 
 
 ReportTemplate = collections.namedtuple(
@@ -58,7 +76,7 @@ class ReportGenerator:
             self.REPORT_HEADER[1]
         ) + 2  # Note two whitespaces at the left and right
         popular_words_col_width = len(
-            max(self._report_data_dict.values(), key=len)
+            max(self._report_data_dict.values(), key=len, default='')
         ) + 2  # Note two whitespaces at the left and right
 
         return (
@@ -73,10 +91,13 @@ class ReportGenerator:
             self.columns_width
         ) + 3  # Keep in mind 3 column separators
 
-    def _print_boarder(self):
-        print(self.REPORT_TEMPLATE.rows_separator * self.table_width)
+    def _print_boarder(self, file=None):
+        print(
+            self.REPORT_TEMPLATE.rows_separator * self.table_width,
+            file=file
+        )
 
-    def _print_header(self):  # pragma: no cover
+    def _print_header(self, file=None):  # pragma: no cover
         """Print report header.
         """
         header = self.REPORT_TEMPLATE.body.format(
@@ -84,11 +105,11 @@ class ReportGenerator:
             col_width=self.columns_width,
             col_sep=self.REPORT_TEMPLATE.columns_separator
         )
-        self._print_boarder()
-        print(header)
-        self._print_boarder()
+        self._print_boarder(file)
+        print(header, file=file)
+        self._print_boarder(file)
 
-    def _print_body(self):  # pragma: no cover
+    def _print_body(self, file=None):  # pragma: no cover
         """Print report body.
         """
         for (
@@ -99,11 +120,258 @@ class ReportGenerator:
                 col_width=self.columns_width,
                 col_sep=self.REPORT_TEMPLATE.columns_separator
             )
-            print(body)
-        self._print_boarder()
+            print(body, file=file)
+        self._print_boarder(file)
 
-    def print_report(self):  # pragma: no cover
+    def print_report(self, file=None):  # pragma: no cover
         """Public interface to print a report.
+
+        Args:
+            file (file or None): text file to print to, stdout by default.
+
+        """
+        self._print_header(file)
+        self._print_body(file)
+
+
+def week_sort_key(week_range):
+    """Sort key of ('dd-mm-yyyy', 'dd-mm-yyyy') week ranges by date.
+    """
+    week_start = week_range[0]
+    return week_start[6:], week_start[3:5], week_start[:2]
+
+
+def _parse_week_date(week_date):
+    return datetime.datetime.strptime(week_date, WEEK_DATE_FORMAT).date()
+
+
+class ReportWriter:
+    """Write report weeks into a file in large buffered chunks.
+
+    Subclasses encode the header, every week and the footer.
+
+    Attributes:
+        _file (file): binary or text file written.
+        _chunk (bytearray): encoded output not written yet.
+        _close_file (bool): file is opened by the writer.
+
+    """
+
+    binary = False
+
+    def __init__(self, output=None):
         """
-        self._print_header()
-        self._print_body()
+        Args:
+            output (str or None): file path, stdout by default.
+
+        Raises:
+            ValueError: binary report is written into a text stdout.
+
+        """
+        self._chunk = bytearray()
+        self._close_file = output is not None and output != '-'
+        if self._close_file:
+            self._file = open(output, 'wb', buffering=0)
+        else:
+            # Text stdout without buffer, e.g. redirected to StringIO
+            self._file = getattr(sys.stdout, 'buffer', sys.stdout)
+            if self.binary and isinstance(self._file, io.TextIOBase):
+                raise ValueError(
+                    'Binary report can not be written to the text stdout'
+                )
+        self._write(self.encode_header())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def encode_header(self):
+        return b''
+
+    def encode_week(self, week_range, popular_words):
+        raise NotImplementedError
+
+    def encode_footer(self):
+        return b''
+
+    def _write(self, data):
+        self._chunk += data
+        if len(self._chunk) >= BUFFER_SIZE:
+            self.flush()
+
+    def write_week(self, week_range, popular_words):
+        """Write one week as soon as it is aggregated.
+
+        Args:
+            week_range ((str, str)): formatted dates of week start and end.
+            popular_words (str): popular nouns separated by spaces.
+
+        """
+        self._write(self.encode_week(week_range, popular_words))
+
+    def write(self, report_data_dict):
+        """Write report weeks in chronological order.
+
+        Args:
+            report_data_dict (dict): ParserDataCollector.result_dict.
+
+        """
+        for week_range in sorted(report_data_dict, key=week_sort_key):
+            self.write_week(week_range, report_data_dict[week_range])
+
+    def flush(self):
+        if not self._close_file:
+            sys.stdout.flush()  # Keep order with text printed before
+        if isinstance(self._file, io.TextIOBase):
+            self._file.write(self._chunk.decode('utf-8'))
+        else:
+            self._file.write(self._chunk)
+        self._file.flush()
+        self._chunk = bytearray()
+
+    def close(self):
+        if self._file is None:
+            return
+        self._write(self.encode_footer())
+        self.flush()
+        if self._close_file:
+            self._file.close()
+        self._file = None
+
+
+class JsonLinesReportWriter(ReportWriter):
+    """One json object a line:
+    {"week_start": "dd-mm-yyyy", "week_end": "dd-mm-yyyy", "words": [...]}
+    """
+
+    def encode_week(self, week_range, popular_words):
+        return json.dumps({
+            'week_start': week_range[0],
+            'week_end': week_range[1],
+            'words': popular_words.split(),
+        }, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+class CsvReportWriter(ReportWriter):
+    """CSV with week_start, week_end and space separated words columns.
+    """
+
+    def _encode_row(self, row):
+        line = io.StringIO()
+        csv.writer(line).writerow(row)
+        return line.getvalue().encode('utf-8')
+
+    def encode_header(self):
+        return self._encode_row(('week_start', 'week_end', 'words'))
+
+    def encode_week(self, week_range, popular_words):
+        return self._encode_row(week_range + (popular_words,))
+
+
+class BinaryReportWriter(ReportWriter):
+    """Compact binary report read by read_binary_report.
+
+    Format: MAGIC, then a record a week: little-endian uint32 ordinals
+    of week start and end dates, uint32 length of utf-8 encoded
+    space separated words and the words themselves.
+    """
+
+    binary = True
+    MAGIC = b'HABR\x02'
+    RECORD_HEADER = struct.Struct('<III')
+
+    def encode_header(self):
+        return self.MAGIC
+
+    def encode_week(self, week_range, popular_words):
+        words = popular_words.encode('utf-8')
+        return self.RECORD_HEADER.pack(
+            _parse_week_date(week_range[0]).toordinal(),
+            _parse_week_date(week_range[1]).toordinal(),
+            len(words)
+        ) + words
+
+
+def read_binary_report(data):
+    """Read report written by BinaryReportWriter.
+
+    Args:
+        data (bytes): report content.
+
+    Yields:
+        ((str, str), str): week range and popular words.
+
+    Raises:
+        ValueError: data is not a binary report.
+
+    """
+    magic = BinaryReportWriter.MAGIC
+    record_header = BinaryReportWriter.RECORD_HEADER
+    if not data.startswith(magic):
+        raise ValueError('Not a binary report')
+
+    position = len(magic)
+    while position < len(data):
+        week_start, week_end, length = record_header.unpack_from(
+            data, position
+        )
+        position += record_header.size
+        yield (
+            datetime.date.fromordinal(week_start).strftime(WEEK_DATE_FORMAT),
+            datetime.date.fromordinal(week_end).strftime(WEEK_DATE_FORMAT),
+        ), str(data[position:position + length], 'utf-8')
+        position += length
+
+
+class TableReportWriter(ReportWriter):
+    """Text table of fixed width columns written a week at a time.
+
+    Unlike ReportGenerator, columns width does not depend on the data,
+    so weeks are written before all of them are aggregated.
+    Longer popular words break the table alignment, not truncated.
+    """
+
+    DEFAULT_WORDS_WIDTH = 40
+
+    def __init__(self, output=None, words_width=DEFAULT_WORDS_WIDTH):
+        template = ReportGenerator.REPORT_TEMPLATE
+        self._columns_width = (
+            len(ReportGenerator.REPORT_HEADER[0]) + 1,
+            len(ReportGenerator.REPORT_HEADER[1]) + 2,
+            words_width + 2
+        )
+        self._border = (
+            template.rows_separator * (sum(self._columns_width) + 3) + '\n'
+        ).encode('utf-8')
+        super().__init__(output)
+
+    def _encode_row(self, columns):
+        template = ReportGenerator.REPORT_TEMPLATE
+        return (template.body.format(
+            col_data=columns,
+            col_width=self._columns_width,
+            col_sep=template.columns_separator
+        ) + '\n').encode('utf-8')
+
+    def encode_header(self):
+        return b''.join((
+            self._border,
+            self._encode_row(ReportGenerator.REPORT_HEADER),
+            self._border,
+        ))
+
+    def encode_week(self, week_range, popular_words):
+        return self._encode_row(week_range + (popular_words,))
+
+    def encode_footer(self):
+        return self._border
+
+
+REPORT_WRITERS = {
+    'binary': BinaryReportWriter,
+    'csv': CsvReportWriter,
+    'jsonl': JsonLinesReportWriter,
+    'table': TableReportWriter,
+}
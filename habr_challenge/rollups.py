@@ -0,0 +1,243 @@
+import collections
+import datetime
+
+from habr_challenge.heavy_hitters import DEFAULT_TOP_N
+
+
+__all__ = ['WeekRollups', 'parse_date']
+
+
+DATE_FORMAT = '%d-%m-%Y'
+LEVELS = ('year', 'quarter', 'month', 'week')
+
+
+def parse_date(date_string):
+    """Parse date in the week ranges format.
+
+    Args:
+        date_string (str): e.g. '28-12-2009'.
+
+    Returns:
+        (datetime.date)
+
+    """
+    return datetime.datetime.strptime(date_string, DATE_FORMAT).date()
+
+
+def _quarter(date):
+    return (date.month - 1) // 3
+
+
+def _bucket_key(level, date):
+    """Key of the level bucket the date belongs to."""
+    if level == 'year':
+        return date.year
+    if level == 'quarter':
+        return date.year, _quarter(date)
+    if level == 'month':
+        return date.year, date.month
+    return date
+
+
+def _bucket_bounds(level, date):
+    """First and last day of the level bucket the date belongs to.
+
+    Returns:
+        (datetime.date, datetime.date)
+
+    """
+    if level == 'year':
+        first_day = date.replace(month=1, day=1)
+        next_first_day = first_day.replace(year=date.year + 1)
+    elif level == 'quarter':
+        first_day = date.replace(month=_quarter(date) * 3 + 1, day=1)
+        next_first_day = _add_months(first_day, 3)
+    else:
+        first_day = date.replace(day=1)
+        next_first_day = _add_months(first_day, 1)
+    return first_day, next_first_day - datetime.timedelta(days=1)
+
+
+def _add_months(first_day, months):
+    year, month = divmod(first_day.month - 1 + months, 12)
+    return first_day.replace(year=first_day.year + year, month=month + 1)
+
+
+class WeekRollups:
+    """Nouns count of weeks rolled up into months, quarters and years.
+
+    A week belongs to the month, quarter and year of its first day,
+    so a date range selects weeks started within it.
+    Years are rolled up further into spans of 2 ** k years
+    aligned to multiples of 2 ** k, like nodes of a segment tree.
+    Range query merges whole spans, years, quarters and months inside
+    the range and weeks at its ends only: at most 20 buckets
+    and two per span level, O(log n) buckets of n years.
+
+    Spans are counted when a query needs them first
+    and are kept up to date by add.
+
+    Attributes:
+        _buckets (dict): level -> {bucket key: collections.Counter}.
+        _spans (dict): (k, year >> k) -> collections.Counter
+            of years span for k > 0.
+        _span_levels (int): largest k of the spans counted.
+        _week_starts (dict): formatted week start -> datetime.date.
+
+    """
+
+    def __init__(self, weeks_words=()):
+        """
+        Args:
+            weeks_words (iterable): ((str, str), mapping of noun to count)
+                pairs, e.g. ParserDataCollector result items.
+
+        """
+        self._buckets = {level: {} for level in LEVELS}
+        self._spans = {}
+        self._span_levels = 0
+        self._week_starts = {}
+        for week_range, words in weeks_words:
+            self.add(week_range, words)
+
+    def add(self, week_range, words):
+        """Count nouns of a week in all the levels.
+
+        Args:
+            week_range ((str, str)): formatted dates of week start and end.
+            words (iterable or mapping): nouns or noun -> count mapping,
+                e.g. collections.Counter.
+
+        """
+        week_start = self._week_starts.get(week_range[0])
+        if week_start is None:
+            week_start = self._week_starts[week_range[0]] = \
+                parse_date(week_range[0])
+        if hasattr(words, 'items'):
+            words = dict(words.items())
+        for level in LEVELS:
+            buckets = self._buckets[level]
+            key = _bucket_key(level, week_start)
+            if key not in buckets:
+                buckets[key] = collections.Counter()
+            buckets[key].update(words)
+        for k in range(1, self._span_levels + 1):
+            span = self._spans.get((k, week_start.year >> k))
+            if span is not None:
+                span.update(words)
+
+    def _span(self, k, index):
+        """Count of years span merged from its halves.
+
+        Args:
+            k (int): span of 2 ** k years.
+            index (int): span of years from index * 2 ** k.
+
+        Returns:
+            (collections.Counter or None): None if the span has no weeks.
+
+        """
+        if k == 0:
+            return self._buckets['year'].get(index)
+        span = self._spans.get((k, index))
+        if span is None:
+            halves = [
+                half for half in (
+                    self._span(k - 1, 2 * index),
+                    self._span(k - 1, 2 * index + 1)
+                ) if half is not None
+            ]
+            if not halves:
+                return None
+            span = self._spans[k, index] = collections.Counter()
+            for half in halves:
+                span.update(half)
+            self._span_levels = max(self._span_levels, k)
+        return span
+
+    @property
+    def first_week(self):
+        """Start of the earliest week, None if there are no weeks."""
+        return min(self._buckets['week'], default=None)
+
+    @property
+    def last_week(self):
+        """Start of the latest week, None if there are no weeks."""
+        return max(self._buckets['week'], default=None)
+
+    def buckets(self, date_from, date_to):
+        """Split date range into the largest buckets.
+
+        Args:
+            date_from (datetime.date): first day of the range.
+            date_to (datetime.date): last day of the range.
+
+        Returns:
+            ([(str, key)]): level and bucket key pairs
+                covering the weeks started in the range,
+                'years' level key is (k, year >> k) of 2 ** k years.
+
+        """
+        buckets = []
+        day = datetime.timedelta(days=1)
+        last_full_year = date_to.year - (
+            (date_to.month, date_to.day) != (12, 31)
+        )
+        cursor = date_from
+        while cursor <= date_to:
+            if (cursor.month, cursor.day) == (1, 1):
+                k = 0
+                while cursor.year % 2 ** (k + 1) == 0 and \
+                        cursor.year + 2 ** (k + 1) - 1 <= last_full_year:
+                    k += 1
+                if k:
+                    buckets.append(('years', (k, cursor.year >> k)))
+                    cursor = cursor.replace(year=cursor.year + 2 ** k)
+                    continue
+            for level in LEVELS[:-1]:
+                first_day, last_day = _bucket_bounds(level, cursor)
+                if first_day == cursor and last_day <= date_to:
+                    buckets.append((level, _bucket_key(level, cursor)))
+                    cursor = last_day + day
+                    break
+            else:
+                # Step to the next week start or the next month,
+                # whichever is closer, so months stay aligned
+                next_month = _bucket_bounds('month', cursor)[1] + day
+                if cursor.weekday() == 0:
+                    buckets.append(('week', cursor))
+                    cursor = min(cursor + 7 * day, next_month)
+                else:
+                    cursor = min(
+                        cursor + (7 - cursor.weekday()) * day, next_month
+                    )
+        return buckets
+
+    def query(self, date_from=None, date_to=None, top=DEFAULT_TOP_N):
+        """Most common nouns of weeks started in the date range.
+
+        Args:
+            date_from (datetime.date or None): first day of the range,
+                the earliest week if None.
+            date_to (datetime.date or None): last day of the range,
+                the latest week if None.
+            top (int or None): number of nouns, all if None.
+
+        Returns:
+            ([(str, int)]): nouns and their counts.
+
+        """
+        if self.first_week is None:
+            return []
+        date_from = date_from or self.first_week
+        date_to = date_to or self.last_week
+
+        words = collections.Counter()
+        for level, key in self.buckets(date_from, date_to):
+            if level == 'years':
+                bucket = self._span(*key)
+            else:
+                bucket = self._buckets[level].get(key)
+            if bucket is not None:
+                words.update(bucket)
+        return words.most_common(top)
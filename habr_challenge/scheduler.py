@@ -0,0 +1,99 @@
+import contextlib
+import threading
+import time
+import urllib.parse
+
+from habr_challenge.metrics import METRICS
+
+
+__all__ = ['HostScheduler']
+
+
+DEFAULT_HOST_CONNECTIONS = 4
+DEFAULT_HOST_RPS = 0.  # Unlimited
+
+
+class RateLimiter:
+    """Space requests evenly to send no more than rps requests a second.
+
+    Attributes:
+        interval (float): min seconds between two requests.
+        _next_slot (float): time the next request may be sent at.
+
+    """
+
+    def __init__(self, rps):
+        self.interval = 1. / rps if rps > 0 else 0.
+        self._next_slot = 0.
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent.
+
+        Returns:
+            (float): seconds waited.
+
+        """
+        if not self.interval:
+            return 0.
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class HostScheduler:
+    """Limit connections and request rate to every host separately.
+
+    Requests to different hosts do not wait for each other,
+    so several sites may be crawled concurrently through one session.
+
+    Attributes:
+        max_connections (int): max requests in flight to one host.
+        max_rps (float): max requests a second to one host, 0 is unlimited.
+        _hosts (dict): host -> (threading.BoundedSemaphore, RateLimiter).
+
+    """
+
+    def __init__(
+        self,
+        max_connections=DEFAULT_HOST_CONNECTIONS,
+        max_rps=DEFAULT_HOST_RPS
+    ):
+        self.max_connections = max_connections
+        self.max_rps = max_rps
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host_limits(self, host):
+        with self._lock:
+            limits = self._hosts.get(host)
+            if limits is None:
+                limits = self._hosts[host] = (
+                    threading.BoundedSemaphore(self.max_connections),
+                    RateLimiter(self.max_rps)
+                )
+        return limits
+
+    @contextlib.contextmanager
+    def slot(self, url):
+        """Hold a connection slot of the url host for the block.
+
+        Args:
+            url (str): url to be requested.
+
+        """
+        connections, rate_limiter = self._host_limits(
+            urllib.parse.urlsplit(url).netloc
+        )
+        started = time.perf_counter()
+        with connections:
+            rate_limiter.acquire()
+            METRICS.observe(
+                'scheduler_wait_seconds', time.perf_counter() - started
+            )
+            yield
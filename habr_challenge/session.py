@@ -0,0 +1,270 @@
+import contextlib
+
+from habr_challenge.metrics import METRICS
+from habr_challenge.page_cache import DEFAULT_MAX_SIZE, DEFAULT_TTL, PageCache
+from habr_challenge.raw_page import RawPage
+from habr_challenge.scheduler import DEFAULT_HOST_RPS, HostScheduler
+
+
+__all__ = ['CrawlerSession', 'REQUEST_HEADERS']
+
+
+REQUEST_HEADERS = {
+    'User-Agent': ("Mozilla/5.0"
+                   "(Macintosh; Intel Mac OS X 10_10_1)"
+                   "AppleWebKit/537.36"
+                   "(KHTML, like Gecko)"
+                   "Chrome/39.0.2171.95"
+                   "Safari/537.36"),
+}
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.
+DEFAULT_READ_TIMEOUT = 30.
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = .5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CrawlerSession:
+    """HTTP session shared by all crawl modes.
+
+    Connections are kept alive in per-host pools, failed requests
+    are retried with exponential backoff.
+    Pages may be served from the persistent PageCache.
+
+    Attributes:
+        timeout ((float, float)): connect and read timeouts in seconds.
+        page_cache (PageCache or None): cache of crawled pages.
+        offline (bool): serve pages only from the page_cache.
+        scheduler (HostScheduler or None): per host limits of requests.
+        _session (requests.Session): pooled session.
+
+    """
+
+    def __init__(
+        self,
+        pool_size=DEFAULT_POOL_SIZE,
+        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=DEFAULT_READ_TIMEOUT,
+        retries=DEFAULT_RETRIES,
+        backoff_factor=DEFAULT_BACKOFF_FACTOR,
+        page_cache=None,
+        offline=False,
+        scheduler=None
+    ):
+        """
+        Args:
+            pool_size (int): max number of connections kept per host.
+            connect_timeout (float): connect timeout in seconds.
+            read_timeout (float): read timeout in seconds.
+            retries (int): how many times to retry a request
+                failed by connection error, 429 or 5xx response.
+            backoff_factor (float): sleep backoff_factor * 2 ** retry
+                seconds between retries.
+            page_cache (PageCache or None): cache of crawled pages.
+            offline (bool): do not send requests,
+                serve pages only from the page_cache.
+            scheduler (HostScheduler or None): limits of connections
+                and requests rate to every host.
+
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.page_cache = page_cache
+        self.offline = offline
+        self.scheduler = scheduler
+
+        import requests
+
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.request import ACCEPT_ENCODING
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_maxsize=pool_size, max_retries=retry
+        )
+
+        self._session = requests.Session()
+        self._session.headers.update(REQUEST_HEADERS)
+        # gzip and deflate, br is added if brotli package is installed
+        self._session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    @classmethod
+    def from_user_settings(cls, user_settings):
+        """Create session configured by user arguments.
+
+        Args:
+            user_settings (ArgumentParser):
+                user arguments passed to the program.
+
+        Returns:
+            (CrawlerSession)
+
+        """
+        page_cache = None
+        cache_dir = getattr(user_settings, 'cache_dir', None)
+        if cache_dir:
+            cache_max_size_mb = getattr(
+                user_settings, 'cache_max_size', DEFAULT_MAX_SIZE >> 20
+            )
+            page_cache = PageCache(
+                cache_dir,
+                max_size=cache_max_size_mb << 20,
+                ttl=getattr(user_settings, 'cache_ttl', DEFAULT_TTL)
+            )
+
+        concurrency = getattr(user_settings, 'concurrency', 1)
+        scheduler = HostScheduler(
+            max_connections=getattr(
+                user_settings, 'host_connections', None
+            ) or concurrency,
+            max_rps=getattr(user_settings, 'host_rps', DEFAULT_HOST_RPS)
+        )
+
+        return cls(
+            pool_size=max(DEFAULT_POOL_SIZE, concurrency),
+            connect_timeout=getattr(
+                user_settings, 'connect_timeout', DEFAULT_CONNECT_TIMEOUT
+            ),
+            read_timeout=getattr(
+                user_settings, 'read_timeout', DEFAULT_READ_TIMEOUT
+            ),
+            retries=getattr(user_settings, 'retries', DEFAULT_RETRIES),
+            page_cache=page_cache,
+            offline=getattr(user_settings, 'offline', False),
+            scheduler=scheduler
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, url, headers=None):
+        """Send GET request holding the host slot until body is read.
+
+        Args:
+            url (str): url to request.
+            headers (dict or None): additional request headers.
+
+        Returns:
+            (requests.Response)
+
+        """
+        with contextlib.ExitStack() as host_slot:
+            if self.scheduler is not None:
+                host_slot.enter_context(self.scheduler.slot(url))
+            with METRICS.timer('http_request'):
+                response = self._session.get(
+                    url, headers=headers, timeout=self.timeout
+                )
+        METRICS.inc('http_requests')
+        METRICS.inc('http_bytes_fetched', len(response.content))
+        if response.status_code >= 400:
+            METRICS.inc('http_errors')
+        return response
+
+    def _get_raw(self, url, headers=None):
+        """Send GET request keeping the body as is.
+
+        Returns:
+            (requests.Response, RawPage): response and its body.
+
+        """
+        response = self.get(url, headers)
+        return response, RawPage.from_body(
+            response.content, response.headers.get('Content-Type')
+        )
+
+    def get_raw(self, url, headers=None):
+        """Send GET request keeping the body as is.
+
+        Encoding is taken from the Content-Type header or
+        the meta tag, it is never guessed from the whole body
+        as response.text does. The body is not decoded.
+
+        Args:
+            url (str): url to request.
+            headers (dict or None): additional request headers.
+
+        Returns:
+            (RawPage)
+
+        """
+        _, raw_page = self._get_raw(url, headers)
+        return raw_page
+
+    def add_response_hook(self, hook):
+        """Call hook(response, *args, **kwargs) on every response.
+
+        Args:
+            hook (callable): requests response hook.
+
+        """
+        self._session.hooks['response'].append(hook)
+
+    def remove_response_hook(self, hook):
+        self._session.hooks['response'].remove(hook)
+
+    def fetch(self, url):
+        """Get webpage content using the page_cache.
+
+        Fresh cached page is returned without a request,
+        stale one is revalidated with a conditional request.
+
+        Args:
+            url (str): url to request.
+
+        Returns:
+            (RawPage or None): webpage content,
+                None if offline and page is not cached.
+
+        """
+        if self.page_cache is None:
+            if self.offline:
+                return None
+            return self.get_raw(url)
+
+        entry = self.page_cache.get(url)
+        if entry is not None and (
+            self.offline or self.page_cache.is_fresh(entry)
+        ):
+            self.page_cache.count_hit()
+            return entry.body
+        if self.offline:
+            self.page_cache.count_miss()
+            return None
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        response, raw_page = self._get_raw(url, headers=headers)
+
+        if entry is not None and response.status_code == 304:
+            self.page_cache.touch(entry)
+            return entry.body
+
+        self.page_cache.count_miss()
+        if response.ok:
+            self.page_cache.set(
+                url, raw_page,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
+        return raw_page
+
+    def close(self):
+        self._session.close()
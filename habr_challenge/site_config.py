@@ -1,4 +1,5 @@
 import collections
+import json
 
 
 class Selector:
@@ -59,10 +60,15 @@ class SiteConfig:
     """Declare site crawling configuration.
 
     Attributes:
+        name (str): site name.
         _site_config (dict)
 
     """
 
+    SELECTOR_KEYS = (
+        'article', 'article_publication_datetime', 'article_title'
+    )
+
     SITE_CONFIG = {
         'habr': {
             'url': 'https://habr.com/all/',
@@ -85,6 +91,7 @@ class SiteConfig:
             site_name (string): name of the site to get config for.
 
         """
+        self.name = site_name
         self._site_config = self._get_site_config(site_name)
 
     def __repr__(self):
@@ -143,6 +150,50 @@ class SiteConfig:
 
         return site_config
 
+    @classmethod
+    def load(cls, path):
+        """Add site configs from a json file to SITE_CONFIG.
+
+        File maps site names to configs, selectors are objects
+        of Selector arguments, optional "encoding" is used for pages
+        declaring none in headers and meta tag. Example:
+            {
+                "geektimes": {
+                    "url": "https://geektimes.com/all/",
+                    "pagination": "page{page}/",
+                    "article": {"selector": "article", "class_": "post"},
+                    ...
+                }
+            }
+
+        Args:
+            path (str): json file path.
+
+        Returns:
+            ([str]): names of the sites loaded.
+
+        Raises:
+            KeyError: url or selector is not defined in a site config.
+
+        """
+        with open(path, encoding='utf-8') as f:
+            site_configs = json.load(f)
+
+        for site_name, site_config in site_configs.items():
+            for key in ('url',) + cls.SELECTOR_KEYS:
+                if key not in site_config:
+                    raise KeyError(
+                        'Please provide "{key}" in {site_name} '
+                        'site configuration'.format(
+                            key=key, site_name=site_name
+                        )
+                    )
+            for key in cls.SELECTOR_KEYS:
+                site_config[key] = Selector(**site_config[key])
+            cls.SITE_CONFIG[site_name] = site_config
+
+        return list(site_configs)
+
     @property
     def articles_list_url(self):
         """Return article list url to parse.
@@ -0,0 +1,117 @@
+import gzip
+import json
+import os
+
+
+__all__ = ['StateStore']
+
+
+DEFAULT_CHECKPOINT_EVERY = 10
+
+
+class StateStore:
+    """Persistent state of incremental runs.
+
+    State keeps nouns count by week and ids of articles counted,
+    so the next run counts only new articles.
+    State is saved periodically during the crawl,
+    interrupted crawl is resumed from the page after the last checkpoint.
+
+    Attributes:
+        path (str): gzip compressed json file to keep state in.
+        checkpoint_every (int): save state every N pages collected.
+        resume_page (int or None): page to resume interrupted crawl from.
+        _seen_articles (set): ids of articles counted.
+        _parser_result (list): saved ParserDataCollector state.
+        _pages_committed (int): pages collected in this run.
+
+    """
+
+    VERSION = 1
+
+    def __init__(self, path, checkpoint_every=DEFAULT_CHECKPOINT_EVERY):
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self.resume_page = None
+        self._seen_articles = set()
+        self._parser_result = []
+        self._pages_committed = 0
+
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('version') != self.VERSION:
+            raise ValueError(
+                'Unsupported state version in {path}'.format(path=self.path)
+            )
+        self.resume_page = state['resume_page']
+        self._seen_articles = set(state['seen_articles'])
+        self._parser_result = state['parser_result']
+
+    @property
+    def resuming(self):
+        """Is interrupted crawl resumed."""
+        return self.resume_page is not None
+
+    def load_into(self, parser_data_collector):
+        """Merge saved nouns count into the collector.
+
+        Args:
+            parser_data_collector (ParserDataCollector)
+
+        """
+        parser_data_collector.load_state(self._parser_result)
+
+    def is_known(self, article_id):
+        return article_id in self._seen_articles
+
+    def commit_page(self, page, article_ids, parser_data_collector):
+        """Mark page articles as counted.
+
+        State is saved every checkpoint_every pages.
+
+        Args:
+            page (int): page collected.
+            article_ids (iterable): ids of articles collected from page.
+            parser_data_collector (ParserDataCollector):
+                collector holding the articles counted.
+
+        """
+        self._seen_articles.update(article_ids)
+        self._pages_committed += 1
+        if self._pages_committed % self.checkpoint_every == 0:
+            self.resume_page = page + 1
+            self.save(parser_data_collector)
+
+    def complete(self, parser_data_collector):
+        """Save state of a finished crawl.
+
+        Args:
+            parser_data_collector (ParserDataCollector)
+
+        """
+        self.resume_page = None
+        self.save(parser_data_collector)
+
+    def save(self, parser_data_collector):
+        """Atomically write state to the path.
+
+        Args:
+            parser_data_collector (ParserDataCollector)
+
+        """
+        self._parser_result = parser_data_collector.to_state()
+        state = {
+            'version': self.VERSION,
+            'resume_page': self.resume_page,
+            'seen_articles': sorted(self._seen_articles),
+            'parser_result': self._parser_result,
+        }
+
+        tmp_path = self.path + '.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -5,7 +5,7 @@ __version__ = '0.1.0'
 
 setup(
     name='Habrahabr challenge',
-    packages=find_packages(exclude=['tests']),
+    packages=find_packages(exclude=['tests', 'benchmarks']),
     include_package_data=True,
     version=__version__,
 
@@ -24,9 +24,13 @@ setup(
         'Operating System :: POSIX :: Linux',
         'Operating System :: Microsoft :: Windows',
         'Programming Language :: Python :: 3 :: Only',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
         'Programming Language :: Python :: Implementation :: CPython',
         'Topic :: Utilities',
     ],
+    python_requires='>=3.7',
     entry_points={
         'console_scripts': ['parse_habr=bin.parse_habr:main']
     },
@@ -0,0 +1,69 @@
+import argparse
+import threading
+
+import pytest
+
+from habr_challenge import crawler
+from habr_challenge.site_config import SiteConfig
+
+
+ARTICLE = (
+    '<article class="post post_preview">'
+    '<span class="post__time">1 января 2010 в 10:00</span>'
+    '<a href="{url}{id_}/" class="post__title_link">{title}</a>'
+    '</article>'
+)
+
+PAGES_TITLES = {
+    1: ['Окна', 'Двери'],
+    2: ['Окна', 'Стены'],
+    3: ['Стены'],
+}
+
+
+@pytest.fixture
+def user_settings():
+    return argparse.Namespace(pages=3, show_progress=False, concurrency=2)
+
+
+@pytest.fixture
+def site_config():
+    return SiteConfig('habr')
+
+
+@pytest.fixture
+def fetched_threads(monkeypatch):
+    """Serve feed pages of PAGES_TITLES from memory.
+
+    Yields:
+        (set): names of threads pages were fetched in.
+
+    """
+    threads = set()
+
+    def fetch_page(session, articles_list_url, page):
+        threads.add(threading.current_thread().name)
+        url = articles_list_url.format(page=page)
+        return '<html><body>{0}</body></html>'.format(''.join(
+            ARTICLE.format(url=url, id_=id_, title=title)
+            for id_, title in enumerate(PAGES_TITLES[page])
+        ))
+
+    monkeypatch.setattr(crawler, '_fetch_page', fetch_page)
+    yield threads
+
+
+@pytest.fixture
+def make_feed_page():
+    def make_feed_page(*articles):
+        """Make feed page of (id, title) articles."""
+        return '<html><body>{0}</body></html>'.format(''.join(
+            ARTICLE.format(url='https://habr.com/post/', id_=id_, title=title)
+            for id_, title in articles
+        ))
+    return make_feed_page
+
+
+@pytest.fixture
+def session():
+    return None  # Pages are not fetched through the session
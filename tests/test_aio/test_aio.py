@@ -0,0 +1,118 @@
+import asyncio
+import collections
+import threading
+import time
+
+from habr_challenge import aio, crawler, parser
+
+
+WEEK = ('28-12-2009', '03-01-2010')
+
+
+def test_acrawl_yields_pages_in_order(
+    site_config, user_settings, session, fetched_threads
+):
+    async def crawl():
+        return [
+            (page, 'Стены' in articles_list)
+            async for page, articles_list in aio.acrawl(
+                site_config, user_settings, session
+            )
+        ]
+
+    assert asyncio.run(crawl()) == [(1, False), (2, True), (3, True)]
+    assert threading.current_thread().name not in fetched_threads
+
+
+def test_aparse_site(site_config, user_settings, session, fetched_threads):
+    result_dict = asyncio.run(
+        aio.aparse_site(site_config, user_settings, session)
+    )
+    assert result_dict == {WEEK: 'окно стена дверь'}
+
+
+def test_aparse_counts_repeated_articles_once(
+    monkeypatch, site_config, user_settings, session, make_feed_page
+):
+    def fetch_page(session, articles_list_url, page):
+        # "Окна" is shifted to the second page, where the feed ends,
+        # pages beyond it are the same as the last one
+        if page == 1:
+            return make_feed_page((1, 'Окна'))
+        return make_feed_page((1, 'Окна'), (2, 'Двери'), (3, 'Двери'))
+
+    monkeypatch.setattr(crawler, '_fetch_page', fetch_page)
+    user_settings.pages = 10
+    collector = aio.AsyncCollector()
+
+    asyncio.run(aio.aparse_site(
+        site_config, user_settings, session, collector=collector
+    ))
+    assert collector.parser_data_collector._parser_result == {
+        WEEK: collections.Counter({'окно': 1, 'дверь': 2})
+    }
+
+
+def test_sites_share_event_loop(
+    site_config, user_settings, session, fetched_threads
+):
+    async def parse_sites():
+        return await asyncio.gather(*(
+            aio.aparse_site(site_config, user_settings, session)
+            for _ in range(3)
+        ))
+
+    assert asyncio.run(parse_sites()) == [{WEEK: 'окно стена дверь'}] * 3
+
+
+def test_async_collector_collects_like_sync_one():
+    articles_data = [
+        parser.ARTICLE_DATA('Окна и двери', '1 января 2010'),
+        parser.ARTICLE_DATA('Двери', '1 января 2010'),
+    ]
+    collector = aio.AsyncCollector()
+
+    async def collect():
+        await collector.collect(articles_data[0])
+        await collector.collect_many(articles_data[1:])
+
+    asyncio.run(collect())
+    assert collector.result_dict == {WEEK: 'дверь окно'}
+
+
+def test_acrawl_closes_own_session_after_fetches(
+    monkeypatch, site_config, user_settings, fetched_threads
+):
+    fetch_page = crawler._fetch_page
+    fetches_running = set()
+    running_on_close = []
+
+    def slow_fetch_page(session, articles_list_url, page):
+        fetches_running.add(page)
+        time.sleep(0.05 * page)
+        fetches_running.discard(page)
+        return fetch_page(session, articles_list_url, page)
+
+    class Session:
+
+        @classmethod
+        def from_user_settings(cls, user_settings):
+            return cls()
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            running_on_close.extend(fetches_running)
+
+    monkeypatch.setattr(crawler, '_fetch_page', slow_fetch_page)
+    monkeypatch.setattr(aio, 'CrawlerSession', Session)
+
+    async def crawl_first_page():
+        pages = aio.acrawl(site_config, user_settings)
+        async for page, _ in pages:
+            await pages.aclose()  # Page 2 is still being fetched
+            return page
+
+    assert asyncio.run(crawl_first_page()) == 1
+    assert running_on_close == []
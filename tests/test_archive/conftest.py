@@ -0,0 +1,17 @@
+import pytest
+
+
+@pytest.fixture
+def pages():
+    """Page numbers and pages, the second one is missing."""
+    return [
+        (1, '<html><body>Первая страница</body></html>'),
+        (3, '<html><body>Третья\r\n\r\nстраница</body></html>'),
+        (4, ''),
+    ]
+
+
+@pytest.fixture(params=['pages', 'pages.tar', 'pages.tar.gz', 'pages.warc',
+                        'pages.warc.gz'])
+def archive_path(request, tmpdir):
+    return str(tmpdir.join(request.param))
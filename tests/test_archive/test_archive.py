@@ -0,0 +1,56 @@
+from habr_challenge import archive
+
+
+URL = 'https://habr.com/all/page{page}/'
+
+
+def test_replay_reads_pages_written(archive_path, pages):
+    with archive.ArchiveWriter(archive_path) as archive_writer:
+        for page, content in pages:
+            archive_writer.write(page, URL.format(page=page), content)
+
+    assert list(archive.replay(archive_path)) == pages
+
+
+def test_replay_sorts_pages_by_number(tmpdir):
+    path = str(tmpdir.join('pages'))
+    with archive.ArchiveWriter(path) as archive_writer:
+        for page in (10, 2, 1):
+            archive_writer.write(page, URL.format(page=page), str(page))
+
+    assert list(archive.replay(path)) == [(1, '1'), (2, '2'), (10, '10')]
+
+
+def test_record_passes_pages_through(archive_path, pages):
+    with archive.ArchiveWriter(archive_path) as archive_writer:
+        recorded = list(archive.record(iter(pages), archive_writer, URL))
+
+    assert recorded == pages
+    assert list(archive.replay(archive_path)) == pages
+
+
+def test_record_closes_crawler_when_closed(tmpdir, pages):
+    closed = []
+
+    def crawl():
+        try:
+            yield from pages
+        finally:
+            closed.append(True)
+
+    path = str(tmpdir.join('pages.warc'))
+    with archive.ArchiveWriter(path) as archive_writer:
+        recorder = archive.record(crawl(), archive_writer, URL)
+        next(recorder)
+        recorder.close()
+
+    assert closed == [True]
+    assert list(archive.replay(path)) == pages[:1]
+
+
+def test_replay_reads_pages_of_range(archive_path, pages):
+    with archive.ArchiveWriter(archive_path) as archive_writer:
+        for page, content in pages:
+            archive_writer.write(page, URL.format(page=page), content)
+
+    assert list(archive.replay(archive_path, range(2, 4))) == pages[1:2]
@@ -0,0 +1,15 @@
+import pytest
+
+from habr_challenge.site_config import SiteConfig
+
+from benchmarks.server import CorpusServer, load_corpus
+
+
+@pytest.fixture
+def site_config(monkeypatch):
+    """Config of the site served from the benchmark corpus."""
+    with CorpusServer(load_corpus()) as server:
+        monkeypatch.setitem(SiteConfig.SITE_CONFIG, 'bench', dict(
+            SiteConfig.SITE_CONFIG['habr'], url=server.url
+        ))
+        yield SiteConfig('bench')
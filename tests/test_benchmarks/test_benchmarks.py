@@ -0,0 +1,24 @@
+import io
+
+from benchmarks import bench_pipeline
+
+
+def test_bench_pipeline_runs_every_stage(site_config):
+    results = bench_pipeline.bench_pipeline(site_config, size=2)
+
+    assert [result['stage'] for result in results] == \
+        list(bench_pipeline.STAGES)
+    assert [
+        result['stage'] for result in results if 'articles_per_s' in result
+    ] == list(bench_pipeline.THROUGHPUT_STAGES)
+    assert all(result['articles_per_s'] > 0 for result in results[:2])
+
+
+def test_print_results_skips_throughput_of_other_stages(site_config):
+    output = io.StringIO()
+    bench_pipeline.print_results(
+        bench_pipeline.bench_pipeline(site_config, size=1), file=output
+    )
+
+    report_row = output.getvalue().splitlines()[-1].split()
+    assert report_row[:4] == ['report', '1', '-', '-']
@@ -0,0 +1,8 @@
+import pytest
+
+from habr_challenge.common import LRUCache
+
+
+@pytest.fixture
+def lru_cache():
+    return LRUCache(2)
@@ -0,0 +1,50 @@
+from habr_challenge import common
+from habr_challenge.common import LRUCache, SeenSet
+
+
+def test_lru_cache_counts_hits_and_misses(lru_cache):
+    lru_cache['a'] = 1
+
+    assert lru_cache.get('a') == 1
+    assert lru_cache.get('b') is None
+    assert (lru_cache.hits, lru_cache.misses) == (1, 1)
+
+
+def test_lru_cache_discards_least_recently_used(lru_cache):
+    lru_cache['a'] = 1
+    lru_cache['b'] = 2
+    lru_cache.get('a')
+    lru_cache['c'] = 3
+
+    assert 'a' in lru_cache
+    assert 'b' not in lru_cache
+    assert len(lru_cache) == lru_cache.maxsize
+
+
+def test_lru_cache_disabled_by_zero_size():
+    lru_cache = LRUCache(0)
+    lru_cache['a'] = 1
+
+    assert len(lru_cache) == 0
+
+
+def test_seen_set_adds_strings_once():
+    seen_set = SeenSet()
+    assert seen_set.add('https://habr.com/post/1/')
+    assert not seen_set.add('https://habr.com/post/1/')
+    assert 'https://habr.com/post/1/' in seen_set
+    assert 'https://habr.com/post/2/' not in seen_set
+    assert len(seen_set) == 1
+
+
+def test_seen_set_merges_hashes_into_sorted_array(monkeypatch):
+    monkeypatch.setattr(common, 'SEEN_PENDING_LIMIT', 2)
+    seen_set = SeenSet()
+    urls = ['https://habr.com/post/{0}/'.format(i) for i in range(7)]
+    assert all(map(seen_set.add, urls))
+
+    assert not any(map(seen_set.add, urls))
+    assert all(url in seen_set for url in urls)
+    assert len(seen_set) == 7
+    assert list(seen_set._hashes) == sorted(seen_set._hashes)
+    assert seen_set.nbytes == 6 * 8
@@ -0,0 +1,22 @@
+import pytest
+
+from habr_challenge.compact_store import CompactStore, Vocabulary
+
+
+@pytest.fixture
+def vocabulary():
+    return Vocabulary()
+
+
+@pytest.fixture
+def store(vocabulary):
+    return CompactStore(vocabulary)
+
+
+@pytest.fixture
+def weeks_words():
+    return [
+        (('28-12-2009', '03-01-2010'), ['окно', 'дверь', 'окно']),
+        (('04-01-2010', '10-01-2010'), ['стена']),
+        (('28-12-2009', '03-01-2010'), {'дверь': 2, 'крыша': 1}),
+    ]
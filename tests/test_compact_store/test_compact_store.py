@@ -0,0 +1,116 @@
+import argparse
+import collections
+
+import pytest
+
+from habr_challenge import compact_store
+from habr_challenge.parser_data_collector import ParserDataCollector
+
+
+def test_vocabulary_interns_lemmas_in_order(vocabulary):
+    assert [vocabulary.intern(lemma) for lemma in ('б', 'а', 'б')] == \
+        [0, 1, 0]
+    assert vocabulary.lemma(1) == 'а'
+    assert vocabulary.id('в') is None
+    assert len(vocabulary) == 2
+
+
+@pytest.mark.parametrize('week_range, key', [
+    (('28-12-2009', '03-01-2010'), 200953),
+    (('04-01-2010', '10-01-2010'), 201001),
+    (('29-12-2014', '04-01-2015'), 201501),
+])
+def test_week_key_round_trip(week_range, key):
+    assert compact_store.week_key(week_range) == key
+    assert compact_store.week_range(key) == week_range
+
+
+def test_week_counts_match_counter(store, weeks_words):
+    counters = collections.defaultdict(collections.Counter)
+    for week_range, words in weeks_words:
+        store[week_range].update(words)
+        counters[week_range].update(words)
+
+    assert list(store) == list(counters)
+    for week_range, week_counts in store.items():
+        assert dict(week_counts) == counters[week_range]
+        assert week_counts['окно' if 'окно' in week_counts else 'стена']
+        assert sorted(week_counts.most_common()) == \
+            sorted(counters[week_range].most_common())
+
+    # Counter is updated by week counts as by a mapping
+    counter = collections.Counter()
+    counter.update(store[('28-12-2009', '03-01-2010')])
+    assert counter == counters[('28-12-2009', '03-01-2010')]
+
+
+def test_week_counts_ties_are_broken_by_week_order(store, vocabulary):
+    vocabulary.intern('стена')
+    week_counts = store[('28-12-2009', '03-01-2010')]
+    week_counts.update(['окно', 'стена'])
+
+    assert week_counts.most_common(1) == [('окно', 1)]
+    assert list(week_counts) == ['окно', 'стена']
+    with pytest.raises(KeyError):
+        week_counts['дверь']
+
+
+def test_week_counts_most_common_as_counter(store, monkeypatch):
+    monkeypatch.setattr(compact_store, 'PENDING_LIMIT', 2)
+    other_week = store[('04-01-2010', '10-01-2010')]
+    other_week.update(['г', 'в', 'б', 'а'])
+    week_counts = store[('28-12-2009', '03-01-2010')]
+    counter = collections.Counter()
+    for words in (['а', 'б'], ['в', 'г', 'б'], ['д', 'а', 'в'], ['е']):
+        week_counts.update(words)
+        counter.update(words)
+
+    assert list(week_counts.items()) == list(counter.items())
+    assert week_counts.most_common() == counter.most_common()
+    for n in range(len(counter) + 1):
+        assert week_counts.most_common(n) == counter.most_common(n)
+
+
+def test_week_counts_merge_pending_counts(store, monkeypatch):
+    monkeypatch.setattr(compact_store, 'PENDING_LIMIT', 2)
+    week_counts = store[('28-12-2009', '03-01-2010')]
+    for lemma in ('а', 'б', 'в', 'а', 'г', 'а'):
+        week_counts.update([lemma])
+
+    assert week_counts.most_common(2) == [('а', 3), ('б', 1)]
+    assert len(week_counts) == 4
+    assert week_counts.nbytes == 4 * 12
+
+
+def test_collector_with_compact_store(weeks_words):
+    parser_data_collector = ParserDataCollector()
+    compact_collector = ParserDataCollector(
+        argparse.Namespace(compact_store=True)
+    )
+    for week_range, words in weeks_words:
+        parser_data_collector.merge({week_range: collections.Counter(words)})
+        compact_collector.merge({week_range: collections.Counter(words)})
+
+    assert compact_collector.result_dict == parser_data_collector.result_dict
+    assert compact_collector.to_state() == parser_data_collector.to_state()
+    assert compact_collector.stats['compact_store']['weeks'] == 2
+
+
+def test_compact_store_excludes_heavy_hitters():
+    with pytest.raises(ValueError):
+        ParserDataCollector(argparse.Namespace(
+            compact_store=True, heavy_hitters_capacity=10
+        ))
+
+
+def test_collector_reset_drops_vocabulary():
+    user_settings = argparse.Namespace(compact_store=True)
+    parser_data_collector = ParserDataCollector(user_settings)
+    parser_data_collector.merge({
+        ('28-12-2009', '03-01-2010'): collections.Counter(['окно'])
+    })
+    vocabulary = parser_data_collector._parser_result.vocabulary
+    parser_data_collector.reset(user_settings)
+
+    assert len(vocabulary) == 1
+    assert len(parser_data_collector._parser_result.vocabulary) == 0
@@ -0,0 +1,54 @@
+import argparse
+import datetime
+import random
+import time
+
+import pytest
+
+from habr_challenge import crawler
+
+
+@pytest.fixture
+def user_settings():
+    return argparse.Namespace(
+        pages=20, show_progress=False,
+        concurrency=4, prefetch=None, as_completed=False
+    )
+
+
+@pytest.fixture
+def fetched_pages(monkeypatch):
+    """Replace network fetch with a slow in-memory one.
+
+    Returns:
+        (list): pages fetched in the order of requests.
+
+    """
+    pages = []
+
+    def fetch_page(session, articles_list_url, page):
+        pages.append(page)
+        time.sleep(random.random() / 100)
+        return articles_list_url.format(page=page)
+
+    monkeypatch.setattr(crawler, '_fetch_page', fetch_page)
+    return pages
+
+
+@pytest.fixture
+def make_response():
+    def make_response(
+        status_code=200, latency=.1, headers=None, retries=(),
+        url='https://habr.com/all/page1/'
+    ):
+        """Make response the adaptive controller observes."""
+        return argparse.Namespace(
+            status_code=status_code,
+            elapsed=datetime.timedelta(seconds=latency),
+            headers=headers or {},
+            raw=argparse.Namespace(
+                retries=argparse.Namespace(history=retries)
+            ),
+            url=url
+        )
+    return make_response
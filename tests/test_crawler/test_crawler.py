@@ -0,0 +1,140 @@
+import argparse
+import time
+
+from habr_challenge import crawler
+from habr_challenge.site_config import SiteConfig
+
+
+def test_concurrent_crawl_keeps_pages_order(user_settings, fetched_pages):
+    assert list(crawler.crawl(SiteConfig('habr'), user_settings)) == [
+        (page, 'https://habr.com/all/page{0}/'.format(page))
+        for page in range(1, user_settings.pages + 1)
+    ]
+
+
+def test_concurrent_crawl_as_completed(user_settings, fetched_pages):
+    user_settings.as_completed = True
+
+    articles_lists = crawler.crawl(SiteConfig('habr'), user_settings)
+    assert sorted(articles_lists) == [
+        (page, 'https://habr.com/all/page{0}/'.format(page))
+        for page in range(1, user_settings.pages + 1)
+    ]
+
+
+def test_crawl_keeps_numbers_of_pages_after_offline_misses(
+    monkeypatch, user_settings
+):
+    def fetch_page(session, articles_list_url, page):
+        return None if page % 3 == 0 else str(page)
+
+    monkeypatch.setattr(crawler, '_fetch_page', fetch_page)
+    user_settings.pages = 7
+
+    assert list(crawler.crawl(SiteConfig('habr'), user_settings)) == [
+        (1, '1'), (2, '2'), (4, '4'), (5, '5'), (7, '7')
+    ]
+
+
+def test_concurrent_crawl_prefetch_is_bounded(user_settings, fetched_pages):
+    user_settings.prefetch = 5
+    articles_lists = crawler.crawl(SiteConfig('habr'), user_settings)
+
+    next(articles_lists)
+    assert len(fetched_pages) <= user_settings.prefetch + 1
+    articles_lists.close()
+
+
+def test_concurrent_crawl_progress_follows_consumer(
+    monkeypatch, user_settings, fetched_pages
+):
+    progress_bar = argparse.Namespace(n=0, closed=False)
+
+    def update():
+        progress_bar.n += 1
+
+    def close():
+        progress_bar.closed = True
+
+    progress_bar.update, progress_bar.close = update, close
+    monkeypatch.setattr(
+        crawler, '_get_progress_bar', lambda *args: progress_bar
+    )
+    user_settings.prefetch = 5
+
+    for page, _ in enumerate(
+        crawler.crawl(SiteConfig('habr'), user_settings), 1
+    ):
+        assert progress_bar.n == page
+    assert progress_bar.closed
+
+
+def test_adaptive_controller_slow_start_is_bounded(make_response):
+    controller = crawler.AdaptiveController(max_concurrency=4)
+
+    for _ in range(10):
+        controller.observe(make_response())
+    assert controller.limit == 4
+
+
+def test_adaptive_controller_halves_limit_on_errors(make_response):
+    controller = crawler.AdaptiveController(max_concurrency=8)
+    for _ in range(7):
+        controller.observe(make_response())
+
+    controller.observe(make_response(status_code=503))
+    assert controller.limit == 4
+    # Responses of requests sent before the decrease are ignored
+    controller.observe(make_response(status_code=503))
+    assert controller.limit == 4
+    # Limit grows additively after congestion
+    controller.observe(make_response())
+    assert 4 < controller.limit < 5
+    assert controller.info['errors'] == 2
+
+
+def test_adaptive_controller_counts_retries_and_latency(make_response):
+    controller = crawler.AdaptiveController(max_concurrency=8)
+    for _ in range(7):
+        controller.observe(make_response())
+
+    controller.observe(make_response(retries=[object(), object()]))
+    assert controller.limit == 4
+    assert controller.errors == 2
+
+    controller._last_decrease = 0.
+    controller.observe(make_response(latency=1.))
+    assert controller.limit == 2
+
+
+def test_adaptive_controller_pauses_on_retry_after(make_response):
+    controller = crawler.AdaptiveController(max_concurrency=2)
+    controller.observe(make_response(
+        status_code=429, headers={'Retry-After': '0.05'}
+    ))
+
+    started = time.monotonic()
+    with controller.slot():
+        pass
+    assert time.monotonic() - started >= .04
+    assert controller.info['throttled'] == 1
+
+
+def test_adaptive_controller_ignores_other_hosts(make_response):
+    controller = crawler.AdaptiveController(
+        max_concurrency=4, host='habr.com'
+    )
+
+    controller.observe(make_response(url='https://other.com/'))
+    assert controller.limit == 1
+    assert controller.info['rps'] == 0
+
+
+def test_adaptive_crawl_respects_max_rps(user_settings, fetched_pages):
+    user_settings.adaptive = True
+    user_settings.max_rps = 100
+    user_settings.pages = 6
+
+    started = time.monotonic()
+    assert len(list(crawler.crawl(SiteConfig('habr'), user_settings))) == 6
+    assert time.monotonic() - started >= 5 / user_settings.max_rps
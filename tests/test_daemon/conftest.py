@@ -0,0 +1,37 @@
+import threading
+
+import pytest
+
+from habr_challenge.daemon import ReportServer
+
+
+def make_report(args):
+    """Report of the arguments, fails on --fail."""
+    if '--fail' in args:
+        raise ValueError('Report failed')
+    return ' '.join(args) + '\n'
+
+
+@pytest.fixture(params=['socket', 'http'])
+def report_server(request, tmpdir):
+    if request.param == 'socket':
+        report_server = ReportServer(
+            make_report, socket_path=str(tmpdir.join('habr.sock'))
+        )
+    else:
+        report_server = ReportServer(make_report, port=0)
+
+    thread = threading.Thread(target=report_server.serve_forever)
+    thread.start()
+    yield report_server
+    report_server.shutdown()
+    thread.join()
+    report_server.close()
+
+
+@pytest.fixture
+def address(report_server):
+    if report_server.socket_path is not None:
+        return {'socket_path': report_server.socket_path}
+    host, port = report_server.address
+    return {'host': host, 'port': port}
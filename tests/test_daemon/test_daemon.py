@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from habr_challenge.daemon import ReportServer, request_report
+
+
+def test_request_report(report_server, address):
+    assert request_report(['--pages', '3'], **address) == '--pages 3\n'
+    # Server keeps answering
+    assert request_report(['--top', '2'], **address) == '--top 2\n'
+
+
+def test_request_report_error(report_server, address):
+    with pytest.raises(RuntimeError, match='Report failed'):
+        request_report(['--fail'], **address)
+
+
+def test_socket_is_removed_on_close(report_server):
+    if report_server.socket_path is None:
+        pytest.skip('Unix socket only')
+    report_server.close()
+    assert not os.path.exists(report_server.socket_path)
+
+
+def test_regular_file_is_not_removed(tmpdir):
+    path = tmpdir.join('report.txt')
+    path.write('report')
+    with pytest.raises(FileExistsError):
+        ReportServer(str, socket_path=str(path))
+    assert path.read() == 'report'
+
+
+def test_stale_socket_is_replaced(tmpdir):
+    socket_path = str(tmpdir.join('habr.sock'))
+    ReportServer(str, socket_path=socket_path)._server.server_close()
+    assert os.path.exists(socket_path)  # Left as by a killed daemon
+
+    with ReportServer(str, socket_path=socket_path):
+        assert os.path.exists(socket_path)
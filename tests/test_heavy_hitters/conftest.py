@@ -0,0 +1,12 @@
+import random
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def skewed_stream():
+    """Stream of items where item i occurs about 1 / (i + 1) often."""
+    rng = random.Random(941)
+    items = ['noun{0}'.format(i) for i in range(500)]
+    weights = [1. / (i + 1) for i in range(len(items))]
+    return rng.choices(items, weights, k=20000)
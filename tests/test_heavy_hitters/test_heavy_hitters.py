@@ -0,0 +1,81 @@
+import argparse
+import collections
+
+from habr_challenge.heavy_hitters import SpaceSavingCounter
+from habr_challenge.parser_data_collector import ParserDataCollector
+
+
+def test_space_saving_counts_exactly_within_capacity(skewed_stream):
+    counter = collections.Counter(skewed_stream)
+    space_saving_counter = SpaceSavingCounter(len(counter), top_n=5)
+    space_saving_counter.update(skewed_stream)
+
+    assert dict(space_saving_counter) == dict(counter)
+    assert space_saving_counter.most_common(5) == counter.most_common(5)
+
+
+def test_space_saving_orders_ties_like_counter():
+    counter = collections.Counter()
+    space_saving_counter = SpaceSavingCounter(1000, top_n=3)
+    # 'a' enters the top first, 'b' and 'c' catch up with it
+    for batch in (['a', 'b', 'c', 'd'], ['c', 'b', 'd'], ['a', 'd'], ['c']):
+        counter.update(batch)
+        space_saving_counter.update(collections.Counter(batch))
+        assert space_saving_counter.most_common(3) == \
+            counter.most_common(3)
+        assert space_saving_counter.most_common() == counter.most_common()
+
+
+def test_collector_heavy_hitters_match_exact_counts(skewed_stream):
+    week_range = ('28-12-2009', '03-01-2010')
+    collectors = [
+        ParserDataCollector(argparse.Namespace(
+            top=3, heavy_hitters_capacity=capacity
+        ))
+        for capacity in (0, 1000)
+    ]
+    for collector in collectors:
+        for i in range(0, 70, 7):
+            collector.merge({
+                week_range: collections.Counter(skewed_stream[i:i + 7])
+            })
+
+    assert collectors[0].result_dict == collectors[1].result_dict
+
+
+def test_space_saving_keeps_heavy_hitters_in_bounded_memory(skewed_stream):
+    counter = collections.Counter(skewed_stream)
+    space_saving_counter = SpaceSavingCounter(50, top_n=3)
+    for item in skewed_stream:
+        space_saving_counter.update([item])
+
+    assert len(space_saving_counter) == 50
+    assert [item for item, _ in space_saving_counter.most_common(3)] == \
+        [item for item, _ in counter.most_common(3)]
+    for item, count in space_saving_counter.most_common(3):
+        assert count - space_saving_counter.error(item) <= counter[item]
+        assert counter[item] <= count
+
+
+def test_space_saving_updated_with_counter():
+    space_saving_counter = SpaceSavingCounter(2, top_n=2)
+    space_saving_counter.update(collections.Counter({'a': 2, 'b': 1}))
+    space_saving_counter.update(collections.Counter({'c': 2}))
+
+    assert space_saving_counter.most_common() == [('c', 3), ('a', 2)]
+    assert space_saving_counter.error('c') == 1
+
+
+def test_collector_shows_configured_top_n_heavy_hitters():
+    parser_data_collector = ParserDataCollector(argparse.Namespace(
+        top=1, heavy_hitters_capacity=10
+    ))
+    parser_data_collector.merge({
+        ('28-12-2009', '03-01-2010'): collections.Counter(
+            {'закон': 2, 'инженерия': 1}
+        )
+    })
+
+    assert parser_data_collector.result_dict == {
+        ('28-12-2009', '03-01-2010'): 'закон'
+    }
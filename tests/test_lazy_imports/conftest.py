@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from habr_challenge import HEAVY_MODULES
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)
+)))
+
+
+@pytest.fixture
+def loaded_heavy_modules():
+    def loaded_heavy_modules(code):
+        """Run code in a fresh interpreter.
+
+        Returns:
+            ([str]): heavy modules imported by the code.
+
+        """
+        code += (
+            '\nimport sys'
+            '\nprint(" ".join(m for m in {0!r} if m in sys.modules))'
+        ).format(HEAVY_MODULES)
+        return subprocess.run(
+            [sys.executable, '-c', code],
+            stdout=subprocess.PIPE, cwd=ROOT_DIR, check=True,
+            universal_newlines=True
+        ).stdout.split()
+    return loaded_heavy_modules
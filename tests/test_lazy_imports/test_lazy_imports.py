@@ -0,0 +1,27 @@
+import pytest
+
+import habr_challenge
+
+
+def test_package_import_is_light(loaded_heavy_modules):
+    assert loaded_heavy_modules(
+        'import habr_challenge\n'
+        'habr_challenge.SiteConfig("habr")'
+    ) == []
+
+
+def test_cli_import_is_light(loaded_heavy_modules):
+    assert loaded_heavy_modules('from bin import parse_habr') == []
+
+
+def test_submodules_are_imported_on_access(loaded_heavy_modules):
+    assert loaded_heavy_modules(
+        'import habr_challenge\n'
+        'habr_challenge.crawler._get_pagination_range\n'
+        'habr_challenge.ReportGenerator({})'
+    ) == []
+
+
+def test_unknown_attribute_raises():
+    with pytest.raises(AttributeError):
+        habr_challenge.NOT_EXIST
@@ -0,0 +1,21 @@
+import argparse
+
+import pytest
+
+from habr_challenge.lemma_store import LemmaStore
+
+
+@pytest.fixture
+def lemma_store_path(tmpdir):
+    return str(tmpdir.join('lemmas.sqlite'))
+
+
+@pytest.fixture
+def lemma_store(lemma_store_path):
+    with LemmaStore(lemma_store_path) as lemma_store:
+        yield lemma_store
+
+
+@pytest.fixture
+def user_settings(lemma_store_path):
+    return argparse.Namespace(lemma_store=lemma_store_path)
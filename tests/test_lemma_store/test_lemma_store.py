@@ -0,0 +1,48 @@
+from habr_challenge.lemma_store import LemmaStore, get_lemma_store
+from habr_challenge.parser_data_collector import ParserDataCollector
+
+
+def test_lemmas_are_written_on_flush(lemma_store, lemma_store_path):
+    lemma_store.update({'окна': (True, 'окно'), 'и': (False, 'и')})
+    assert lemma_store.get_many(['окна', 'двери']) == {
+        'окна': (True, 'окно')
+    }
+
+    with LemmaStore(lemma_store_path) as other_process_store:
+        assert other_process_store.get_many(['окна']) == {}
+        lemma_store.flush()
+        assert other_process_store.get_many(['окна', 'и']) == {
+            'окна': (True, 'окно'), 'и': (False, 'и')
+        }
+
+
+def test_get_many_queries_in_chunks(lemma_store):
+    words = ['слово{0}'.format(i) for i in range(1234)]
+    lemma_store.update({word: (True, word) for word in words})
+    lemma_store.flush()
+    assert len(lemma_store.get_many(words)) == len(words)
+    assert lemma_store.info['hits'] == len(words)
+
+
+def test_rebuild_analyzes_words_again(lemma_store):
+    lemma_store.update({'окна': (False, 'окна')})
+    assert lemma_store.rebuild(lambda word: (True, 'окно')) == 1
+    assert lemma_store.get_many(['окна']) == {'окна': (True, 'окно')}
+
+    lemma_store.compact()
+    assert len(lemma_store) == 1
+
+
+def test_collector_reuses_lemmas_of_previous_runs(
+    user_settings, lemma_store_path
+):
+    titles = ['Окна и двери']
+    parser_data_collector = ParserDataCollector(user_settings)
+    expected = parser_data_collector.normalize_titles(titles)
+    parser_data_collector.save_lemmas()
+    assert parser_data_collector.stats['lemma_store']['misses'] == 3
+
+    next_run = ParserDataCollector(user_settings)
+    assert next_run.normalize_titles(titles) == expected
+    assert next_run.stats['lemma_store']['hits'] == 3
+    assert len(get_lemma_store(lemma_store_path)) == 3
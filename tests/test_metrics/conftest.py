@@ -0,0 +1,13 @@
+import pytest
+
+from habr_challenge.metrics import Metrics
+
+
+@pytest.fixture
+def metrics():
+    metrics = Metrics()
+    metrics.inc('http_requests', 2)
+    metrics.set_gauge('lemma_cache_hits', 5)
+    for value in (.002, .02, 20):
+        metrics.observe('http_request_seconds', value, buckets=(.01, 1))
+    return metrics
@@ -0,0 +1,54 @@
+import json
+
+from habr_challenge.metrics import Metrics
+
+
+def test_metrics_to_json(metrics):
+    assert json.loads(metrics.to_json()) == {
+        'counters': {'http_requests': 2},
+        'gauges': {'lemma_cache_hits': 5},
+        'histograms': {
+            'http_request_seconds': {
+                'buckets': [.01, 1],
+                'counts': [1, 1, 1],
+                'sum': 20.022,
+                'count': 3,
+            },
+        },
+    }
+
+
+def test_metrics_to_prometheus(metrics):
+    prometheus_lines = metrics.to_prometheus().splitlines()
+
+    assert 'habr_http_requests_total 2' in prometheus_lines
+    assert 'habr_lemma_cache_hits 5' in prometheus_lines
+    assert prometheus_lines[-5:] == [
+        'habr_http_request_seconds_bucket{le="0.01"} 1',
+        'habr_http_request_seconds_bucket{le="1"} 2',
+        'habr_http_request_seconds_bucket{le="+Inf"} 3',
+        'habr_http_request_seconds_sum 20.022',
+        'habr_http_request_seconds_count 3',
+    ]
+
+
+def test_metrics_snapshot_merged(metrics):
+    worker_metrics = Metrics()
+    worker_metrics.inc('http_requests')
+    worker_metrics.observe('http_request_seconds', .5, buckets=(.01, 1))
+
+    metrics.merge_snapshot(worker_metrics.pop_snapshot())
+    assert worker_metrics.to_dict()['counters'] == {}
+    assert metrics.to_dict()['counters'] == {'http_requests': 3}
+    assert metrics.to_dict()['histograms'][
+        'http_request_seconds'
+    ]['count'] == 4
+
+
+def test_metrics_stats_set_as_gauges():
+    metrics = Metrics()
+    metrics.set_gauges('stats', {'lemma_cache': {'hits': 1, 'maxsize': 2}})
+
+    assert metrics.to_dict()['gauges'] == {
+        'stats_lemma_cache_hits': 1, 'stats_lemma_cache_maxsize': 2
+    }
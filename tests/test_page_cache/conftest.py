@@ -0,0 +1,49 @@
+import http.server
+import threading
+
+import pytest
+
+from habr_challenge.page_cache import PageCache
+from habr_challenge.session import CrawlerSession
+
+
+class ETagHandler(http.server.BaseHTTPRequestHandler):
+    """Respond with 304 if request ETag matches the page."""
+
+    ETAG = '"v1"'
+
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == self.ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = self.path.encode('utf-8')
+        self.send_response(200)
+        self.send_header('ETag', self.ETAG)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def etag_server_url():
+    server = http.server.HTTPServer(('127.0.0.1', 0), ETagHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:{0}'.format(server.server_port)
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def page_cache(tmpdir):
+    return PageCache(str(tmpdir))
+
+
+@pytest.fixture
+def cached_session(page_cache):
+    with CrawlerSession(page_cache=page_cache) as session:
+        yield session
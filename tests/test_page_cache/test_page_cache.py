@@ -0,0 +1,85 @@
+import gzip
+import json
+import os
+
+from concurrent import futures
+
+from habr_challenge.page_cache import PageCache
+from habr_challenge.raw_page import RawPage
+from habr_challenge.session import CrawlerSession
+
+
+def test_page_cache_stores_page_with_validators(page_cache):
+    page_cache.set(
+        'http://test.com/', RawPage('страница'.encode('cp1251'), 'cp1251'),
+        etag='"v1"'
+    )
+    entry = page_cache.get('http://test.com/')
+
+    assert (entry.body.text(), entry.etag, entry.last_modified) == \
+        ('страница', '"v1"', None)
+    assert entry.body.encoding == 'cp1251'
+    assert page_cache.is_fresh(entry)
+    assert page_cache.get('http://test.com/other/') is None
+
+
+def test_page_cache_reads_pages_cached_as_text(page_cache):
+    path = page_cache._path('http://test.com/')
+    with gzip.open(path + '.gz', 'wt', encoding='utf-8') as f:
+        f.write('страница')
+    with open(path + '.json', 'w') as f:
+        json.dump({
+            'url': 'http://test.com/', 'etag': None,
+            'last_modified': None, 'stored_at': 0,
+        }, f)
+
+    assert page_cache.get('http://test.com/').body.text() == 'страница'
+
+
+def test_page_cache_evicts_least_recently_used_pages(tmpdir):
+    page_cache = PageCache(str(tmpdir))
+    page_cache.set('http://test.com/1/', RawPage(b'first', None))
+    os.utime(page_cache._path('http://test.com/1/') + '.gz', (0, 0))
+    page_cache.max_size = page_cache.info['size'] + 1
+    page_cache.set('http://test.com/2/', RawPage(b'second', None))
+
+    assert page_cache.get('http://test.com/1/') is None
+    assert page_cache.get('http://test.com/2/').body.text() == 'second'
+
+
+def test_fresh_page_served_from_cache(cached_session, etag_server_url):
+    url = etag_server_url + '/fresh/'
+
+    assert cached_session.fetch(url).text() == '/fresh/'
+    assert cached_session.fetch(url).text() == '/fresh/'
+    assert cached_session.page_cache.info['hits'] == 1
+
+
+def test_stale_page_revalidated(cached_session, etag_server_url):
+    url = etag_server_url + '/stale/'
+    cached_session.page_cache.ttl = 0
+
+    assert isinstance(cached_session.fetch(url), RawPage)
+    assert cached_session.fetch(url).text() == '/stale/'
+    assert cached_session.page_cache.revalidated == 1
+
+
+def test_offline_session_serves_only_cached_pages(page_cache):
+    page_cache.set('http://test.com/', RawPage(b'cached', None))
+
+    with CrawlerSession(page_cache=page_cache, offline=True) as session:
+        assert session.fetch('http://test.com/').text() == 'cached'
+        assert session.fetch('http://test.com/missing/') is None
+
+
+def test_page_cache_counts_concurrent_fetches(page_cache):
+    page_cache.set('http://test.com/', RawPage(b'cached', None))
+
+    with CrawlerSession(page_cache=page_cache, offline=True) as session, \
+            futures.ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(
+            session.fetch,
+            ['http://test.com/', 'http://test.com/missing/'] * 200
+        ))
+
+    assert (page_cache.info['hits'], page_cache.info['misses']) == (200, 200)
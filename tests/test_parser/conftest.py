@@ -15,3 +15,42 @@ def article_data():
     title = '(Законы Акина) законы космической инженерии'
 
     return parser.ARTICLE_DATA(title, article_publication_datetime)
+
+
+@pytest.fixture(scope="module")
+def feed_page():
+    article = (
+        '<article class="{class_}">'
+        '<header><span class="post__time">{datetime}</span></header>'
+        '<h2><a href="https://habr.com/post/{id_}/"'
+        ' class="post__title_link">{title}</a></h2>'
+        '</article>'
+    )
+    return (
+        '<html><head><meta charset="utf-8"></head><body>'
+        '<div class="posts_list">{articles}</div>'
+        '<article class="post post_full"><span class="post__time">'
+        'вчера в 10:00</span></article>'
+        '</body></html>'
+    ).format(articles=''.join(
+        article.format(class_=class_, datetime=datetime, id_=id_, title=title)
+        for class_, datetime, id_, title in (
+            ('post post_preview', 'сегодня в 12:34', 1, 'Законы Акина'),
+            ('post  post_preview', 'вчера в 09:10', 2, 'Код &amp; <b>ОС</b>'),
+            ('post post_preview', '1 января 2010 в 10:00', 3, 'Окна'),
+        )
+    ))
+
+
+@pytest.fixture(scope="module")
+def make_feed_page():
+    def make_feed_page(*articles):
+        """Make feed page of (id, title) articles."""
+        return '<html><body>{0}</body></html>'.format(''.join(
+            '<article class="post post_preview">'
+            '<span class="post__time">1 января 2010 в 10:00</span>'
+            '<a href="https://habr.com/post/{0}/" class="post__title_link">'
+            '{1}</a></article>'.format(id_, title)
+            for id_, title in articles
+        ))
+    return make_feed_page
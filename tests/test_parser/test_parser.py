@@ -1,4 +1,16 @@
+import argparse
 import collections
+import time
+
+from concurrent import futures
+
+import pytest
+
+from habr_challenge import parser
+from habr_challenge.parser_data_collector import \
+    ParserDataCollector, \
+    get_morph_analyzer
+from habr_challenge.site_config import Selector, SiteConfig
 
 
 def test_data_collector_normalizes_publication_datetime(
@@ -17,7 +29,34 @@ def test_data_collector_normalizes_article_title(
 ):
     assert parser_data_collector._normalize_title(
         article_data.title) == \
-        collections.Counter({'закон': 2, 'инженерия': 1})
+        collections.Counter({'закон': 2, 'инженерия': 1, 'акина': 1})
+
+
+def test_data_collector_normalizes_titles_batch():
+    parser_data_collector = ParserDataCollector()
+    assert parser_data_collector.normalize_titles([
+        'Окна и двери', '«Окна», окна!', 'Что-то о C++'
+    ]) == [
+        collections.Counter({'окно': 1, 'дверь': 1}),
+        collections.Counter({'окно': 2}),
+        collections.Counter(),
+    ]
+    # Every unique word is analyzed once for the whole batch
+    assert parser_data_collector.stats['lemma_cache']['misses'] == 6
+
+
+def test_data_collector_collect_many_as_one_by_one():
+    articles_data = [
+        parser.ARTICLE_DATA('Окна и двери', '1 января 2010'),
+        parser.ARTICLE_DATA('Двери, окна', '10 января 2010'),
+    ]
+    one_by_one = ParserDataCollector()
+    for article_data in articles_data:
+        one_by_one.collect(article_data)
+    batch = ParserDataCollector()
+    batch.collect_many(articles_data)
+
+    assert batch._parser_result == one_by_one._parser_result
 
 
 def test_data_collector_updating_in_realtime(
@@ -40,5 +79,182 @@ def test_data_collector_result_dict(
 ):
     parser_data_collector.collect(article_data)
     assert parser_data_collector.result_dict == {
-        ('28-12-2009', '03-01-2010'): 'закон инженерия'
+        ('28-12-2009', '03-01-2010'): 'закон инженерия акина'
     }
+
+
+def test_data_collector_caches_title_words_morphology(
+    parser_data_collector, article_data
+):
+    parser_data_collector._normalize_title(article_data.title)
+    hits = parser_data_collector.stats['lemma_cache']['hits']
+
+    parser_data_collector._normalize_title(article_data.title)
+    # "законы" is met twice but looked up once
+    assert parser_data_collector.stats['lemma_cache']['hits'] == hits + 4
+
+
+def test_morph_analyzer_is_shared():
+    assert get_morph_analyzer() is get_morph_analyzer()
+
+
+def test_morph_analyzer_is_created_once_by_threads(monkeypatch):
+    import pymorphy2
+
+    created = []
+
+    def morph_analyzer():
+        time.sleep(.05)  # Dictionaries loading
+        created.append(object())
+        return created[-1]
+
+    monkeypatch.setattr(
+        'habr_challenge.parser_data_collector._morph_analyzer', None
+    )
+    monkeypatch.setattr(pymorphy2, 'MorphAnalyzer', morph_analyzer)
+    with futures.ThreadPoolExecutor(max_workers=4) as executor:
+        analyzers = list(executor.map(
+            lambda _: get_morph_analyzer(), range(4)
+        ))
+
+    assert len(created) == 1
+    assert analyzers == created * 4
+
+
+@pytest.mark.parametrize('backend_name', sorted(parser.PARSE_BACKENDS))
+def test_parse_backends_find_same_articles(feed_page, backend_name):
+    if backend_name == 'lxml':
+        pytest.importorskip('lxml')
+    site_config = SiteConfig('habr')
+    selectors = parser._get_selectors_from_config(
+        site_config, *parser.ARTICLE_SELECTORS
+    )
+    expected = list(parser._parse_articles(feed_page, **selectors))
+
+    parse_backend = parser.get_parse_backend(site_config, backend_name)
+    assert len(expected) == 3
+    assert list(parse_backend.parse_articles(feed_page)) == expected
+
+
+def test_parse_backend_created_once_per_site():
+    assert parser.get_parse_backend(SiteConfig('habr'), 'strainer') is \
+        parser.get_parse_backend(SiteConfig('habr'), 'strainer')
+    assert parser.get_parse_backend(SiteConfig('habr'), 'strainer') is not \
+        parser.get_parse_backend(SiteConfig('habr'), 'lxml')
+
+
+def test_parse_backend_created_again_for_redefined_site(monkeypatch):
+    parse_backend = parser.get_parse_backend(SiteConfig('habr'))
+    monkeypatch.setitem(SiteConfig.SITE_CONFIG, 'habr', dict(
+        SiteConfig.SITE_CONFIG['habr'], article=Selector('div', 'post')
+    ))
+
+    assert parser.get_parse_backend(SiteConfig('habr')) is not parse_backend
+
+
+def test_parse_in_process_pool_matches_single_process(feed_page):
+    site_config = SiteConfig('habr')
+    feed_pages = [feed_page, feed_page.replace('Окна', 'Окна и двери')] * 3
+
+    single_process_result = parser.parse(
+        enumerate(feed_pages, 1), site_config,
+        argparse.Namespace(workers=1)
+    )
+    process_pool_result = parser.parse(
+        enumerate(feed_pages, 1), site_config,
+        argparse.Namespace(workers=2)
+    )
+    assert process_pool_result == single_process_result
+    assert list(process_pool_result) == list(single_process_result)
+
+
+def test_collector_reset_keeps_caches(feed_page):
+    site_config = SiteConfig('habr')
+    user_settings = argparse.Namespace(workers=1)
+    parser_data_collector = ParserDataCollector(user_settings)
+    result_dict = parser.parse(
+        enumerate([feed_page], 1), site_config, user_settings,
+        parser_data_collector=parser_data_collector
+    )
+    lemma_cache_info = parser_data_collector.stats['lemma_cache']
+
+    parser_data_collector.reset(argparse.Namespace(workers=1, top=1))
+    assert parser_data_collector.result_dict == {}
+    assert parser.parse(
+        enumerate([feed_page], 1), site_config, user_settings,
+        parser_data_collector=parser_data_collector
+    ) == {
+        week_range: popular_words.split()[0]
+        for week_range, popular_words in result_dict.items()
+    }
+    assert parser_data_collector.stats['lemma_cache']['size'] == \
+        lemma_cache_info['size']
+    assert parser_data_collector.stats['lemma_cache']['hits'] > \
+        lemma_cache_info['hits']
+
+
+def test_collector_result_is_saved_and_merged(tmpdir):
+    shards = []
+    for titles in (['Окна', 'Двери'], ['Окна и стены'], ['Стены']):
+        shard = ParserDataCollector()
+        shard.collect_many([
+            parser.ARTICLE_DATA(title, '1 января 2010') for title in titles
+        ])
+        shards.append(str(tmpdir.join('shard{0}.json.gz'.format(len(shards)))))
+        shard.save(shards[-1])
+
+    merged = ParserDataCollector()
+    for path in shards:
+        merged.load(path)
+    assert merged._parser_result == {
+        ('28-12-2009', '03-01-2010'): collections.Counter(
+            {'окно': 2, 'стена': 2, 'дверь': 1}
+        )
+    }
+
+    # Merge of merged shards is the same
+    first_two = ParserDataCollector()
+    first_two.load(shards[0])
+    first_two.load(shards[1])
+    first_two.save(str(tmpdir.join('first_two.json.gz')))
+    regrouped = ParserDataCollector()
+    regrouped.load(shards[2])
+    regrouped.load(str(tmpdir.join('first_two.json.gz')))
+    assert regrouped._parser_result == merged._parser_result
+
+
+def test_parse_counts_shifted_articles_once(make_feed_page):
+    # New article has shifted "Окна" to the second page
+    feed_pages = [
+        make_feed_page((2, 'Двери'), (1, 'Окна')),
+        make_feed_page((1, 'Окна'), (0, 'Стены')),
+    ]
+
+    result = parser.parse(
+        enumerate(feed_pages, 1), SiteConfig('habr'), argparse.Namespace()
+    )
+    assert result == {('28-12-2009', '03-01-2010'): 'дверь окно стена'}
+
+
+@pytest.mark.parametrize('end_of_feed_page', [
+    '<html><body></body></html>', None
+])
+def test_parse_stops_at_end_of_feed(feed_page, end_of_feed_page):
+    crawled_pages = []
+
+    def pagination_gen():
+        for page, articles_list in enumerate(
+            [feed_page, end_of_feed_page or feed_page, feed_page], 1
+        ):
+            crawled_pages.append(page)
+            yield page, articles_list
+
+    parser.parse(pagination_gen(), SiteConfig('habr'), argparse.Namespace())
+    assert len(crawled_pages) == 2
+
+    crawled_pages.clear()
+    parser.parse(
+        pagination_gen(), SiteConfig('habr'),
+        argparse.Namespace(as_completed=True)
+    )
+    assert len(crawled_pages) == 3
@@ -0,0 +1,49 @@
+import argparse
+
+import pytest
+
+from habr_challenge import crawler
+from habr_challenge.site_config import SiteConfig
+
+
+ARTICLE = (
+    '<article class="post post_preview">'
+    '<span class="post__time">1 января 2010 в 10:00</span>'
+    '<a href="{url}{id_}/" class="post__title_link">{title}</a>'
+    '</article>'
+)
+
+SITES_TITLES = {
+    'habr': ['Окна', 'Двери'],
+    'habr_mirror': ['Окна', 'Стены', 'Стены'],
+}
+
+
+@pytest.fixture
+def user_settings():
+    return argparse.Namespace(pages=1, show_progress=False, concurrency=1)
+
+
+@pytest.fixture
+def site_configs(monkeypatch):
+    """Serve feed page of SITES_TITLES articles from memory."""
+    SiteConfig.SITE_CONFIG['habr_mirror'] = dict(
+        SiteConfig.SITE_CONFIG['habr'], url='https://mirror.habr.com/all/'
+    )
+
+    def fetch_page(session, articles_list_url, page):
+        url = articles_list_url.format(page=page)
+        site_name = 'habr_mirror' if 'mirror' in url else 'habr'
+        return '<html><body>{0}</body></html>'.format(''.join(
+            ARTICLE.format(url=url, id_=id_, title=title)
+            for id_, title in enumerate(SITES_TITLES[site_name])
+        ))
+
+    monkeypatch.setattr(crawler, '_fetch_page', fetch_page)
+    yield [SiteConfig('habr'), SiteConfig('habr_mirror')]
+    SiteConfig.SITE_CONFIG.pop('habr_mirror')
+
+
+@pytest.fixture
+def session():
+    return None  # Pages are not fetched through the session
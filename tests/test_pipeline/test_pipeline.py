@@ -0,0 +1,96 @@
+from habr_challenge import pipeline
+
+
+WEEK = ('28-12-2009', '03-01-2010')
+
+
+def test_parse_sites_keeps_results_per_site(
+    site_configs, user_settings, session
+):
+    parser_data_collectors = pipeline.parse_sites(
+        site_configs, user_settings, session
+    )
+
+    assert list(parser_data_collectors) == ['habr', 'habr_mirror']
+    assert parser_data_collectors['habr'].result_dict == {
+        WEEK: 'окно дверь'
+    }
+    assert parser_data_collectors['habr_mirror'].result_dict == {
+        WEEK: 'стена окно'
+    }
+
+
+def test_combine_sites_results(site_configs, user_settings, session):
+    parser_data_collectors = pipeline.parse_sites(
+        site_configs, user_settings, session
+    )
+
+    combined = pipeline.combine(parser_data_collectors.values())
+    assert combined.result_dict == {WEEK: 'окно стена дверь'}
+
+
+class WeeksCollector:
+
+    def __init__(self):
+        self.weeks = []
+
+    def week_ranges(self):
+        return list(self.weeks)
+
+    def popular_words(self, week_range):
+        return ''
+
+
+class ListReportWriter:
+
+    def __init__(self):
+        self.weeks = []
+
+    def write_week(self, week_range, popular_words):
+        self.weeks.append(week_range[0])
+
+    def flush(self):
+        pass
+
+
+def test_week_stream_writes_completed_weeks_newest_first():
+    parser_data_collector = WeeksCollector()
+    report_writer = ListReportWriter()
+    week_stream = pipeline.WeekStream(parser_data_collector, report_writer)
+
+    parser_data_collector.weeks.append(('03-06-2019', '09-06-2019'))
+    week_stream.page_collected(1)
+    assert report_writer.weeks == []  # The week may still be incomplete
+
+    parser_data_collector.weeks += [
+        ('27-05-2019', '02-06-2019'), ('20-05-2019', '26-05-2019')
+    ]
+    week_stream.page_collected(2)
+    assert report_writer.weeks == ['03-06-2019', '27-05-2019']
+
+    week_stream.close()
+    assert report_writer.weeks == ['03-06-2019', '27-05-2019', '20-05-2019']
+
+
+def test_week_stream_waits_for_pages_collected_out_of_order():
+    parser_data_collector = WeeksCollector()
+    report_writer = ListReportWriter()
+    week_stream = pipeline.WeekStream(
+        parser_data_collector, report_writer, first_page=3
+    )
+
+    # Page 4 is collected before page 3 that still may add newer weeks
+    parser_data_collector.weeks.append(('20-05-2019', '26-05-2019'))
+    week_stream.page_collected(4)
+    parser_data_collector.weeks.append(('13-05-2019', '19-05-2019'))
+    week_stream.page_collected(5)
+    assert report_writer.weeks == []
+
+    parser_data_collector.weeks += [
+        ('03-06-2019', '09-06-2019'), ('27-05-2019', '02-06-2019')
+    ]
+    week_stream.page_collected(3)
+    assert report_writer.weeks == ['03-06-2019', '27-05-2019', '20-05-2019']
+
+    week_stream.close()
+    assert report_writer.weeks[-1] == '13-05-2019'
@@ -0,0 +1,8 @@
+import pytest
+
+from habr_challenge.publication_datetime import PublicationDatetimeParser
+
+
+@pytest.fixture
+def datetime_parser():
+    return PublicationDatetimeParser()
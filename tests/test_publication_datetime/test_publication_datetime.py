@@ -0,0 +1,53 @@
+import datetime
+
+import pytest
+
+from habr_challenge.publication_datetime import PublicationDatetimeParser
+
+
+@pytest.mark.parametrize('datetime_string, expected', [
+    ('1 января 2010 в 10:00', datetime.datetime(2010, 1, 1, 10, 0)),
+    ('1 января 2010', datetime.datetime(2010, 1, 1)),
+    ('23  Мая 2018 г. в 9:05', datetime.datetime(2018, 5, 23, 9, 5)),
+])
+def test_absolute_datetime_parsed_without_fallback(
+    datetime_parser, datetime_string, expected
+):
+    assert datetime_parser.parse(datetime_string) == expected
+    assert datetime_parser.fallbacks == 0
+
+
+def test_relative_datetime_parsed_without_fallback(datetime_parser):
+    today = datetime.date.today()
+    yesterday = today - datetime.timedelta(days=1)
+
+    assert datetime_parser.parse('сегодня в 12:34') == \
+        datetime.datetime.combine(today, datetime.time(12, 34))
+    assert datetime_parser.parse('вчера в 09:10') == \
+        datetime.datetime.combine(yesterday, datetime.time(9, 10))
+    assert datetime_parser.fallbacks == 0
+
+
+def test_parsed_datetime_memoized(datetime_parser):
+    datetime_parser.parse('1 января 2010 в 10:00')
+    datetime_parser.parse('1 января 2010 в 10:00')
+
+    assert datetime_parser.info == {
+        'fast_path': 1, 'fallbacks': 0, 'memo_hits': 1
+    }
+
+
+def test_unknown_format_falls_back_to_dateparser(datetime_parser):
+    assert datetime_parser.parse('2010-01-01') == \
+        datetime.datetime(2010, 1, 1)
+    assert datetime_parser.fallbacks == 1
+
+
+def test_memo_is_bounded():
+    datetime_parser = PublicationDatetimeParser(memo_size=2)
+    for day in range(1, 5):
+        datetime_parser.parse('{0} января 2010'.format(day))
+    datetime_parser.parse('1 января 2010')
+
+    assert len(datetime_parser._memo) == 2
+    assert datetime_parser.info['memo_hits'] == 0
@@ -0,0 +1,24 @@
+import pytest
+
+
+FEED_PAGE = (
+    '<html><head><meta charset="windows-1251"></head><body>'
+    '<article class="post post_preview">'
+    '<span class="post__time">1 января 2010 в 10:00</span>'
+    '<a href="https://habr.com/post/1/" class="post__title_link">'
+    'Законы Акина</a>'
+    '</article>'
+    '</body></html>'
+)
+
+
+@pytest.fixture
+def cp1251_body():
+    """Feed page in windows-1251."""
+    return FEED_PAGE.encode('cp1251')
+
+
+@pytest.fixture
+def utf8_body():
+    """Feed page in utf-8."""
+    return FEED_PAGE.replace('windows-1251', 'utf-8').encode('utf-8')
@@ -0,0 +1,51 @@
+import pytest
+
+from habr_challenge import parser
+from habr_challenge.raw_page import RawPage, sniff_encoding
+from habr_challenge.site_config import SiteConfig
+
+
+@pytest.mark.parametrize('content_type, head, encoding', [
+    ('text/html; charset=UTF-8', b'<meta charset="cp1251">', 'utf-8'),
+    ('text/html', b'<meta charset="windows-1251">', 'cp1251'),
+    (
+        None,
+        b'<meta http-equiv="Content-Type" '
+        b'content="text/html; charset=koi8-r">',
+        'koi8-r'
+    ),
+    ('text/html; charset=unknown', b'<html>', None),
+    (None, b'<html>', None),
+])
+def test_sniff_encoding(content_type, head, encoding):
+    assert sniff_encoding(content_type, head) == encoding
+
+
+def test_raw_page_is_decoded_with_declared_encoding(utf8_body, cp1251_body):
+    raw_page = RawPage.from_body(utf8_body)
+    assert raw_page.encoding == 'utf-8'
+    assert 'Законы Акина' in raw_page.text()
+    assert raw_page.to_utf8() is utf8_body
+
+    raw_page = RawPage.from_body(cp1251_body)
+    assert raw_page.encoding == 'cp1251'
+    assert 'Законы Акина' in raw_page.to_utf8().decode('utf-8')
+
+
+def test_raw_page_of_undeclared_encoding(cp1251_body):
+    raw_page = RawPage(cp1251_body, None)
+    assert 'Законы Акина' in raw_page.text('cp1251')
+
+
+@pytest.mark.parametrize('backend_name', sorted(parser.PARSE_BACKENDS))
+def test_parse_backends_parse_raw_pages(cp1251_body, backend_name):
+    if backend_name == 'lxml':
+        pytest.importorskip('lxml')
+    parse_backend = parser.get_parse_backend(SiteConfig('habr'), backend_name)
+
+    articles_data = list(parse_backend.parse_articles(
+        RawPage.from_body(cp1251_body)
+    ))
+    assert [article_data.title for article_data in articles_data] == [
+        'Законы Акина'
+    ]
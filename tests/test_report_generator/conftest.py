@@ -10,3 +10,17 @@ def report_generator():
         ('01-01-2010', '07-07-2010'): 'окно менеджер задача',
     }
     return ReportGenerator(report_data_dict)
+
+
+@pytest.fixture
+def report_data_dict():
+    return {
+        ('04-01-2010', '10-01-2010'): 'окно менеджер задача',
+        ('28-12-2009', '03-01-2010'): 'пример, решение "проблема"',
+        ('01-01-2001', '07-01-2001'): 'пример',
+    }
+
+
+@pytest.fixture
+def report_path(tmpdir):
+    return str(tmpdir.join('report'))
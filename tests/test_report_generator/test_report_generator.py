@@ -1,6 +1,100 @@
+import contextlib
+import csv
+import io
+import json
+import sys
+
+import pytest
+
+from habr_challenge import report_generator
+from habr_challenge.report_generator import \
+    BinaryReportWriter, \
+    CsvReportWriter, \
+    JsonLinesReportWriter, \
+    TableReportWriter, \
+    read_binary_report, \
+    week_sort_key
+
+
 def test_report_column_width(report_generator):
     assert report_generator.columns_width == (
         len('{0} '.format(report_generator.REPORT_HEADER[0])),
         len(' {0} '.format(report_generator.REPORT_HEADER[1])),
         len(' пример решение проблема ')
     )
+
+
+def test_jsonl_report_is_chronological(report_data_dict, report_path):
+    with JsonLinesReportWriter(report_path) as report_writer:
+        report_writer.write(report_data_dict)
+
+    with open(report_path, encoding='utf-8') as f:
+        weeks = [json.loads(line) for line in f]
+    assert [week['week_start'] for week in weeks] == \
+        ['01-01-2001', '28-12-2009', '04-01-2010']
+    assert weeks[-1] == {
+        'week_start': '04-01-2010',
+        'week_end': '10-01-2010',
+        'words': ['окно', 'менеджер', 'задача'],
+    }
+
+
+def test_csv_report(report_data_dict, report_path):
+    with CsvReportWriter(report_path) as report_writer:
+        report_writer.write(report_data_dict)
+
+    with open(report_path, encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['week_start', 'week_end', 'words']
+    assert rows[2] == [
+        '28-12-2009', '03-01-2010', 'пример, решение "проблема"'
+    ]
+
+
+def test_binary_report_round_trip(report_data_dict, report_path):
+    with BinaryReportWriter(report_path) as report_writer:
+        report_writer.write(report_data_dict)
+
+    with open(report_path, 'rb') as f:
+        weeks = list(read_binary_report(f.read()))
+    assert dict(weeks) == report_data_dict
+    assert [week_range for week_range, _ in weeks] == sorted(
+        report_data_dict, key=week_sort_key
+    )
+
+
+def test_binary_report_is_not_written_to_text_stdout(monkeypatch):
+    monkeypatch.setattr(sys, 'stdout', io.StringIO())
+    with pytest.raises(ValueError):
+        BinaryReportWriter()
+
+
+def test_table_report_writes_weeks_before_close(report_path, monkeypatch):
+    monkeypatch.setattr(report_generator, 'BUFFER_SIZE', 1)
+    report_writer = TableReportWriter(report_path, words_width=20)
+    report_writer.write_week(('28-12-2009', '03-01-2010'), 'окно')
+
+    with open(report_path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 4
+    assert len({len(line) for line in lines}) == 1
+
+    report_writer.close()
+    with open(report_path, encoding='utf-8') as f:
+        assert len(f.read().splitlines()) == 5
+
+
+def test_writer_to_redirected_stdout(report_data_dict):
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        with CsvReportWriter() as report_writer:
+            report_writer.write(report_data_dict)
+    assert output.getvalue().splitlines()[0] == 'week_start,week_end,words'
+
+
+def test_binary_report_of_long_words(report_path):
+    report_data_dict = {('28-12-2009', '03-01-2010'): 'слово ' * 7000}
+    with BinaryReportWriter(report_path) as report_writer:
+        report_writer.write(report_data_dict)
+
+    with open(report_path, 'rb') as f:
+        assert dict(read_binary_report(f.read())) == report_data_dict
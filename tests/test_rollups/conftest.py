@@ -0,0 +1,31 @@
+import collections
+import datetime
+
+import pytest
+
+from habr_challenge.rollups import WeekRollups
+
+
+WORDS = ('окно', 'дверь', 'стена', 'крыша', 'пол')
+
+
+@pytest.fixture
+def weeks_words():
+    """Two years of weeks with nouns counted by the week number."""
+    weeks_words = []
+    week_start = datetime.date(2018, 1, 1)
+    for i in range(104):
+        week_end = week_start + datetime.timedelta(days=6)
+        weeks_words.append((
+            (week_start.strftime('%d-%m-%Y'), week_end.strftime('%d-%m-%Y')),
+            collections.Counter({
+                WORDS[i % len(WORDS)]: i % 7 + 1, WORDS[i % 3]: 1
+            })
+        ))
+        week_start += datetime.timedelta(days=7)
+    return weeks_words
+
+
+@pytest.fixture
+def rollups(weeks_words):
+    return WeekRollups(weeks_words)
@@ -0,0 +1,102 @@
+import argparse
+import collections
+import datetime
+
+import pytest
+
+from habr_challenge.parser import ARTICLE_DATA
+from habr_challenge.parser_data_collector import ParserDataCollector
+from habr_challenge.rollups import WeekRollups, parse_date
+
+
+def brute_force(weeks_words, date_from, date_to):
+    words = collections.Counter()
+    for week_range, week_words in weeks_words:
+        if date_from <= parse_date(week_range[0]) <= date_to:
+            words.update(week_words)
+    return words
+
+
+def test_range_is_split_into_largest_buckets(rollups):
+    assert rollups.buckets(
+        datetime.date(2018, 3, 20), datetime.date(2019, 12, 31)
+    ) == [
+        ('week', datetime.date(2018, 3, 26)),
+        ('quarter', (2018, 1)),
+        ('quarter', (2018, 2)),
+        ('quarter', (2018, 3)),
+        ('year', 2019),
+    ]
+
+
+@pytest.mark.parametrize('date_from, date_to', [
+    ('01-01-2018', '31-12-2019'),
+    ('20-03-2018', '31-12-2019'),
+    ('15-02-2018', '10-11-2019'),
+    ('02-04-2019', '02-04-2019'),
+    ('01-05-2018', '31-05-2018'),
+])
+def test_query_counts_like_brute_force(
+    rollups, weeks_words, date_from, date_to
+):
+    date_from, date_to = parse_date(date_from), parse_date(date_to)
+    expected = brute_force(weeks_words, date_from, date_to)
+    assert dict(rollups.query(date_from, date_to, top=None)) == expected
+
+
+def test_query_merges_few_buckets(rollups):
+    assert rollups.buckets(
+        datetime.date(2010, 1, 1), datetime.date(2019, 12, 31)
+    ) == [('years', (1, 1005)), ('years', (2, 503)), ('years', (2, 504))]
+    assert len(rollups.buckets(
+        datetime.date(1025, 1, 1), datetime.date(3000, 12, 31)
+    )) < 2 * 11
+
+
+def test_years_spans_are_updated_by_add(rollups, weeks_words):
+    date_from, date_to = datetime.date(2016, 1, 1), datetime.date(2019, 12, 31)
+    assert ('years', (2, 504)) in rollups.buckets(date_from, date_to)
+    assert dict(rollups.query(date_from, date_to, top=None)) == \
+        brute_force(weeks_words, date_from, date_to)
+
+    week_words = (('02-01-2017', '08-01-2017'), collections.Counter(['пол']))
+    rollups.add(*week_words)
+    assert dict(rollups.query(date_from, date_to, top=None)) == \
+        brute_force(weeks_words + [week_words], date_from, date_to)
+
+
+def test_collector_range_result_dict(weeks_words):
+    parser_data_collector = ParserDataCollector()
+    parser_data_collector.merge(collections.OrderedDict(weeks_words))
+
+    result_dict = parser_data_collector.range_result_dict(
+        date_to=datetime.date(2018, 1, 31)
+    )
+    assert list(result_dict) == [('01-01-2018', '31-01-2018')]
+    words = result_dict['01-01-2018', '31-01-2018'].split()
+    assert words[0] == 'пол' and len(words) == 3
+    assert parser_data_collector.range_result_dict(
+        date_to=datetime.date(2017, 1, 1)
+    ) == {}
+
+
+@pytest.mark.parametrize('compact_store', [False, True])
+def test_collector_rollups_are_updated_incrementally(
+    weeks_words, compact_store
+):
+    parser_data_collector = ParserDataCollector(
+        argparse.Namespace(compact_store=compact_store)
+    )
+    parser_data_collector.merge(collections.OrderedDict(weeks_words[:52]))
+    rollups = parser_data_collector.rollups()
+
+    parser_data_collector.merge(collections.OrderedDict(weeks_words[52:]))
+    parser_data_collector.collect_many([
+        ARTICLE_DATA('Окна и крыши', '1 января 2019')
+    ])
+    assert parser_data_collector.rollups() is rollups
+    assert dict(rollups.query(top=None)) == dict(WeekRollups(
+        parser_data_collector._parser_result.items()
+    ).query(top=None))
+    assert dict(rollups.query(top=None))['крыша'] == \
+        sum(words['крыша'] for _, words in weeks_words) + 1
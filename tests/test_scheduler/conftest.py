@@ -0,0 +1,8 @@
+import pytest
+
+from habr_challenge.scheduler import HostScheduler
+
+
+@pytest.fixture
+def scheduler():
+    return HostScheduler(max_connections=2)
@@ -0,0 +1,47 @@
+import threading
+import time
+
+from concurrent import futures
+
+from habr_challenge.scheduler import RateLimiter
+
+
+def test_rate_limiter_spaces_requests():
+    rate_limiter = RateLimiter(rps=100)
+
+    started = time.monotonic()
+    for _ in range(5):
+        rate_limiter.acquire()
+    assert time.monotonic() - started >= 4 * rate_limiter.interval
+
+
+def test_unlimited_rate_limiter_does_not_wait():
+    assert RateLimiter(rps=0).acquire() == 0.
+
+
+def _max_in_flight(scheduler, urls):
+    in_flight = {}
+    max_in_flight = {}
+    lock = threading.Lock()
+
+    def request(url):
+        with scheduler.slot(url):
+            with lock:
+                in_flight[url] = in_flight.get(url, 0) + 1
+                max_in_flight[url] = max(
+                    max_in_flight.get(url, 0), in_flight[url]
+                )
+            time.sleep(.05)
+            with lock:
+                in_flight[url] -= 1
+
+    with futures.ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        list(executor.map(request, urls))
+    return max_in_flight
+
+
+def test_scheduler_limits_connections_per_host(scheduler):
+    max_in_flight = _max_in_flight(
+        scheduler, ['http://a.com/'] * 6 + ['http://b.com/'] * 6
+    )
+    assert max_in_flight == {'http://a.com/': 2, 'http://b.com/': 2}
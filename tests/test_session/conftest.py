@@ -0,0 +1,40 @@
+import http.server
+import threading
+
+import pytest
+
+from habr_challenge.session import CrawlerSession
+
+
+class FlakyHandler(http.server.BaseHTTPRequestHandler):
+    """Respond with 503 to every first request of a path."""
+
+    requested_paths = []
+
+    def do_GET(self):
+        status = 200 if self.path in self.requested_paths else 503
+        self.requested_paths.append(self.path)
+        body = self.headers.get('Accept-Encoding', '').encode()
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def flaky_server_url():
+    server = http.server.HTTPServer(('127.0.0.1', 0), FlakyHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:{0}'.format(server.server_port)
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def crawler_session():
+    with CrawlerSession(retries=2, backoff_factor=0) as session:
+        yield session
@@ -0,0 +1,29 @@
+from habr_challenge.session import CrawlerSession
+
+
+def test_session_retries_server_errors(crawler_session, flaky_server_url):
+    response = crawler_session.get(flaky_server_url + '/retry/')
+
+    assert response.status_code == 200
+
+
+def test_session_requests_compressed_responses(
+    crawler_session, flaky_server_url
+):
+    response = crawler_session.get(flaky_server_url + '/gzip/')
+
+    assert 'gzip' in response.text
+
+
+def test_session_without_retries_returns_error(flaky_server_url):
+    with CrawlerSession(retries=0) as crawler_session:
+        response = crawler_session.get(flaky_server_url + '/no-retry/')
+
+    assert response.status_code == 503
+
+
+def test_session_reads_raw_page(crawler_session, flaky_server_url):
+    raw_page = crawler_session.get_raw(flaky_server_url + '/raw/')
+
+    assert b'gzip' in raw_page.body
+    assert raw_page.encoding is None  # No charset declared
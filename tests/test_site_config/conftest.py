@@ -1,3 +1,5 @@
+import json
+
 import pytest
 
 from habr_challenge.site_config import Selector, SiteConfig
@@ -16,3 +18,19 @@ def site_config():
         'div': Selector('div', class_='test_me'),
     }
     return SiteConfig('test')
+
+
+@pytest.fixture
+def site_config_file(tmpdir):
+    path = tmpdir.join('sites.json')
+    path.write(json.dumps({
+        'loaded': {
+            'url': 'http://loaded.com/',
+            'pagination': 'page{page}/',
+            'article': {'selector': 'article', 'class_': 'post'},
+            'article_publication_datetime': {'selector': 'span'},
+            'article_title': {'selector': 'a', 'class_': 'title'},
+        },
+    }))
+    yield str(path)
+    SiteConfig.SITE_CONFIG.pop('loaded', None)
@@ -30,3 +30,20 @@ def test_get_site_config_by_name():
 def test_article_list_url_property(site_config):
     assert site_config.articles_list_url == \
         'http://test.com/pages{page}/'
+
+
+def test_load_site_configs(site_config_file):
+    assert SiteConfig.load(site_config_file) == ['loaded']
+
+    site_config = SiteConfig('loaded')
+    assert site_config.name == 'loaded'
+    assert site_config.articles_list_url == 'http://loaded.com/page{page}/'
+    assert site_config.article == Selector('article', class_='post')
+
+
+def test_load_site_configs_requires_selectors(tmpdir):
+    path = tmpdir.join('sites.json')
+    path.write('{"broken": {"url": "http://broken.com/"}}')
+
+    with pytest.raises(KeyError):
+        SiteConfig.load(str(path))
@@ -0,0 +1,47 @@
+import argparse
+
+import pytest
+
+from habr_challenge.site_config import SiteConfig
+
+
+ARTICLE = (
+    '<article class="post post_preview">'
+    '<span class="post__time">1 января 2010 в 10:00</span>'
+    '<a href="https://habr.com/post/{id_}/" class="post__title_link">'
+    '{title}</a>'
+    '</article>'
+)
+
+
+@pytest.fixture
+def make_feed_page():
+    def make_feed_page(*articles):
+        """Make feed page of (id, title) articles."""
+        return '<html><body>{0}</body></html>'.format(''.join(
+            ARTICLE.format(id_=id_, title=title) for id_, title in articles
+        ))
+    return make_feed_page
+
+
+@pytest.fixture
+def feed_pages(make_feed_page):
+    return [
+        make_feed_page((3, 'Окна'), (2, 'Двери')),
+        make_feed_page((1, 'Окна')),
+    ]
+
+
+@pytest.fixture
+def site_config():
+    return SiteConfig('habr')
+
+
+@pytest.fixture
+def user_settings():
+    return argparse.Namespace(workers=1)
+
+
+@pytest.fixture
+def state_path(tmpdir):
+    return str(tmpdir.join('state.json.gz'))
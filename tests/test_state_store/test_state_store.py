@@ -0,0 +1,112 @@
+import pytest
+
+from habr_challenge import parser
+from habr_challenge.state_store import StateStore
+
+
+def test_incremental_run_counts_only_new_articles(
+    make_feed_page, feed_pages, site_config, user_settings, state_path
+):
+    first_run_result = parser.parse(
+        enumerate(feed_pages, 1), site_config, user_settings,
+        state_store=StateStore(state_path)
+    )
+    assert first_run_result == {('28-12-2009', '03-01-2010'): 'окно дверь'}
+
+    crawled_pages = []
+
+    def pagination_gen():
+        for page, feed_page in enumerate(
+            [make_feed_page((4, 'Двери'))] + feed_pages, 1
+        ):
+            crawled_pages.append(page)
+            yield page, feed_page
+
+    second_run_result = parser.parse(
+        pagination_gen(), site_config, user_settings,
+        state_store=StateStore(state_path)
+    )
+    assert second_run_result == {('28-12-2009', '03-01-2010'): 'окно дверь'}
+    # Pagination stops on the first page of known articles
+    assert len(crawled_pages) == 2
+
+    third_run_result = parser.parse(
+        enumerate([make_feed_page((5, 'Двери'))], 1),
+        site_config, user_settings,
+        state_store=StateStore(state_path)
+    )
+    assert third_run_result == {('28-12-2009', '03-01-2010'): 'дверь окно'}
+
+
+def test_page_of_articles_met_in_this_run_does_not_stop_pagination(
+    make_feed_page, feed_pages, site_config, user_settings, state_path
+):
+    parser.parse(
+        enumerate(feed_pages, 1), site_config, user_settings,
+        state_store=StateStore(state_path)
+    )
+
+    # Feed shifted by a new article, so the second page repeats
+    # an article of the first one only
+    second_run_pages = [
+        make_feed_page((5, 'Стены'), (4, 'Двери')),
+        make_feed_page((4, 'Двери')),
+        make_feed_page((3, 'Окна')),
+        make_feed_page((6, 'Крыши')),
+    ]
+    crawled_pages = []
+
+    def pagination_gen():
+        for page, feed_page in enumerate(second_run_pages, 1):
+            crawled_pages.append(page)
+            yield page, feed_page
+
+    parser.parse(
+        pagination_gen(), site_config, user_settings,
+        state_store=StateStore(state_path)
+    )
+    # Pagination stops on the page of articles known by the state
+    assert crawled_pages == [1, 2, 3]
+
+
+def test_interrupted_run_resumed_from_checkpoint(
+    feed_pages, site_config, user_settings, state_path
+):
+    def interrupted_pagination_gen():
+        yield 1, feed_pages[0]
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        parser.parse(
+            interrupted_pagination_gen(), site_config, user_settings,
+            state_store=StateStore(state_path, checkpoint_every=1)
+        )
+
+    state_store = StateStore(state_path)
+    assert state_store.resuming
+    assert state_store.resume_page == 2
+
+    result = parser.parse(
+        enumerate(feed_pages[1:], state_store.resume_page),
+        site_config, user_settings,
+        state_store=state_store
+    )
+    assert result == {('28-12-2009', '03-01-2010'): 'окно дверь'}
+    assert not StateStore(state_path).resuming
+
+
+def test_checkpoint_keeps_crawled_page_numbers(
+    feed_pages, site_config, user_settings, state_path
+):
+    def interrupted_pagination_gen():
+        # Pages before the fifth one were not available offline
+        yield 5, feed_pages[0]
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        parser.parse(
+            interrupted_pagination_gen(), site_config, user_settings,
+            state_store=StateStore(state_path, checkpoint_every=1)
+        )
+
+    assert StateStore(state_path).resume_page == 6